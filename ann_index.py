@@ -0,0 +1,321 @@
+"""
+Approximate nearest neighbour indexes for the semantic search branch
+IVF-flat (pure NumPy) and HNSW (optional, via hnswlib)
+
+Both indexes return candidate row ids for a normalized query; exact scores
+are then computed from the EmbeddingStore for just those candidates.
+
+Recall knobs:
+    IVFFlatIndex.nprobe    inverted lists scanned per query (higher = better recall)
+    HNSWIndex.ef_search    HNSW candidate list size (higher = better recall)
+"""
+import copy
+import json
+import tempfile
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from utils import top_k_indices
+
+try:
+    import hnswlib
+except ImportError:
+    hnswlib = None
+
+ANN_BACKENDS = ('ivf', 'hnsw')
+ANN_MANIFEST_FILE = "ann.json"
+
+
+class IVFFlatIndex:
+    """
+    Inverted-file index over spherical k-means centroids.
+
+    Each vector id is stored in the inverted list of its nearest centroid.
+    A query scans the ids of the nprobe closest lists. New vectors are
+    assigned to existing centroids; the centroids are retrained once the
+    index has grown RETRAIN_GROWTH times past the size it was trained on.
+    Until min_train_size vectors exist the index stays untrained and
+    search() returns None, meaning "use exact search".
+    """
+
+    RETRAIN_GROWTH = 4
+    KMEANS_ITERATIONS = 10
+    MAX_TRAINING_SAMPLE = 50_000
+    DATA_FILE = "ivf.npz"
+
+    def __init__(self, nlist: Optional[int] = None, nprobe: int = 8, min_train_size: int = 2048):
+        """
+        Initialize an empty IVF index.
+
+        Args:
+            nlist: Number of inverted lists (default: ~4 * sqrt(N) at training time)
+            nprobe: Number of lists scanned per query
+            min_train_size: Vectors needed before the index is trained
+        """
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.min_train_size = min_train_size
+
+        self.centroids: Optional[np.ndarray] = None
+        self._lists: List[np.ndarray] = []
+        self._trained_size = 0
+        self._size = 0
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def is_trained(self) -> bool:
+        return self.centroids is not None
+
+    def _assign(self, vectors: np.ndarray) -> np.ndarray:
+        """Nearest centroid (max inner product) for each vector."""
+        assignments = np.empty(len(vectors), dtype=np.int64)
+        for start in range(0, len(vectors), 16384):
+            block = vectors[start:start + 16384]
+            assignments[start:start + 16384] = np.argmax(block @ self.centroids.T, axis=1)
+        return assignments
+
+    def _train(self, vectors: np.ndarray):
+        """Spherical k-means on (a sample of) the vectors."""
+        rng = np.random.default_rng(0)
+        nlist = self.nlist or max(1, int(4 * np.sqrt(len(vectors))))
+        nlist = min(nlist, len(vectors))
+
+        sample = vectors
+        if len(vectors) > self.MAX_TRAINING_SAMPLE:
+            sample = vectors[rng.choice(len(vectors), self.MAX_TRAINING_SAMPLE, replace=False)]
+
+        self.centroids = sample[rng.choice(len(sample), nlist, replace=False)].copy()
+        for _ in range(self.KMEANS_ITERATIONS):
+            assignments = self._assign(sample)
+            sums = np.zeros_like(self.centroids)
+            np.add.at(sums, assignments, sample)
+            counts = np.bincount(assignments, minlength=nlist)
+
+            # Re-seed empty clusters from random sample points
+            empty = np.flatnonzero(counts == 0)
+            if len(empty):
+                sums[empty] = sample[rng.choice(len(sample), len(empty), replace=False)]
+
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            self.centroids = (sums / np.where(norms == 0, 1, norms)).astype(np.float32)
+
+    def _rebuild(self, vectors: np.ndarray):
+        """Train on all vectors and rebuild every inverted list."""
+        self._train(vectors)
+        assignments = self._assign(vectors)
+        order = np.argsort(assignments, kind='stable')
+        bounds = np.searchsorted(assignments[order], np.arange(len(self.centroids) + 1))
+        self._lists = [order[bounds[i]:bounds[i + 1]] for i in range(len(self.centroids))]
+        self._trained_size = len(vectors)
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray, all_vectors=None):
+        """
+        Insert vectors incrementally.
+
+        Args:
+            vectors: Normalized vectors to insert
+            ids: Row ids of the vectors (must continue the existing id sequence)
+            all_vectors: Callable returning every stored vector (row id ==
+                         position); used when the index needs to be (re)trained
+        """
+        self._size += len(ids)
+        needs_training = not self.is_trained and self._size >= self.min_train_size
+        needs_retraining = self.is_trained and self._size >= self.RETRAIN_GROWTH * self._trained_size
+
+        if needs_training or needs_retraining:
+            self._rebuild(all_vectors())
+            return
+        if not self.is_trained:
+            return
+
+        assignments = self._assign(np.asarray(vectors, dtype=np.float32))
+        ids = np.asarray(ids, dtype=np.int64)
+        for list_id in np.unique(assignments):
+            self._lists[list_id] = np.concatenate([self._lists[list_id], ids[assignments == list_id]])
+
+    def search(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        """
+        Candidate ids from the nprobe lists closest to the query.
+
+        Returns:
+            Candidate row ids, or None if the index is not trained yet
+        """
+        if not self.is_trained:
+            return None
+        probe = top_k_indices(self.centroids @ query, self.nprobe)
+        return np.concatenate([self._lists[list_id] for list_id in probe])
+
+    def copy(self) -> 'IVFFlatIndex':
+        """Copy sharing centroids and inverted lists (add replaces lists, it never modifies them)."""
+        index = copy.copy(self)
+        index._lists = list(self._lists)
+        return index
+
+    def save(self, directory: Path) -> Dict[str, any]:
+        """Write centroids and inverted lists; returns manifest parameters."""
+        if self.is_trained:
+            lengths = [len(ids) for ids in self._lists]
+            list_indptr = np.zeros(len(lengths) + 1, dtype=np.int64)
+            np.cumsum(lengths, out=list_indptr[1:])
+            np.savez(directory / self.DATA_FILE,
+                     centroids=self.centroids,
+                     list_indptr=list_indptr,
+                     ids=np.concatenate(self._lists) if self._lists else np.empty(0, dtype=np.int64))
+        return {
+            'nlist': self.nlist,
+            'nprobe': self.nprobe,
+            'min_train_size': self.min_train_size,
+            'trained_size': self._trained_size,
+            'size': self._size,
+        }
+
+    @classmethod
+    def load(cls, directory: Path, params: Dict[str, any]) -> 'IVFFlatIndex':
+        index = cls(nlist=params['nlist'], nprobe=params['nprobe'], min_train_size=params['min_train_size'])
+        index._size = params['size']
+        index._trained_size = params['trained_size']
+        data_path = directory / cls.DATA_FILE
+        if data_path.exists():
+            with np.load(data_path) as data:
+                index.centroids = data['centroids']
+                indptr = data['list_indptr']
+                ids = data['ids']
+            index._lists = [ids[indptr[i]:indptr[i + 1]] for i in range(len(indptr) - 1)]
+        return index
+
+
+class HNSWIndex:
+    """
+    HNSW graph index backed by hnswlib (optional dependency).
+
+    Uses inner-product space on normalized vectors, so distance = 1 - cosine.
+    """
+
+    DATA_FILE = "hnsw.bin"
+
+    def __init__(self, dim: int, m: int = 16, ef_construction: int = 200,
+                 ef_search: int = 64, initial_capacity: int = 10_000):
+        """
+        Initialize an empty HNSW graph.
+
+        Args:
+            dim: Vector dimension
+            m: Graph degree
+            ef_construction: Candidate list size while building
+            ef_search: Candidate list size while searching
+            initial_capacity: Initial number of elements allocated
+        """
+        if hnswlib is None:
+            raise ImportError("HNSW backend requires hnswlib: pip install hnswlib")
+        self.dim = dim
+        self.m = m
+        self.ef_construction = ef_construction
+        self.ef_search = ef_search
+
+        self._index = hnswlib.Index(space='ip', dim=dim)
+        self._index.init_index(max_elements=initial_capacity, ef_construction=ef_construction, M=m)
+        self._index.set_ef(ef_search)
+
+    def __len__(self) -> int:
+        return self._index.get_current_count()
+
+    @property
+    def is_trained(self) -> bool:
+        return True
+
+    def add(self, vectors: np.ndarray, ids: np.ndarray, all_vectors=None):
+        """Insert vectors incrementally, growing the graph capacity as needed."""
+        needed = len(self) + len(ids)
+        capacity = self._index.get_max_elements()
+        if needed > capacity:
+            self._index.resize_index(max(needed, 2 * capacity))
+        self._index.add_items(np.asarray(vectors, dtype=np.float32), np.asarray(ids, dtype=np.int64))
+
+    def search(self, query: np.ndarray, k: int) -> Optional[np.ndarray]:
+        """Ids of the approximate k nearest neighbours."""
+        k = min(k, len(self))
+        if k == 0:
+            return np.empty(0, dtype=np.int64)
+        self._index.set_ef(max(self.ef_search, k))
+        labels, _ = self._index.knn_query(query[None, :].astype(np.float32), k=k)
+        return labels[0].astype(np.int64)
+
+    def copy(self) -> 'HNSWIndex':
+        """
+        Independent copy of the graph.
+
+        hnswlib graphs can't share structure, so the graph is cloned through
+        save_index/load_index (cost proportional to the graph size); vectors
+        added to the copy never reach this index.
+        """
+        index = copy.copy(self)
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            path = str(Path(tmp_dir) / self.DATA_FILE)
+            self._index.save_index(path)
+            index._index = hnswlib.Index(space='ip', dim=self.dim)
+            index._index.load_index(path, max_elements=self._index.get_max_elements())
+        index._index.set_ef(self.ef_search)
+        return index
+
+    def save(self, directory: Path) -> Dict[str, any]:
+        self._index.save_index(str(directory / self.DATA_FILE))
+        return {
+            'dim': self.dim,
+            'm': self.m,
+            'ef_construction': self.ef_construction,
+            'ef_search': self.ef_search,
+        }
+
+    @classmethod
+    def load(cls, directory: Path, params: Dict[str, any]) -> 'HNSWIndex':
+        if hnswlib is None:
+            raise ImportError("HNSW backend requires hnswlib: pip install hnswlib")
+        index = cls.__new__(cls)
+        index.dim = params['dim']
+        index.m = params['m']
+        index.ef_construction = params['ef_construction']
+        index.ef_search = params['ef_search']
+        index._index = hnswlib.Index(space='ip', dim=index.dim)
+        index._index.load_index(str(directory / cls.DATA_FILE))
+        index._index.set_ef(index.ef_search)
+        return index
+
+
+def create_ann_index(backend: str, dim: int, **params):
+    """
+    Create an empty ANN index.
+
+    Args:
+        backend: 'ivf' or 'hnsw'
+        dim: Vector dimension
+        **params: Backend parameters (nlist/nprobe or m/ef_construction/ef_search)
+    """
+    if backend == 'ivf':
+        return IVFFlatIndex(**params)
+    if backend == 'hnsw':
+        return HNSWIndex(dim, **params)
+    raise ValueError(f"Unknown ANN backend '{backend}', expected one of {ANN_BACKENDS}")
+
+
+def save_ann_index(index, directory: Path):
+    """Persist an ANN index into directory (created if missing)."""
+    directory.mkdir(parents=True, exist_ok=True)
+    backend = 'hnsw' if isinstance(index, HNSWIndex) else 'ivf'
+    params = index.save(directory)
+    (directory / ANN_MANIFEST_FILE).write_text(json.dumps({'backend': backend, 'params': params}),
+                                               encoding='utf-8')
+
+
+def load_ann_index(directory: Path):
+    """Load an ANN index written by save_ann_index, or None if there is none."""
+    manifest_path = directory / ANN_MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    if manifest['backend'] == 'hnsw':
+        return HNSWIndex.load(directory, manifest['params'])
+    return IVFFlatIndex.load(directory, manifest['params'])
@@ -3,76 +3,125 @@ DoctorFollow Medical Search Demo - Gradio Interface
 Turkish Medical Literature RAG System with Dose Calculator
 """
 import os
+import asyncio
+import threading
 from pathlib import Path
-from typing import List, Tuple
+from typing import List, Tuple, AsyncIterator, TYPE_CHECKING
 from dotenv import load_dotenv
 
-import gradio as gr
-
-from rag import MedicalRAG
 from dose_calculator import calculate_dose, get_supported_drugs
 
 # Load environment variables
 load_dotenv()
 
-# Initialize RAG system
-rag_system = MedicalRAG()
+if TYPE_CHECKING:
+    import gradio as gr
+    from rag import MedicalRAG
+
+# RAG system, created on first use: PDF extraction workers are spawned and
+# re-import this module, so it must not import rag/gradio or build the UI at
+# import time (see build_demo and the __main__ block)
+_rag_system = None
+_rag_system_lock = threading.Lock()
+
+
+def get_rag_system() -> "MedicalRAG":
+    """Shared MedicalRAG instance (created on first call)."""
+    global _rag_system
+    with _rag_system_lock:
+        if _rag_system is None:
+            from rag import MedicalRAG
+            _rag_system = MedicalRAG()
+        return _rag_system
+
 
 # Conversation history storage
 conversation_history = []
 
+# Seconds between ingestion job status checks in the upload handler
+UPLOAD_POLL_INTERVAL = 1.0
+
 
-def upload_pdf(file) -> str:
+async def upload_pdf(file) -> AsyncIterator[str]:
     """
     handles PDF upload and ingestion.
 
+    The PDF is queued as a background ingestion job; this handler only polls
+    the job status, so chat keeps working (on the previous index) meanwhile.
+
     Args:
         file: Uploaded file object from Gradio
 
-    Returns:
+    Yields:
         Status message
     """
     if file is None:
-        return "[ERROR] Lütfen bir PDF dosyası seçin."
+        yield "[ERROR] Lütfen bir PDF dosyası seçin."
+        return
 
     try:
-        # Get file path
-        pdf_path = file.name
-
-        # Ingest PDF
-        result = rag_system.ingest_pdf(pdf_path)
-
-        if 'error' in result:
-            return f"[ERROR] Hata: {result['error']}"
+        # Get file path (a plain path with type="filepath")
+        pdf_path = getattr(file, 'name', file)
+
+        # Queue PDF for ingestion and poll the job
+        job_id = get_rag_system().submit_pdf(pdf_path)
+        while True:
+            job = get_rag_system().get_ingestion_job(job_id)
+            if job['status'] in ('done', 'failed'):
+                break
+            if job['status'] == 'queued':
+                yield f"[INFO] Sırada bekliyor (iş: {job_id[:8]})..."
+            elif job['progress']:
+                progress = job['progress']
+                yield (f"[INFO] İndeksleniyor (iş: {job_id[:8]}): sayfa {progress['pages_done']}/"
+                       f"{progress['total_pages']}, {progress['chunks_indexed']} metin parçası")
+            else:
+                yield f"[INFO] İşleniyor (iş: {job_id[:8]})..."
+            await asyncio.sleep(UPLOAD_POLL_INTERVAL)
+
+        if job['status'] == 'failed':
+            yield f"[ERROR] Hata: {job['error']}"
+            return
+
+        result = job['result']
 
         # Success message
-        return f"""[SUCCESS] PDF başarıyla yüklendi ve indekslendi!
+        yield f"""[SUCCESS] PDF başarıyla yüklendi ve indekslendi!
 
 **İstatistikler:**
 - Dosya: {result['document_name']}
+- Sayfa sayısı: {result['total_pages']}
 - Toplam metin parçası: {result['total_chunks']}
 - Toplam karakter: {result['total_characters']:,}
 - Embedding boyutu: {result['embedding_dimensions']}
+- Önbellekten gelen embedding: {result['embedding_cache_hits']} ({result['embedding_cache_hit_ratio']:.0%})
+- İndeksteki doküman sayısı: {result['total_documents']} ({result['corpus_chunks']} parça)
 
 Artık sorularınızı sorabilirsiniz."""
 
     except Exception as e:
-        return f"[ERROR] Hata: {str(e)}"
+        yield f"[ERROR] Hata: {str(e)}"
 
 
-def chat_interface(message: str, history: List[Tuple[str, str]]) -> str:
+async def chat_interface(message: str, history: List[Tuple[str, str]]) -> AsyncIterator[List[Tuple[str, str]]]:
     """
     Main chat interface with RAG system.
 
+    Streams the answer into the chatbot as it is generated; sources are
+    appended once generation is complete. Runs on the event loop, so a slow
+    Bedrock call does not block other users' requests.
+
     Args:
         message: User message
         history: Gradio chat history format
 
-    Returns:
-        Assistant response
+    Yields:
+        Updated chat history with the (partial) assistant response
     """
+    history = history or []
     if not message.strip():
-        return "Lütfen bir soru girin."
+        yield history + [(message, "Lütfen bir soru girin.")]
+        return
 
     # Convert Gradio history to our format
     conv_history = []
@@ -83,7 +132,16 @@ def chat_interface(message: str, history: List[Tuple[str, str]]) -> str:
         })
 
     # Query RAG system
-    result = rag_system.ask(message, conversation_history=conv_history)
+    result = None
+    async for result in get_rag_system().aask_stream(message, conversation_history=conv_history):
+        if result['done']:
+            break
+
+        # Partial answer with the citations seen so far
+        response = result['answer']
+        if result['citation_ids']:
+            response += f"\n\n_Atıflar: {', '.join(f'[{cid}]' for cid in result['citation_ids'])}_"
+        yield history + [(message, response)]
 
     # Build response
     response = result['answer']
@@ -102,7 +160,7 @@ def chat_interface(message: str, history: List[Tuple[str, str]]) -> str:
         'assistant': result['answer']
     })
 
-    return response
+    yield history + [(message, response)]
 
 
 def calculate_dose_interface(drug: str, weight: float, age: float) -> str:
@@ -154,16 +212,18 @@ def calculate_dose_interface(drug: str, weight: float, age: float) -> str:
 
 def get_system_stats() -> str:
     """Get and format system statistics."""
-    stats = rag_system.get_stats()
+    stats = get_rag_system().get_stats()
 
     if not stats['indexed']:
         return "**Sistem Durumu:** Henüz PDF yüklenmedi"
 
     return f"""**Sistem İstatistikleri**
 
-- Yüklü Doküman: {stats['document_name']}
+- Yüklü Dokümanlar ({stats['total_documents']}): {', '.join(stats['documents'])}
 - İndekslenmiş Parça: {stats['total_chunks']}
 - Toplam Sorgu: {stats['total_queries']}
+- Sorgu Önbelleği: {stats['query_embedding_cache']['hits']} isabet / {stats['query_embedding_cache']['misses']} ıskalama
+- Bekleyen İndeksleme İşi: {stats['pending_ingestion_jobs']}
 - Durum: Aktif
 """
 
@@ -175,208 +235,216 @@ def clear_conversation():
     return []
 
 
-# Build Gradio Interface
-with gr.Blocks(
-    title="DoctorFollow Medical Search Demo",
-    theme=gr.themes.Soft()
-) as demo:
-
-    gr.Markdown("""
-    # DoctorFollow Medical Search Demo
-
-    **Turkish Medical Document Search and Dose Calculation System**
-
-    This demo provides intelligent search in medical PDFs and pediatric drug dose calculation features.
-    """)
-
-    with gr.Tabs():
-        # Tab 1: PDF Upload & Search
-        with gr.Tab("Doküman Arama"):
-            gr.Markdown("""
-            ### PDF Yükleme ve Arama
-
-            1. Bir tıbbi PDF yükleyin (örn: T.C. Sağlık Bakanlığı kılavuzları)
-            2. PDF indekslendiğinde sorularınızı sorun
-            3. Sistem kaynak atıflarıyla (citations) cevap verecektir
-            """)
-
-            with gr.Row():
-                with gr.Column(scale=1):
-                    pdf_upload = gr.File(
-                        label="PDF Dosyası Yükle",
-                        file_types=[".pdf"],
-                        type="filepath"
-                    )
-                    upload_btn = gr.Button("Yükle ve İndeksle", variant="primary")
-                    upload_status = gr.Textbox(
-                        label="Yükleme Durumu",
-                        lines=8,
-                        interactive=False
-                    )
-
-                with gr.Column(scale=2):
-                    stats_display = gr.Textbox(
-                        label="Sistem İstatistikleri",
-                        value=get_system_stats(),
-                        lines=8,
-                        interactive=False
-                    )
-                    refresh_stats_btn = gr.Button("İstatistikleri Yenile")
-
-            gr.Markdown("### Soru-Cevap")
-
-            chatbot = gr.Chatbot(
-                label="DoctorFollow Asistan",
-                height=400,
-                show_label=True
-            )
-
-            with gr.Row():
-                msg = gr.Textbox(
-                    label="Sorunuzu yazın",
-                    placeholder="Örnek: Çocuklarda parasetamol dozajı nedir?",
-                    scale=4
+def build_demo() -> "gr.Blocks":
+    """Build the Gradio interface."""
+    import gradio as gr
+
+    with gr.Blocks(
+        title="DoctorFollow Medical Search Demo",
+        theme=gr.themes.Soft()
+    ) as demo:
+
+        gr.Markdown("""
+        # DoctorFollow Medical Search Demo
+
+        **Turkish Medical Document Search and Dose Calculation System**
+
+        This demo provides intelligent search in medical PDFs and pediatric drug dose calculation features.
+        """)
+
+        with gr.Tabs():
+            # Tab 1: PDF Upload & Search
+            with gr.Tab("Doküman Arama"):
+                gr.Markdown("""
+                ### PDF Yükleme ve Arama
+
+                1. Bir tıbbi PDF yükleyin (örn: T.C. Sağlık Bakanlığı kılavuzları)
+                2. PDF indekslendiğinde sorularınızı sorun
+                3. Sistem kaynak atıflarıyla (citations) cevap verecektir
+                """)
+
+                with gr.Row():
+                    with gr.Column(scale=1):
+                        pdf_upload = gr.File(
+                            label="PDF Dosyası Yükle",
+                            file_types=[".pdf"],
+                            type="filepath"
+                        )
+                        upload_btn = gr.Button("Yükle ve İndeksle", variant="primary")
+                        upload_status = gr.Textbox(
+                            label="Yükleme Durumu",
+                            lines=8,
+                            interactive=False
+                        )
+
+                    with gr.Column(scale=2):
+                        stats_display = gr.Textbox(
+                            label="Sistem İstatistikleri",
+                            value=get_system_stats,
+                            lines=8,
+                            interactive=False
+                        )
+                        refresh_stats_btn = gr.Button("İstatistikleri Yenile")
+
+                gr.Markdown("### Soru-Cevap")
+
+                chatbot = gr.Chatbot(
+                    label="DoctorFollow Asistan",
+                    height=400,
+                    show_label=True
                 )
-                send_btn = gr.Button("Gönder", variant="primary", scale=1)
-
-            clear_btn = gr.Button("Konuşmayı Temizle")
-
-            gr.Markdown("""
-            **Örnek Sorular:**
-            - "Çocuklarda parasetamol dozajı nedir?"
-            - "Amoksisilin ne zaman kullanılır?"
-            - "Bu dozajı kaç saatte bir vermem gerekir?"
-            """)
-
-        # Tab 2: Dose Calculator
-        with gr.Tab("Doz Hesaplama"):
-            gr.Markdown("""
-            ### Pediatrik İlaç Doz Hesaplayıcı
-
-            T.C. Sağlık Bakanlığı kılavuzlarına göre çocuk hastalarda doz hesaplama.
-
-            **Desteklenen İlaçlar:** Amoksisilin, Parasetamol, İbuprofen
-            """)
 
-            with gr.Row():
-                with gr.Column():
-                    drug_input = gr.Dropdown(
-                        choices=get_supported_drugs(),
-                        label="İlaç Seçin",
-                        value="Parasetamol"
+                with gr.Row():
+                    msg = gr.Textbox(
+                        label="Sorunuzu yazın",
+                        placeholder="Örnek: Çocuklarda parasetamol dozajı nedir?",
+                        scale=4
                     )
-                    weight_input = gr.Number(
-                        label="Hasta Kilosu (kg)",
-                        value=25,
-                        minimum=0,
-                        maximum=200
-                    )
-                    age_input = gr.Number(
-                        label="Hasta Yaşı (yıl)",
-                        value=7,
-                        minimum=0,
-                        maximum=18
-                    )
-                    calc_btn = gr.Button("Dozu Hesapla", variant="primary")
-
-                with gr.Column():
-                    dose_output = gr.Markdown(
-                        label="Hesaplama Sonucu",
-                        value="Lütfen ilaç seçin ve bilgileri girin."
-                    )
-
-            gr.Markdown("""
-            ---
-            **[WARNING] UYARI:** Bu hesaplama yalnızca eğitim ve referans amaçlıdır.
-            Gerçek hasta tedavisi için mutlaka hekim konsültasyonu yapılmalıdır.
-            """)
-
-        # Tab 3: About
-        with gr.Tab("Hakkında"):
-            gr.Markdown("""
-            ## DoctorFollow Medical Search Demo
-
-            ### Özellikler
-
-            - **Hibrit Arama:** BM25 (lexical) + Semantic (e5-small-v2) arama
-            - **Kaynak Atıfları:** Vancouver tarzı tıbbi atıflar [1], [2], [3]
-            - **Konuşma Hafızası:** Takip sorularını anlama
-            - **Doz Hesaplama:** Pediatrik ilaç dozları güvenlik kontrolüyle
-            - **Türkçe Optimizasyonu:** Türkçe tıbbi terimler için optimize edilmiş
-
-            ### Teknoloji
-
-            - **LLM:** AWS Bedrock Llama 3.1 8B Instruct
-            - **Embeddings:** intfloat/e5-small-v2 (local)
-            - **Search:** BM25 + Semantic + RRF Fusion
-            - **Interface:** Gradio
-            - **Cost:** $0 (AWS Free Tier + Local Models)
-
-            ### Kaynak Format
-
-            Bu sistem şu formatları destekler:
-            - T.C. Sağlık Bakanlığı Kılavuzları (PDF)
-            - Tıbbi protokoller ve yönergeler
-            - Türkçe tıbbi literatür
-
-            ### Güvenlik
-
-            - Tüm hesaplamalar referans amaçlıdır
-            - Gerçek tedavi için hekim konsültasyonu gereklidir
-            - Sistem sadece sağlanan dokümanlardaki bilgileri kullanır
-
-            ### Geliştirici
-
-            DoctorFollow Team - 2 Hour Demo Project
-
-            ---
-
-            **Versiyon:** 1.0.0 | **Tarih:** 2025
-            """)
-
-    # Event Handlers
-    upload_btn.click(
-        fn=upload_pdf,
-        inputs=[pdf_upload],
-        outputs=[upload_status]
-    ).then(
-        fn=get_system_stats,
-        outputs=[stats_display]
-    )
-
-    refresh_stats_btn.click(
-        fn=get_system_stats,
-        outputs=[stats_display]
-    )
-
-    msg.submit(
-        fn=chat_interface,
-        inputs=[msg, chatbot],
-        outputs=[chatbot]
-    ).then(
-        lambda: "",
-        outputs=[msg]
-    )
-
-    send_btn.click(
-        fn=chat_interface,
-        inputs=[msg, chatbot],
-        outputs=[chatbot]
-    ).then(
-        lambda: "",
-        outputs=[msg]
-    )
-
-    clear_btn.click(
-        fn=clear_conversation,
-        outputs=[chatbot]
-    )
-
-    calc_btn.click(
-        fn=calculate_dose_interface,
-        inputs=[drug_input, weight_input, age_input],
-        outputs=[dose_output]
-    )
+                    send_btn = gr.Button("Gönder", variant="primary", scale=1)
+
+                clear_btn = gr.Button("Konuşmayı Temizle")
+
+                gr.Markdown("""
+                **Örnek Sorular:**
+                - "Çocuklarda parasetamol dozajı nedir?"
+                - "Amoksisilin ne zaman kullanılır?"
+                - "Bu dozajı kaç saatte bir vermem gerekir?"
+                """)
+
+            # Tab 2: Dose Calculator
+            with gr.Tab("Doz Hesaplama"):
+                gr.Markdown("""
+                ### Pediatrik İlaç Doz Hesaplayıcı
+
+                T.C. Sağlık Bakanlığı kılavuzlarına göre çocuk hastalarda doz hesaplama.
+
+                **Desteklenen İlaçlar:** Amoksisilin, Parasetamol, İbuprofen
+                """)
+
+                with gr.Row():
+                    with gr.Column():
+                        drug_input = gr.Dropdown(
+                            choices=get_supported_drugs(),
+                            label="İlaç Seçin",
+                            value="Parasetamol"
+                        )
+                        weight_input = gr.Number(
+                            label="Hasta Kilosu (kg)",
+                            value=25,
+                            minimum=0,
+                            maximum=200
+                        )
+                        age_input = gr.Number(
+                            label="Hasta Yaşı (yıl)",
+                            value=7,
+                            minimum=0,
+                            maximum=18
+                        )
+                        calc_btn = gr.Button("Dozu Hesapla", variant="primary")
+
+                    with gr.Column():
+                        dose_output = gr.Markdown(
+                            label="Hesaplama Sonucu",
+                            value="Lütfen ilaç seçin ve bilgileri girin."
+                        )
+
+                gr.Markdown("""
+                ---
+                **[WARNING] UYARI:** Bu hesaplama yalnızca eğitim ve referans amaçlıdır.
+                Gerçek hasta tedavisi için mutlaka hekim konsültasyonu yapılmalıdır.
+                """)
+
+            # Tab 3: About
+            with gr.Tab("Hakkında"):
+                gr.Markdown("""
+                ## DoctorFollow Medical Search Demo
+
+                ### Özellikler
+
+                - **Hibrit Arama:** BM25 (lexical) + Semantic (e5-small-v2) arama
+                - **Kaynak Atıfları:** Vancouver tarzı tıbbi atıflar [1], [2], [3]
+                - **Konuşma Hafızası:** Takip sorularını anlama
+                - **Doz Hesaplama:** Pediatrik ilaç dozları güvenlik kontrolüyle
+                - **Türkçe Optimizasyonu:** Türkçe tıbbi terimler için optimize edilmiş
+
+                ### Teknoloji
+
+                - **LLM:** AWS Bedrock Llama 3.1 8B Instruct
+                - **Embeddings:** intfloat/e5-small-v2 (local)
+                - **Search:** BM25 + Semantic + RRF Fusion
+                - **Interface:** Gradio
+                - **Cost:** $0 (AWS Free Tier + Local Models)
+
+                ### Kaynak Format
+
+                Bu sistem şu formatları destekler:
+                - T.C. Sağlık Bakanlığı Kılavuzları (PDF)
+                - Tıbbi protokoller ve yönergeler
+                - Türkçe tıbbi literatür
+
+                ### Güvenlik
+
+                - Tüm hesaplamalar referans amaçlıdır
+                - Gerçek tedavi için hekim konsültasyonu gereklidir
+                - Sistem sadece sağlanan dokümanlardaki bilgileri kullanır
+
+                ### Geliştirici
+
+                DoctorFollow Team - 2 Hour Demo Project
+
+                ---
+
+                **Versiyon:** 1.0.0 | **Tarih:** 2025
+                """)
+
+        # Event Handlers
+        upload_btn.click(
+            fn=upload_pdf,
+            inputs=[pdf_upload],
+            outputs=[upload_status],
+            concurrency_limit=None  # only polls; ingestion itself runs on the background worker
+        ).then(
+            fn=get_system_stats,
+            outputs=[stats_display]
+        )
+
+        refresh_stats_btn.click(
+            fn=get_system_stats,
+            outputs=[stats_display]
+        )
+
+        msg.submit(
+            fn=chat_interface,
+            inputs=[msg, chatbot],
+            outputs=[chatbot],
+            concurrency_limit=None  # async handler, many chats can wait on Bedrock at once
+        ).then(
+            lambda: "",
+            outputs=[msg]
+        )
+
+        send_btn.click(
+            fn=chat_interface,
+            inputs=[msg, chatbot],
+            outputs=[chatbot],
+            concurrency_limit=None  # async handler, many chats can wait on Bedrock at once
+        ).then(
+            lambda: "",
+            outputs=[msg]
+        )
+
+        clear_btn.click(
+            fn=clear_conversation,
+            outputs=[chatbot]
+        )
+
+        calc_btn.click(
+            fn=calculate_dose_interface,
+            inputs=[drug_input, weight_input, age_input],
+            outputs=[dose_output]
+        )
+
+    return demo
 
 
 # Launch app
@@ -386,6 +454,9 @@ if __name__ == "__main__":
     print("Public URL will be generated if share=True")
     print("\n[WARNING] Make sure your .env file contains valid AWS credentials!\n")
 
+    get_rag_system()  # load models and the index before serving
+
+    demo = build_demo()
     demo.launch(
         server_name="0.0.0.0",
         server_port=7860,
@@ -0,0 +1,62 @@
+"""
+Ingest throughput benchmark: PDF text extraction + cleaning + chunking
+Compares serial extraction with the process-pool extraction used by
+MedicalRAG.ingest_pdf, reported in pages per second (embedding excluded)
+
+Usage:
+    python benchmarks/bench_pdf_extract.py [--pdf PATH] [--workers 1 2 4] [--repeats 3]
+"""
+import argparse
+import os
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+import pdf_extraction
+from pdf_extraction import extract_pages, count_pages
+from utils import chunk_pages
+
+DEFAULT_PDF = ROOT / "testing" / "data" / "Nelson-essentials-of-pediatrics-233-282.pdf"
+
+
+def time_ingest(pdf_path: str, workers: int, repeats: int) -> tuple:
+    """Median seconds for extract + chunk, and the number of chunks produced."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        pages = extract_pages(pdf_path, max_workers=workers)
+        chunks, page_numbers = chunk_pages(pages)
+        timings.append(time.perf_counter() - start)
+    return float(np.median(timings)), len(chunks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf', default=str(DEFAULT_PDF))
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, os.cpu_count() or 1])
+    parser.add_argument('--repeats', type=int, default=3)
+    args = parser.parse_args()
+
+    # Benchmark the pool even on short PDFs
+    pdf_extraction.MIN_PARALLEL_PAGES = 0
+
+    num_pages = count_pages(args.pdf)
+    print(f"PDF: {Path(args.pdf).name} ({num_pages} pages), CPUs: {os.cpu_count()}\n")
+    print(f"{'workers':>7} | {'seconds':>8} | {'pages/s':>8} | {'speedup':>7} | {'chunks':>6}")
+    print("-" * 50)
+
+    baseline = None
+    for workers in sorted(set(args.workers)):
+        seconds, num_chunks = time_ingest(args.pdf, workers, args.repeats)
+        baseline = baseline or seconds
+        print(f"{workers:>7} | {seconds:>8.2f} | {num_pages / seconds:>8.1f} | "
+              f"{baseline / seconds:>6.1f}x | {num_chunks:>6}")
+
+
+if __name__ == "__main__":
+    main()
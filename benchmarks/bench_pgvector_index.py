@@ -0,0 +1,131 @@
+"""
+Recall vs latency sweep for the pgvector index
+Runs the evaluation queries in testing/data/turkish_queries.json against the
+table's HNSW (hnsw.ef_search) or IVFFlat (ivfflat.probes) index at several
+search settings, and compares each run with exact search (index scans off)
+
+Usage:
+    python benchmarks/bench_pgvector_index.py [--top-k 10] [--values 10 20 40 80] [--repeats 5]
+    python benchmarks/bench_pgvector_index.py --rebuild --index-type ivfflat
+    python benchmarks/bench_pgvector_index.py --rebuild --quantization binary --rerank-factor 8
+
+Requires the PostgreSQL settings in testing/.env and an indexed table
+(testing/iteration_2/index_embeddings.py).
+"""
+import argparse
+import json
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT / "testing"))
+sys.path.append(str(ROOT / "testing" / "iteration_2"))
+
+from config import settings
+from pgvector_store import PgVectorStore
+
+QUERIES_FILE = ROOT / "testing" / "data" / "turkish_queries.json"
+DEFAULT_VALUES = {
+    "hnsw": [10, 20, 40, 80, 160, 320],
+    "ivfflat": [1, 2, 4, 8, 16, 32],
+}
+
+
+def load_queries() -> list:
+    """Turkish and English variants of every evaluation query."""
+    data = json.loads(QUERIES_FILE.read_text(encoding='utf-8'))
+    queries = []
+    for item in data['evaluation_queries']:
+        queries.append(item['query_turkish'])
+        queries.append(item['query_english'])
+    return queries
+
+
+def timed_search(store: PgVectorStore, query_embeddings: np.ndarray, repeats: int, **search_kwargs):
+    """Run every query repeats times; return (chunk id lists, per-query latencies in ms)."""
+    results, latencies = [], []
+    for query_embedding in query_embeddings:
+        for _ in range(repeats):
+            start = time.perf_counter()
+            hits = store.search_by_vector(query_embedding, **search_kwargs)
+            latencies.append((time.perf_counter() - start) * 1000)
+        results.append([hit.chunk_id for hit in hits])
+    return results, np.array(latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--top-k', type=int, default=10, help='Cut-off for recall@k')
+    parser.add_argument('--values', type=int, nargs='+',
+                        help='ef_search (HNSW) or probes (IVFFlat) values to sweep')
+    parser.add_argument('--repeats', type=int, default=5, help='Timed runs per query and setting')
+    parser.add_argument('--index-type', choices=PgVectorStore.VECTOR_INDEX_TYPES,
+                        default=settings.PGVECTOR_INDEX_TYPE, help='Index type used with --rebuild')
+    parser.add_argument('--quantization', choices=PgVectorStore.QUANTIZATIONS,
+                        default=settings.PGVECTOR_QUANTIZATION, help='Index quantization (used with --rebuild)')
+    parser.add_argument('--rerank-factor', type=int, default=settings.PGVECTOR_RERANK_FACTOR,
+                        help='Quantized candidates per result')
+    parser.add_argument('--rebuild', action='store_true', help='Rebuild the vector index before sweeping')
+    args = parser.parse_args()
+
+    store = PgVectorStore(
+        connection_string=settings.get_postgres_url(),
+        table_name=settings.PGVECTOR_TABLE,
+        embedding_model=settings.EMBEDDING_MODEL,
+        embedding_dimension=settings.EMBEDDING_DIMENSION,
+        index_type=args.index_type,
+        hnsw_m=settings.HNSW_M,
+        hnsw_ef_construction=settings.HNSW_EF_CONSTRUCTION,
+        quantization=args.quantization,
+        rerank_factor=args.rerank_factor
+    )
+    if args.rebuild:
+        store.build_vector_index(rebuild=True)
+
+    stats = store.get_stats()
+    index, storage = stats.get("vector_index"), stats.get("vector_storage")
+    if index is None:
+        print("[ERROR] No vector index on the table (index documents first or pass --rebuild)")
+        return
+    setting = "ef_search" if index["type"] == "hnsw" else "probes"
+    values = args.values or DEFAULT_VALUES[index["type"]]
+
+    queries = load_queries()
+    query_embeddings = store.embedding_model.encode(
+        [f"query: {q}" for q in queries],
+        normalize_embeddings=True
+    )
+
+    exact_results, exact_latencies = timed_search(
+        store, query_embeddings, args.repeats, top_k=args.top_k, exact=True
+    )
+    exact_top = [set(chunk_ids) for chunk_ids in exact_results]
+
+    print(f"\nIndex: {index['type']} {index['options']}, quantization {storage['quantization']} "
+          f"({storage['index_vector_bytes']} vs {storage['full_precision_vector_bytes']} bytes/vector, "
+          f"index {storage['index_size_bytes'] / 1024 ** 2:.1f} MB), {len(queries)} queries, "
+          f"recall@{args.top_k} vs exact float32 search\n")
+    print(f"{setting:>9} | {'recall@k':>8} | {'p50 (ms)':>8} | {'p95 (ms)':>8}")
+    print("-" * 44)
+    print(f"{'exact':>9} | {1.0:>8.3f} | {np.percentile(exact_latencies, 50):>8.2f} | "
+          f"{np.percentile(exact_latencies, 95):>8.2f}")
+
+    for value in values:
+        results, latencies = timed_search(
+            store, query_embeddings, args.repeats, top_k=args.top_k, **{setting: value}
+        )
+        recalls = [
+            len(exact & set(chunk_ids)) / len(exact) if exact else 1.0
+            for exact, chunk_ids in zip(exact_top, results)
+        ]
+        print(f"{value:>9} | {np.mean(recalls):>8.3f} | {np.percentile(latencies, 50):>8.2f} | "
+              f"{np.percentile(latencies, 95):>8.2f}")
+
+    store.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""
+Micro-benchmark: full argsort vs argpartition top-k selection
+Measures the per-query cost of picking the top 2*top_k results from a
+dense score vector, as done in MedicalRAG.hybrid_search
+
+Usage:
+    python benchmarks/bench_top_k.py
+"""
+import sys
+import time
+from pathlib import Path
+
+import numpy as np
+
+sys.path.append(str(Path(__file__).parent.parent))
+
+from utils import top_k_indices
+
+
+def time_per_call(fn, repeats: int) -> float:
+    """Median wall time of fn() in milliseconds."""
+    timings = []
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        timings.append((time.perf_counter() - start) * 1000)
+    return float(np.median(timings))
+
+
+def main():
+    rng = np.random.default_rng(42)
+    k = 10  # top_k=5 → 2 * top_k candidates per branch
+
+    print(f"{'chunks':>10} | {'argsort (ms)':>12} | {'argpartition (ms)':>17} | {'speedup':>7}")
+    print("-" * 56)
+
+    for n in (10_000, 100_000, 1_000_000):
+        scores = rng.random(n, dtype=np.float32)
+        repeats = 50 if n < 1_000_000 else 10
+
+        full_sort = time_per_call(lambda: np.argsort(scores)[::-1][:k], repeats)
+        partition = time_per_call(lambda: top_k_indices(scores, k), repeats)
+
+        # Both must select the same top-k
+        assert set(np.argsort(scores)[::-1][:k]) == set(top_k_indices(scores, k))
+
+        print(f"{n:>10,} | {full_sort:>12.3f} | {partition:>17.3f} | {full_sort / partition:>6.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,120 @@
+"""
+Recall vs memory report for embedding storage precisions
+Compares float16 and int8 storage against exact float32 search using the
+evaluation queries in testing/data/turkish_queries.json
+
+Usage:
+    python benchmarks/quantization_report.py [--pdf PATH] [--index-dir DIR] [--top-k 10]
+
+The float32 index is loaded from the snapshot in --index-dir, or built from
+--pdf if no snapshot exists yet. A snapshot stored at another precision is
+not used as the reference (its embeddings are already quantized); the
+reference is then built from --pdf in a temporary directory.
+"""
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+
+ROOT = Path(__file__).parent.parent
+sys.path.append(str(ROOT))
+
+from rag import MedicalRAG
+from embedding_store import PRECISIONS
+from index_snapshot import MANIFEST_FILE
+from utils import top_k_indices
+
+DEFAULT_PDF = ROOT / "testing" / "data" / "Nelson-essentials-of-pediatrics-233-282.pdf"
+QUERIES_FILE = ROOT / "testing" / "data" / "turkish_queries.json"
+
+
+def load_queries() -> list:
+    """Turkish and English variants of every evaluation query."""
+    data = json.loads(QUERIES_FILE.read_text(encoding='utf-8'))
+    queries = []
+    for item in data['evaluation_queries']:
+        queries.append(item['query_turkish'])
+        queries.append(item['query_english'])
+    return queries
+
+
+def snapshot_precision(index_dir: str):
+    """Embedding precision of the snapshot in index_dir (None if there is none)."""
+    manifest_path = Path(index_dir) / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    return json.loads(manifest_path.read_text(encoding='utf-8')).get('embedding_precision')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdf', default=str(DEFAULT_PDF), help='PDF to index if no snapshot exists')
+    parser.add_argument('--index-dir', default='index_data', help='Index snapshot directory')
+    parser.add_argument('--top-k', type=int, default=10, help='Cut-off for recall@k')
+    args = parser.parse_args()
+
+    index_dir, tmp_dir = args.index_dir, None
+    precision = snapshot_precision(args.index_dir)
+    if precision not in (None, 'float32'):
+        print(f"[INFO] Snapshot in {args.index_dir} stores {precision} embeddings; "
+              f"building the float32 reference from {args.pdf}")
+        index_dir = tmp_dir = tempfile.mkdtemp(prefix='quantization_report_')
+
+    try:
+        report(args, index_dir)
+    finally:
+        if tmp_dir is not None:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+def report(args, index_dir: str):
+    """Print the recall/memory table against the float32 index in index_dir."""
+    rag = MedicalRAG(index_dir=index_dir, embedding_precision='float32')
+    if not len(rag.corpus):
+        result = rag.ingest_pdf(args.pdf)
+        if 'error' in result:
+            print(f"[ERROR] {result['error']}")
+            return
+
+    reference = rag.corpus.embedding_store
+    queries = load_queries()
+    query_embeddings = rag.embeddings_model.encode(
+        [f"query: {q}" for q in queries],
+        convert_to_numpy=True,
+        normalize_embeddings=True
+    )
+
+    exact_scores = reference.scores_batch(query_embeddings)
+    exact_top = [set(top_k_indices(row, args.top_k).tolist()) for row in exact_scores]
+
+    print(f"\nCorpus: {len(reference)} chunks x {reference.dim} dims, "
+          f"{len(queries)} queries, recall@{args.top_k} vs exact float32\n")
+    print(f"{'precision':>9} | {'memory (MB)':>11} | {'vs float32':>10} | {'recall@k':>8} | {'ms/query':>8}")
+    print("-" * 60)
+
+    for precision in PRECISIONS:
+        store = reference if precision == 'float32' else reference.astype(precision)
+
+        start = time.perf_counter()
+        for query_embedding in query_embeddings:
+            store.scores(query_embedding)
+        latency_ms = (time.perf_counter() - start) * 1000 / len(queries)
+
+        scores = store.scores_batch(query_embeddings)
+        recalls = [
+            len(exact & set(top_k_indices(row, args.top_k).tolist())) / args.top_k
+            for exact, row in zip(exact_top, scores)
+        ]
+
+        memory_mb = store.nbytes / 1024 ** 2
+        print(f"{precision:>9} | {memory_mb:>11.2f} | {store.nbytes / reference.nbytes:>9.0%} | "
+              f"{np.mean(recalls):>8.3f} | {latency_ms:>8.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,601 @@
+"""
+Inverted-index BM25 engine for the DoctorFollow Medical RAG System
+Term-at-a-time scoring over postings lists with incremental add/remove
+
+Replaces rank_bm25.BM25Okapi, whose get_scores walks every document in
+Python for every query term. Here each query term only touches the
+documents in its postings list, and those are scored with NumPy.
+
+top_k adds MaxScore dynamic pruning: once the k-th best partial score
+exceeds what the remaining query terms could add, documents that haven't
+matched yet are no longer admitted and the remaining terms only score the
+surviving candidates.
+
+copy() shares the postings buffers: a copy appends new documents' postings
+behind the shared ones, so staging a document never copies the existing
+postings.
+"""
+import bisect
+import math
+from collections import Counter
+import threading
+from array import array
+from typing import List, Tuple, Dict, Optional, Iterable
+
+import numpy as np
+
+from utils import top_k_indices
+
+
+class BM25Index:
+    """
+    Inverted BM25 index with incremental updates.
+
+    Storage:
+    - Postings are appended into compact array('I') buffers (doc ids and term
+      frequencies per term) and exposed to scoring as NumPy arrays, cached
+      per term until the term receives new postings
+    - Removed documents are tombstoned; their postings are dropped by
+      compaction once they make up a large share of the index
+
+    Scoring:
+    - IDF uses the non-negative BM25 variant log(1 + (N - df + 0.5) / (df + 0.5)),
+      computed lazily per term and cached until the corpus changes
+    - Document ids are assigned sequentially and never reused, so they can be
+      used directly as chunk indices
+    """
+
+    COMPACT_RATIO = 0.25  # compact when this fraction of postings is tombstoned
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        """
+        Initialize an empty index.
+
+        Args:
+            k1: Term frequency saturation
+            b: Document length normalization
+        """
+        self.k1 = k1
+        self.b = b
+
+        self._vocab: Dict[str, int] = {}
+        self._terms: List[str] = []
+        self._post_docs: List[array] = []
+        self._post_tfs: List[array] = []
+        self._post_len = array('I')  # postings per term owned by this index (buffers may be shared, see copy)
+        self._df = array('I')  # live document frequency per term
+        self._doc_len = array('I')
+        self._deleted = bytearray()
+
+        self._num_live = 0
+        self._total_len = 0  # token count over live documents
+        self._dead_postings = 0
+        self._total_postings = 0
+
+        # Caches, reset whenever the index changes
+        self._generation = 0
+        self._cache_generation = -1
+        self._idf_cache: Dict[int, float] = {}
+        self._max_score_cache: Dict[int, float] = {}
+        self._norm_cache: Optional[np.ndarray] = None
+        self._postings_cache: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+        self._deleted_cache: Optional[np.ndarray] = None
+
+        self._lock = threading.RLock()
+
+    def __len__(self) -> int:
+        """Number of document ids assigned (including removed ones)."""
+        return len(self._doc_len)
+
+    @property
+    def num_live_documents(self) -> int:
+        return self._num_live
+
+    @property
+    def vocabulary_size(self) -> int:
+        return len(self._terms)
+
+    @property
+    def avgdl(self) -> float:
+        return self._total_len / self._num_live if self._num_live else 0.0
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+
+    def add_documents(self, tokenized_docs: Iterable[List[str]]) -> range:
+        """
+        Append documents to the index.
+
+        Args:
+            tokenized_docs: Token lists, one per document
+
+        Returns:
+            Range of document ids assigned to the new documents
+        """
+        with self._lock:
+            first_id = len(self._doc_len)
+            for tokens in tokenized_docs:
+                doc_id = len(self._doc_len)
+                frequencies: Dict[str, int] = {}
+                for token in tokens:
+                    frequencies[token] = frequencies.get(token, 0) + 1
+
+                for token, tf in frequencies.items():
+                    term_id = self._vocab.get(token)
+                    if term_id is None:
+                        term_id = len(self._terms)
+                        self._vocab[token] = term_id
+                        self._terms.append(token)
+                        self._post_docs.append(array('I'))
+                        self._post_tfs.append(array('I'))
+                        self._post_len.append(0)
+                        self._df.append(0)
+                    self._own_postings(term_id)
+                    self._post_docs[term_id].append(doc_id)
+                    self._post_tfs[term_id].append(tf)
+                    self._post_len[term_id] += 1
+                    self._df[term_id] += 1
+                    self._postings_cache.pop(term_id, None)
+
+                self._doc_len.append(len(tokens))
+                self._deleted.append(0)
+                self._num_live += 1
+                self._total_len += len(tokens)
+                self._total_postings += len(frequencies)
+
+            self._generation += 1
+            return range(first_id, len(self._doc_len))
+
+    def remove_documents(self, doc_ids: Iterable[int]) -> int:
+        """
+        Remove documents from the index.
+
+        Postings are tombstoned rather than rewritten; IDF and length
+        normalization pick up the change lazily on the next query.
+
+        Args:
+            doc_ids: Document ids to remove
+
+        Returns:
+            Number of documents removed
+        """
+        with self._lock:
+            doc_ids = [d for d in set(doc_ids) if 0 <= d < len(self._doc_len) and not self._deleted[d]]
+            if not doc_ids:
+                return 0
+
+            removed = np.zeros(len(self._doc_len), dtype=bool)
+            removed[doc_ids] = True
+
+            # Decrement document frequencies for every term of the removed docs
+            for term_id in range(len(self._terms)):
+                docs, _ = self._read_postings(term_id)
+                hits = int(np.count_nonzero(removed[docs]))
+                if hits:
+                    self._df[term_id] -= hits
+                    self._dead_postings += hits
+
+            for doc_id in doc_ids:
+                self._deleted[doc_id] = 1
+                self._num_live -= 1
+                self._total_len -= self._doc_len[doc_id]
+
+            self._generation += 1
+            if self._dead_postings > self.COMPACT_RATIO * self._total_postings:
+                self.compact()
+            return len(doc_ids)
+
+    def compact(self):
+        """Drop postings of removed documents."""
+        with self._lock:
+            deleted = np.frombuffer(bytes(self._deleted), dtype=np.uint8).astype(bool)
+            for term_id in range(len(self._terms)):
+                docs, tfs = self._read_postings(term_id)
+                keep = ~deleted[docs]
+                if not keep.all():
+                    self._post_docs[term_id] = array('I', docs[keep].astype(np.uint32).tobytes())
+                    self._post_tfs[term_id] = array('I', tfs[keep].astype(np.uint32).tobytes())
+                    self._post_len[term_id] = int(keep.sum())
+                    self._postings_cache.pop(term_id, None)
+            self._total_postings -= self._dead_postings
+            self._dead_postings = 0
+
+    # ------------------------------------------------------------------
+    # Scoring
+    # ------------------------------------------------------------------
+
+    def _own_postings(self, term_id: int):
+        """Before appending: copy a term's buffers if an index sharing them appended past our postings."""
+        count = self._post_len[term_id]
+        if len(self._post_docs[term_id]) != count:
+            self._post_docs[term_id] = self._post_docs[term_id][:count]
+            self._post_tfs[term_id] = self._post_tfs[term_id][:count]
+
+    def _read_postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Copy a term's postings (doc ids, term frequencies) out of the array buffers."""
+        with self._lock:
+            count = self._post_len[term_id]
+            docs = np.frombuffer(self._post_docs[term_id], dtype=np.uint32, count=count).astype(np.int64)
+            tfs = np.frombuffer(self._post_tfs[term_id], dtype=np.uint32, count=count).astype(np.float32)
+        return docs, tfs
+
+    def _postings(self, term_id: int) -> Tuple[np.ndarray, np.ndarray]:
+        """Cached NumPy postings for a query term."""
+        cached = self._postings_cache.get(term_id)
+        if cached is None:
+            with self._lock:
+                cached = self._read_postings(term_id)
+                self._postings_cache[term_id] = cached
+        return cached
+
+    def _refresh_caches(self):
+        """Invalidate IDF and length-normalization caches after index changes."""
+        if self._cache_generation == self._generation:
+            return
+        with self._lock:
+            doc_len = np.frombuffer(self._doc_len, dtype=np.uint32).astype(np.float32)
+            deleted = np.frombuffer(bytes(self._deleted), dtype=np.uint8).astype(bool)
+            generation = self._generation
+        avgdl = self.avgdl or 1.0
+        self._norm_cache = self.k1 * (1 - self.b + self.b * doc_len / avgdl)
+        self._deleted_cache = deleted if deleted.any() else None
+        self._idf_cache = {}
+        self._max_score_cache = {}
+        self._cache_generation = generation
+
+    def idf(self, term_id: int) -> float:
+        """Lazily computed IDF for a term."""
+        self._refresh_caches()
+        value = self._idf_cache.get(term_id)
+        if value is None:
+            df = self._df[term_id]
+            value = math.log(1 + (self._num_live - df + 0.5) / (df + 0.5))
+            self._idf_cache[term_id] = value
+        return value
+
+    def max_score(self, term_id: int) -> float:
+        """Upper bound of a term's score contribution to any document (cached)."""
+        self._refresh_caches()
+        value = self._max_score_cache.get(term_id)
+        if value is None:
+            docs, tfs = self._postings(term_id)
+            value = float(self._term_scores(term_id, docs, tfs).max()) if len(docs) else 0.0
+            self._max_score_cache[term_id] = value
+        return value
+
+    def _term_scores(self, term_id: int, docs: np.ndarray, tfs: np.ndarray) -> np.ndarray:
+        """BM25 contribution of one term for the given postings."""
+        return self.idf(term_id) * tfs * (self.k1 + 1) / (tfs + self._norm_cache[docs])
+
+    def _term_ids(self, query_tokens: List[str]) -> List[int]:
+        return [self._vocab[token] for token in query_tokens if token in self._vocab]
+
+    def get_scores(self,
+                   query_tokens: List[str],
+                   ranges: Optional[List[Tuple[int, int]]] = None) -> np.ndarray:
+        """
+        Score documents term-at-a-time over postings lists.
+
+        Args:
+            query_tokens: Tokenized query
+            ranges: Optional document id ranges [start, end); when given, only
+                    postings inside the ranges are scored and the result is
+                    laid out as the concatenation of the ranges
+
+        Returns:
+            Array of BM25 scores (removed documents score 0)
+        """
+        self._refresh_caches()
+        norm = self._norm_cache
+        k1 = self.k1
+
+        if ranges is None:
+            scores = np.zeros(len(self._doc_len), dtype=np.float32)
+            for term_id in self._term_ids(query_tokens):
+                docs, tfs = self._postings(term_id)
+                scores[docs] += self.idf(term_id) * tfs * (k1 + 1) / (tfs + norm[docs])
+            if self._deleted_cache is not None:
+                scores[self._deleted_cache[:len(scores)]] = 0.0
+            return scores
+
+        bases = np.cumsum([0] + [end - start for start, end in ranges])
+        scores = np.zeros(bases[-1], dtype=np.float32)
+        for term_id in self._term_ids(query_tokens):
+            docs, tfs = self._postings(term_id)
+            idf = self.idf(term_id)
+            for (start, end), base in zip(ranges, bases):
+                lo, hi = np.searchsorted(docs, [start, end])
+                if lo == hi:
+                    continue
+                range_docs, range_tfs = docs[lo:hi], tfs[lo:hi]
+                scores[range_docs - start + base] += (
+                    idf * range_tfs * (k1 + 1) / (range_tfs + norm[range_docs])
+                )
+        if self._deleted_cache is not None:
+            candidate_ids = np.concatenate([np.arange(start, end) for start, end in ranges])
+            scores[self._deleted_cache[candidate_ids]] = 0.0
+        return scores
+
+    def _range_postings(self,
+                        term_id: int,
+                        ranges: Optional[List[Tuple[int, int]]]) -> Tuple[np.ndarray, np.ndarray]:
+        """Postings of a term restricted to live documents inside the ranges."""
+        docs, tfs = self._postings(term_id)
+        if ranges is not None:
+            slices = [slice(*np.searchsorted(docs, [start, end])) for start, end in ranges]
+            docs = np.concatenate([docs[s] for s in slices])
+            tfs = np.concatenate([tfs[s] for s in slices])
+        if self._deleted_cache is not None and len(docs):
+            live = ~self._deleted_cache[docs]
+            docs, tfs = docs[live], tfs[live]
+        return docs, tfs
+
+    def top_k(self,
+              query_tokens: List[str],
+              k: int,
+              ranges: Optional[List[Tuple[int, int]]] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k BM25 retrieval with MaxScore pruning.
+
+        Terms are processed in decreasing order of their score upper bound.
+        While the sum of the remaining upper bounds can still beat the current
+        k-th best score, new documents are admitted from each postings list.
+        After that, remaining terms only score existing candidates (found by
+        binary search in the postings), and candidates that can no longer
+        reach the k-th score are dropped.
+
+        Args:
+            query_tokens: Tokenized query
+            k: Number of results
+            ranges: Optional document id ranges [start, end) to search within
+
+        Returns:
+            List of (doc_id, score) sorted by descending score; documents
+            matching no query term are not returned
+        """
+        self._refresh_caches()
+        if k <= 0:
+            return []
+
+        # Repeated query tokens count once per occurrence (as in get_scores)
+        query_terms = Counter(self._term_ids(query_tokens))
+        terms = sorted(query_terms, key=lambda t: self.max_score(t) * query_terms[t], reverse=True)
+        upper_bounds = [self.max_score(t) * query_terms[t] for t in terms]
+        remaining = np.cumsum(upper_bounds[::-1])[::-1].tolist() + [0.0]
+
+        cand_docs = np.empty(0, dtype=np.int64)
+        cand_scores = np.empty(0, dtype=np.float32)
+        threshold = 0.0
+
+        for i, term_id in enumerate(terms):
+            docs, tfs = self._range_postings(term_id, ranges)
+            if not len(docs):
+                continue
+            weight = query_terms[term_id]
+
+            if len(cand_docs) >= k and remaining[i] <= threshold:
+                # Non-essential term: only candidates can still make the top k
+                pos = np.searchsorted(docs, cand_docs)
+                pos[pos == len(docs)] = 0
+                hit = docs[pos] == cand_docs
+                if hit.any():
+                    cand_scores[hit] += weight * self._term_scores(term_id, docs[pos[hit]], tfs[pos[hit]])
+
+                # Drop candidates that can't reach the k-th score anymore
+                keep = cand_scores + remaining[i + 1] >= threshold
+                cand_docs, cand_scores = cand_docs[keep], cand_scores[keep]
+            else:
+                # Essential term: merge its postings into the candidate set
+                contrib = weight * self._term_scores(term_id, docs, tfs)
+                merged = np.union1d(cand_docs, docs)
+                merged_scores = np.zeros(len(merged), dtype=np.float32)
+                merged_scores[np.searchsorted(merged, cand_docs)] = cand_scores
+                merged_scores[np.searchsorted(merged, docs)] += contrib
+                cand_docs, cand_scores = merged, merged_scores
+
+            if len(cand_scores) >= k:
+                threshold = float(np.partition(cand_scores, len(cand_scores) - k)[len(cand_scores) - k])
+
+        if not len(cand_docs):
+            return []
+        top = top_k_indices(cand_scores, k)
+        return [(int(cand_docs[i]), float(cand_scores[i])) for i in top]
+
+    # ------------------------------------------------------------------
+    # Serialization
+    # ------------------------------------------------------------------
+
+    def to_arrays(self, first_doc: int = 0) -> Tuple[List[str], Dict[str, np.ndarray]]:
+        """
+        Export the index as a vocabulary plus term-major CSR postings.
+
+        Args:
+            first_doc: Only export documents from this id on; terms without
+                       postings among them are left out (see append_arrays)
+
+        Returns:
+            (terms, arrays) with arrays term_indptr, doc_ids, term_freqs,
+            doc_len and deleted
+        """
+        with self._lock:
+            term_ids, bounds = [], []
+            for term_id in range(len(self._terms)):
+                count = self._post_len[term_id]
+                start = 0
+                if first_doc:
+                    docs = self._post_docs[term_id]
+                    if not count or docs[count - 1] < first_doc:
+                        continue
+                    start = bisect.bisect_left(docs, first_doc, 0, count)
+                term_ids.append(term_id)
+                bounds.append((start, count))
+
+            term_indptr = np.zeros(len(bounds) + 1, dtype=np.int64)
+            np.cumsum([end - start for start, end in bounds], out=term_indptr[1:])
+            doc_ids = np.empty(term_indptr[-1], dtype=np.uint32)
+            term_freqs = np.empty(term_indptr[-1], dtype=np.uint32)
+            for i, (term_id, (start, end)) in enumerate(zip(term_ids, bounds)):
+                lo, hi = term_indptr[i], term_indptr[i + 1]
+                doc_ids[lo:hi] = np.frombuffer(self._post_docs[term_id], dtype=np.uint32, count=end)[start:]
+                term_freqs[lo:hi] = np.frombuffer(self._post_tfs[term_id], dtype=np.uint32, count=end)[start:]
+
+            arrays = {
+                'term_indptr': term_indptr,
+                'doc_ids': doc_ids,
+                'term_freqs': term_freqs,
+                'doc_len': np.frombuffer(self._doc_len, dtype=np.uint32)[first_doc:].copy(),
+                'deleted': np.frombuffer(bytes(self._deleted[first_doc:]), dtype=np.uint8).copy(),
+            }
+            return [self._terms[term_id] for term_id in term_ids], arrays
+
+    def append_arrays(self, terms: List[str], arrays: Dict[str, np.ndarray]):
+        """
+        Append documents exported with to_arrays(first_doc=len(self)) from an
+        index that continued this one.
+
+        Args:
+            terms: Exported vocabulary
+            arrays: Exported postings, document lengths and tombstones
+        """
+        with self._lock:
+            first_id = len(self._doc_len)
+            term_indptr = arrays['term_indptr'].tolist()
+            doc_ids = arrays['doc_ids'].astype(np.uint32, copy=False)
+            term_freqs = arrays['term_freqs'].astype(np.uint32, copy=False)
+            doc_len = arrays['doc_len'].astype(np.uint32, copy=False)
+            deleted = arrays['deleted'].astype(bool)
+            if len(doc_ids) and int(doc_ids.min()) < first_id:
+                raise ValueError("Postings do not continue this index")
+
+            for i, term in enumerate(terms):
+                term_id = self._vocab.get(term)
+                if term_id is None:
+                    term_id = len(self._terms)
+                    self._vocab[term] = term_id
+                    self._terms.append(term)
+                    self._post_docs.append(array('I'))
+                    self._post_tfs.append(array('I'))
+                    self._post_len.append(0)
+                    self._df.append(0)
+                self._own_postings(term_id)
+                docs = doc_ids[term_indptr[i]:term_indptr[i + 1]]
+                self._post_docs[term_id].frombytes(docs.tobytes())
+                self._post_tfs[term_id].frombytes(term_freqs[term_indptr[i]:term_indptr[i + 1]].tobytes())
+                self._post_len[term_id] += len(docs)
+                live = int((~deleted[docs - first_id]).sum())
+                self._df[term_id] += live
+                self._dead_postings += len(docs) - live
+                self._postings_cache.pop(term_id, None)
+
+            self._doc_len.frombytes(doc_len.tobytes())
+            self._deleted.extend(deleted.astype(np.uint8).tobytes())
+            self._num_live += int((~deleted).sum())
+            self._total_len += int(doc_len[~deleted].sum())
+            self._total_postings += len(doc_ids)
+            self._generation += 1
+
+    def copy(self) -> 'BM25Index':
+        """
+        Copy that shares this index's postings buffers.
+
+        Postings are append-only and each index only reads its own count of
+        postings per term, so both indexes can read the shared buffers. The
+        first of them to append to a term extends its buffer in place; the
+        other copies that buffer before appending to it. Both
+        indexes use one lock, so a buffer is never resized while it is read.
+        Copying costs the per-term and per-document counters, not the
+        postings.
+        """
+        with self._lock:
+            index = BM25Index(k1=self.k1, b=self.b)
+            index._vocab = dict(self._vocab)
+            index._terms = list(self._terms)
+            index._post_docs = list(self._post_docs)
+            index._post_tfs = list(self._post_tfs)
+            index._post_len = array('I', self._post_len)
+            index._df = array('I', self._df)
+            index._doc_len = array('I', self._doc_len)
+            index._deleted = bytearray(self._deleted)
+            index._num_live = self._num_live
+            index._total_len = self._total_len
+            index._dead_postings = self._dead_postings
+            index._total_postings = self._total_postings
+            index._postings_cache = dict(self._postings_cache)
+            index._lock = self._lock
+            return index
+
+    def take(self, doc_ids: np.ndarray) -> 'BM25Index':
+        """
+        Copy of the index restricted to some documents.
+
+        Args:
+            doc_ids: Ascending ids of the documents to keep; they are renumbered
+                     0..len(doc_ids)-1 in this order
+
+        Returns:
+            New index (terms left without postings are dropped)
+        """
+        terms, arrays = self.to_arrays()
+        doc_ids = np.asarray(doc_ids, dtype=np.int64)
+        new_ids = np.full(len(arrays['doc_len']), -1, dtype=np.int64)
+        new_ids[doc_ids] = np.arange(len(doc_ids))
+
+        # Postings stay term-major and sorted by doc id (the renumbering is monotonic)
+        mapped = new_ids[arrays['doc_ids']]
+        keep = mapped >= 0
+        term_of_posting = np.repeat(np.arange(len(terms)), np.diff(arrays['term_indptr']))
+        counts = np.bincount(term_of_posting[keep], minlength=len(terms))
+        kept_terms = np.flatnonzero(counts)
+        term_indptr = np.zeros(len(kept_terms) + 1, dtype=np.int64)
+        np.cumsum(counts[kept_terms], out=term_indptr[1:])
+
+        return BM25Index.from_arrays(
+            [terms[t] for t in kept_terms],
+            {
+                'term_indptr': term_indptr,
+                'doc_ids': mapped[keep].astype(np.uint32),
+                'term_freqs': arrays['term_freqs'][keep],
+                'doc_len': arrays['doc_len'][doc_ids],
+                'deleted': arrays['deleted'][doc_ids],
+            },
+            k1=self.k1,
+            b=self.b
+        )
+
+    @classmethod
+    def from_arrays(cls,
+                    terms: List[str],
+                    arrays: Dict[str, np.ndarray],
+                    k1: float = 1.5,
+                    b: float = 0.75) -> 'BM25Index':
+        """Rebuild an index exported with to_arrays without re-tokenizing."""
+        index = cls(k1=k1, b=b)
+        term_indptr = arrays['term_indptr'].tolist()
+        doc_ids = arrays['doc_ids'].astype(np.uint32, copy=False)
+        term_freqs = arrays['term_freqs'].astype(np.uint32, copy=False)
+        deleted = arrays['deleted'].astype(bool)
+        doc_len = arrays['doc_len'].astype(np.uint32, copy=False)
+
+        index._terms = list(terms)
+        index._vocab = {term: i for i, term in enumerate(index._terms)}
+        index._post_docs = [array('I', doc_ids[term_indptr[i]:term_indptr[i + 1]].tobytes())
+                            for i in range(len(index._terms))]
+        index._post_tfs = [array('I', term_freqs[term_indptr[i]:term_indptr[i + 1]].tobytes())
+                           for i in range(len(index._terms))]
+        index._post_len = array('I', np.diff(term_indptr).astype(np.uint32).tobytes())
+
+        # Live document frequencies exclude tombstoned postings
+        live_postings = ~deleted[doc_ids]
+        term_of_posting = np.repeat(np.arange(len(index._terms)), np.diff(term_indptr))
+        df = np.bincount(term_of_posting[live_postings], minlength=len(index._terms))
+        index._df = array('I', df.astype(np.uint32).tobytes())
+
+        index._doc_len = array('I', doc_len.tobytes())
+        index._deleted = bytearray(deleted.astype(np.uint8).tobytes())
+        index._num_live = int((~deleted).sum())
+        index._total_len = int(doc_len[~deleted].sum())
+        index._total_postings = len(doc_ids)
+        index._dead_postings = int((~live_postings).sum())
+        index._generation += 1
+        return index
@@ -0,0 +1,340 @@
+"""
+Caches for the DoctorFollow Medical RAG System
+Bounded LRU cache with optional time-to-live and hit/miss counters, a
+two-tier (memory + optional SQLite) cache for generated answers, and a
+SQLite cache of passage embeddings keyed by chunk content
+"""
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+
+class LRUCache:
+    """
+    Thread-safe least-recently-used cache.
+
+    Entries are evicted when the cache exceeds maxsize, and (if ttl is set)
+    treated as missing once they are older than ttl seconds.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: Optional[float] = None):
+        """
+        Initialize an empty cache.
+
+        Args:
+            maxsize: Maximum number of entries
+            ttl: Entry lifetime in seconds (None = no expiry)
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default=None):
+        """Return the cached value for key (marking it recently used), or default."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                value, stored_at = entry
+                if self.ttl is None or time.monotonic() - stored_at <= self.ttl:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+            self.misses += 1
+            return default
+
+    def put(self, key: Hashable, value):
+        """Store value under key, evicting the least recently used entries if full."""
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, any]:
+        """Size and hit/miss counters."""
+        lookups = self.hits + self.misses
+        return {
+            'size': len(self._data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
+
+
+class ResponseCache:
+    """
+    Cache of generated answers.
+
+    Keys combine the normalized query, the corpus version, the retrieved
+    chunk ids and a digest of the conversation history, so an answer is only
+    reused when the LLM would have seen exactly the same prompt inputs.
+    Entries live in an in-memory LRU tier and, if db_path is given, in a
+    SQLite tier that survives restarts.
+    """
+
+    def __init__(self,
+                 maxsize: int = 512,
+                 ttl: Optional[float] = None,
+                 db_path: Optional[str] = None):
+        """
+        Initialize the cache.
+
+        Args:
+            maxsize: Maximum number of in-memory entries
+            ttl: Entry lifetime in seconds (None = no expiry)
+            db_path: Optional SQLite file for the persistent tier
+        """
+        self.ttl = ttl
+        self.memory = LRUCache(maxsize=maxsize, ttl=ttl)
+        self.disk_hits = 0
+
+        self._db = None
+        self._db_lock = threading.Lock()
+        if db_path:
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(db_path, check_same_thread=False)
+            self._db.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    corpus_version TEXT NOT NULL,
+                    answer TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )
+            """)
+            self._db.commit()
+
+    @staticmethod
+    def make_key(normalized_query: str,
+                 corpus_version: str,
+                 chunk_ids: List[int],
+                 conversation_history: Optional[List[Dict]] = None) -> str:
+        """
+        Build a cache key.
+
+        Args:
+            normalized_query: Query after normalize_query
+            corpus_version: Version of the corpus the chunks were retrieved from
+            chunk_ids: Retrieved chunk ids, in prompt order
+            conversation_history: Conversation turns included in the prompt
+
+        Returns:
+            Hex SHA-256 digest
+        """
+        history_digest = hashlib.sha256(
+            json.dumps(conversation_history or [], ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()
+        payload = json.dumps([normalized_query, corpus_version, list(chunk_ids), history_digest],
+                             ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        """Cached answer for key, checking memory first and then SQLite."""
+        answer = self.memory.get(key)
+        if answer is not None or self._db is None:
+            return answer
+
+        with self._db_lock:
+            row = self._db.execute(
+                "SELECT answer, created_at FROM response_cache WHERE key = ?", (key,)
+            ).fetchone()
+        if row is None or (self.ttl is not None and time.time() - row[1] > self.ttl):
+            return None
+
+        self.disk_hits += 1
+        self.memory.put(key, row[0])
+        return row[0]
+
+    def put(self, key: str, answer: str, corpus_version: str):
+        """Store an answer in both tiers."""
+        self.memory.put(key, answer)
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO response_cache (key, corpus_version, answer, created_at) "
+                "VALUES (?, ?, ?, ?)",
+                (key, corpus_version, answer, time.time())
+            )
+            self._db.commit()
+
+    def invalidate(self, corpus_version: str):
+        """Drop every entry that was not generated against corpus_version."""
+        self.memory.clear()
+        if self._db is None:
+            return
+        with self._db_lock:
+            self._db.execute("DELETE FROM response_cache WHERE corpus_version != ?", (corpus_version,))
+            self._db.commit()
+
+    def stats(self) -> Dict[str, any]:
+        """Memory tier counters plus SQLite hits."""
+        stats = self.memory.stats()
+        stats['disk_hits'] = self.disk_hits
+        stats['persistent'] = self._db is not None
+        return stats
+
+
+class EmbeddingCache:
+    """
+    Persistent cache of passage embeddings.
+
+    Keys are (model name, prefix, SHA-256 of the text), so re-uploading a
+    document, or a revision that changes a few pages, only embeds the chunks
+    whose text actually changed. Embeddings are stored as float32 blobs in a
+    SQLite file; lookups and inserts are batched.
+    """
+
+    # Keys per SELECT ... IN (...) statement (SQLite's default variable limit is 999)
+    LOOKUP_BATCH_SIZE = 500
+
+    def __init__(self, db_path: str):
+        """
+        Open (or create) the cache file.
+
+        Args:
+            db_path: SQLite file path
+        """
+        self.hits = 0
+        self.misses = 0
+
+        Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db_lock = threading.Lock()
+        self._db.execute("""
+            CREATE TABLE IF NOT EXISTS embedding_cache (
+                model TEXT NOT NULL,
+                prefix TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                embedding BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, prefix, text_hash)
+            )
+        """)
+        self._db.commit()
+
+    @staticmethod
+    def text_hash(text: str) -> str:
+        """Hex SHA-256 digest of a chunk text."""
+        return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+    def get_many(self, model_name: str, prefix: str, texts: List[str]) -> List[Optional[np.ndarray]]:
+        """
+        Look up embeddings for many texts.
+
+        Args:
+            model_name: Embedding model name
+            prefix: Prefix the texts are embedded with (e.g. "passage: ")
+            texts: Texts without the prefix
+
+        Returns:
+            One float32 vector (or None on a miss) per text, in input order
+        """
+        hashes = [self.text_hash(text) for text in texts]
+        found = {}
+        with self._db_lock:
+            unique = list(dict.fromkeys(hashes))
+            for i in range(0, len(unique), self.LOOKUP_BATCH_SIZE):
+                batch = unique[i:i + self.LOOKUP_BATCH_SIZE]
+                rows = self._db.execute(
+                    "SELECT text_hash, dim, embedding FROM embedding_cache "
+                    f"WHERE model = ? AND prefix = ? AND text_hash IN ({','.join('?' * len(batch))})",
+                    (model_name, prefix, *batch)
+                ).fetchall()
+                for text_hash, dim, blob in rows:
+                    found[text_hash] = np.frombuffer(blob, dtype=np.float32, count=dim)
+
+            embeddings = [found.get(text_hash) for text_hash in hashes]
+            hits = sum(embedding is not None for embedding in embeddings)
+            self.hits += hits
+            self.misses += len(embeddings) - hits
+        return embeddings
+
+    def put_many(self, model_name: str, prefix: str, texts: List[str], embeddings: np.ndarray):
+        """Store embeddings for many texts in one transaction."""
+        embeddings = np.asarray(embeddings, dtype=np.float32)
+        now = time.time()
+        rows = [
+            (model_name, prefix, self.text_hash(text), embedding.shape[0], embedding.tobytes(), now)
+            for text, embedding in zip(texts, embeddings)
+        ]
+        with self._db_lock:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO embedding_cache "
+                "(model, prefix, text_hash, dim, embedding, created_at) VALUES (?, ?, ?, ?, ?, ?)",
+                rows
+            )
+            self._db.commit()
+
+    def encode(self,
+               model,
+               model_name: str,
+               texts: List[str],
+               prefix: str = "passage: ",
+               **encode_kwargs) -> Tuple[np.ndarray, int]:
+        """
+        Embed texts, running only cache misses through model.encode.
+
+        Args:
+            model: SentenceTransformer (anything with an encode method)
+            model_name: Name used in cache keys
+            texts: Texts without the prefix
+            prefix: Prefix prepended before encoding
+            **encode_kwargs: Passed to model.encode (e.g. normalize_embeddings)
+
+        Returns:
+            (embeddings, hits): float32 matrix in input order and the number
+            of texts served from the cache
+        """
+        cached = self.get_many(model_name, prefix, texts)
+        missing = [i for i, embedding in enumerate(cached) if embedding is None]
+
+        if missing:
+            # Duplicate texts within the batch are encoded once
+            unique_texts = list(dict.fromkeys(texts[i] for i in missing))
+            encoded = np.asarray(
+                model.encode([f"{prefix}{text}" for text in unique_texts], convert_to_numpy=True, **encode_kwargs),
+                dtype=np.float32
+            )
+            self.put_many(model_name, prefix, unique_texts, encoded)
+            by_text = dict(zip(unique_texts, encoded))
+            for i in missing:
+                cached[i] = by_text[texts[i]]
+
+        if not cached:
+            return np.empty((0, 0), dtype=np.float32), 0
+        return np.stack(cached), len(texts) - len(missing)
+
+    def __len__(self) -> int:
+        with self._db_lock:
+            return self._db.execute("SELECT COUNT(*) FROM embedding_cache").fetchone()[0]
+
+    def stats(self) -> Dict[str, any]:
+        """Lookup counters and number of stored embeddings."""
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self),
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': round(self.hits / lookups, 3) if lookups else 0.0,
+        }
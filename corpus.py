@@ -0,0 +1,428 @@
+"""
+Multi-document corpus for the DoctorFollow Medical RAG System
+Append-only chunk store with per-document chunk ranges, growable embedding
+matrix and incrementally updated BM25 index
+"""
+import bisect
+import time
+import uuid
+from typing import List, Tuple, Dict, Optional
+
+import numpy as np
+
+from ann_index import IVFFlatIndex, HNSWIndex, create_ann_index
+from bm25_index import BM25Index
+from embedding_store import EmbeddingStore
+from utils import top_k_indices
+
+
+def tokenize(text: str) -> List[str]:
+    """Tokenizer shared by indexing and querying (lowercase + whitespace split)."""
+    return text.lower().split()
+
+
+class Corpus:
+    """
+    Append-only corpus of chunks from many documents.
+
+    Each document owns a contiguous chunk range [start, end), so filtering by
+    document never has to scan chunks belonging to other documents.
+
+    Adding a document:
+    - appends its chunks and their L2-normalized embeddings (amortized
+      matrix growth, stored at the configured precision), so cosine
+      similarity is a single dot product
+    - appends its postings to the BM25 inverted index
+    - inserts its embeddings into the optional ANN index
+
+    The most recently added document can be extended batch by batch
+    (streaming ingestion); its range only grows once a batch is fully indexed.
+
+    copy() shares the existing embedding rows, BM25 postings and IVF lists
+    with the copy, so staging a document on a copy costs time proportional
+    to the new chunks rather than to the corpus (an HNSW graph is cloned).
+
+    Removing a document tombstones its BM25 postings and drops its chunk range
+    from searches; chunk ids of other documents don't change until compact()
+    reclaims the removed ranges.
+
+    Every add/remove assigns a new random `version`, which downstream caches
+    use to tell whether results were computed against the current corpus.
+    """
+
+    def __init__(self,
+                 k1: float = 1.5,
+                 b: float = 0.75,
+                 precision: str = 'float32',
+                 ann_backend: Optional[str] = None,
+                 ann_params: Optional[Dict[str, any]] = None):
+        """
+        Initialize an empty corpus.
+
+        Args:
+            k1: BM25 term frequency saturation
+            b: BM25 length normalization
+            precision: Embedding storage precision ('float32', 'float16' or 'int8')
+            ann_backend: Optional ANN index for semantic search ('ivf' or 'hnsw')
+            ann_params: ANN parameters (e.g. nprobe for IVF, ef_search for HNSW)
+        """
+        self.documents: List[Dict[str, any]] = []
+        self.chunks: List[str] = []
+        self.page_numbers: List[int] = []  # 1-based source page per chunk, 0 if unknown
+        self.embedding_store = EmbeddingStore(precision)
+        self.bm25 = BM25Index(k1=k1, b=b)
+
+        self.ann_backend = ann_backend
+        self.ann_params = ann_params or {}
+        self.ann_index = None
+
+        self.version = uuid.uuid4().hex
+
+    def __len__(self) -> int:
+        return len(self.chunks)
+
+    @property
+    def document_names(self) -> List[str]:
+        return [doc['name'] for doc in self.documents]
+
+    @property
+    def live_chunks(self) -> int:
+        """Number of chunks in indexed documents (removed ranges excluded)."""
+        return sum(doc['end'] - doc['start'] for doc in self.documents)
+
+    def has_document(self, name: str) -> bool:
+        return any(doc['name'] == name for doc in self.documents)
+
+    def add_document(self,
+                     name: str,
+                     chunks: List[str],
+                     embeddings: np.ndarray,
+                     page_numbers: Optional[List[int]] = None) -> Dict[str, any]:
+        """
+        Append a document's chunks and embeddings to the corpus.
+
+        Args:
+            name: Document name (must be unique within the corpus)
+            chunks: Chunk texts
+            embeddings: Embedding matrix for the chunks (len(chunks) x dim)
+            page_numbers: Optional 1-based source page of each chunk
+
+        Returns:
+            Document record with its chunk range
+        """
+        if self.has_document(name):
+            raise ValueError(f"Document already indexed: {name}")
+
+        document = {
+            'name': name,
+            'start': len(self.chunks),
+            'end': len(self.chunks),
+            'ingested_at': time.time(),
+        }
+        self._append_chunks(document, chunks, embeddings, page_numbers)
+        self.documents.append(document)
+        return document
+
+    def extend_document(self,
+                        name: str,
+                        chunks: List[str],
+                        embeddings: np.ndarray,
+                        page_numbers: Optional[List[int]] = None) -> Dict[str, any]:
+        """
+        Append more chunks to the most recently added document.
+
+        Used by streaming ingestion to index a document batch by batch into
+        a staged copy; the document keeps one contiguous chunk range.
+
+        Args:
+            name: Name of the last added document
+            chunks: Chunk texts
+            embeddings: Embedding matrix for the chunks (len(chunks) x dim)
+            page_numbers: Optional 1-based source page of each chunk
+
+        Returns:
+            Updated document record
+        """
+        document = self.documents[-1] if self.documents else None
+        if document is None or document['name'] != name or document['end'] != len(self.chunks):
+            raise ValueError(f"Only the last added document can be extended: {name}")
+        self._append_chunks(document, chunks, embeddings, page_numbers)
+        return document
+
+    def _append_chunks(self,
+                       document: Dict[str, any],
+                       chunks: List[str],
+                       embeddings: np.ndarray,
+                       page_numbers: Optional[List[int]]):
+        """Index chunks at the end of the corpus and grow the document's range over them."""
+        if len(chunks) != embeddings.shape[0]:
+            raise ValueError("Number of chunks and embeddings must match")
+        if page_numbers is not None and len(page_numbers) != len(chunks):
+            raise ValueError("Number of chunks and page numbers must match")
+
+        rows = self.embedding_store.append(embeddings)
+        self.bm25.add_documents(tokenize(chunk) for chunk in chunks)
+        self.chunks.extend(chunks)
+        self.page_numbers.extend(page_numbers if page_numbers is not None else [0] * len(chunks))
+        self._add_to_ann(np.arange(rows.start, rows.stop))
+
+        # Chunks only become searchable once fully indexed
+        document['end'] = len(self.chunks)
+        self.version = uuid.uuid4().hex
+
+    def remove_document(self, name: str) -> bool:
+        """
+        Remove a document from search results.
+
+        Its chunk range is tombstoned in BM25 and excluded from chunk_ranges;
+        chunk texts and embeddings stay in place (so other chunk ids are
+        stable) until compact() is called.
+
+        Args:
+            name: Document name
+
+        Returns:
+            True if the document was removed
+        """
+        for i, doc in enumerate(self.documents):
+            if doc['name'] == name:
+                self.bm25.remove_documents(range(doc['start'], doc['end']))
+                del self.documents[i]
+                self.version = uuid.uuid4().hex
+                return True
+        return False
+
+    def compact(self) -> bool:
+        """
+        Drop the chunk ranges of removed documents and renumber the rest.
+
+        Reclaims the chunk texts, embeddings and BM25 postings that
+        remove_document leaves in place. Chunk ids after a removed range
+        change, so compact a staged copy before it replaces the live corpus.
+
+        Returns:
+            True if any removed chunks were dropped
+        """
+        if self.live_chunks == len(self.chunks):
+            return False
+
+        # Documents are kept in append order, so their ranges are ascending
+        keep = np.concatenate([np.arange(doc['start'], doc['end']) for doc in self.documents]) \
+            if self.documents else np.empty(0, dtype=np.int64)
+        self.chunks = [self.chunks[i] for i in keep]
+        self.page_numbers = [self.page_numbers[i] for i in keep]
+        self.embedding_store = self.embedding_store.take(keep)
+        self.bm25 = self.bm25.take(keep)
+
+        documents, start = [], 0
+        for doc in self.documents:
+            end = start + doc['end'] - doc['start']
+            documents.append({**doc, 'start': start, 'end': end})
+            start = end
+        self.documents = documents
+
+        self._rebuild_ann()
+        self.version = uuid.uuid4().hex
+        return True
+
+    def _add_to_ann(self, row_ids: np.ndarray):
+        """Insert stored embedding rows into the ANN index (created on first use)."""
+        if not self.ann_backend:
+            return
+        if self.ann_index is None:
+            self.ann_index = create_ann_index(self.ann_backend, self.embedding_store.dim, **self.ann_params)
+        self.ann_index.add(
+            self.embedding_store.get_rows(row_ids),
+            row_ids,
+            all_vectors=self.embedding_store.to_float32
+        )
+
+    def _rebuild_ann(self):
+        """Build the ANN index from scratch over all stored embeddings."""
+        self.ann_index = None
+        if self.ann_backend and len(self.embedding_store):
+            self._add_to_ann(np.arange(len(self.embedding_store)))
+
+    def is_live(self, chunk_ids: np.ndarray) -> np.ndarray:
+        """Boolean mask of chunk ids that belong to a currently indexed document."""
+        if not self.documents:
+            return np.zeros(len(chunk_ids), dtype=bool)
+        starts = np.array([doc['start'] for doc in self.documents])
+        ends = np.array([doc['end'] for doc in self.documents])
+        order = np.argsort(starts)
+        starts, ends = starts[order], ends[order]
+        pos = np.searchsorted(starts, chunk_ids, side='right') - 1
+        return (pos >= 0) & (chunk_ids < ends[np.maximum(pos, 0)])
+
+    def semantic_search(self,
+                        query_embedding: np.ndarray,
+                        k: int,
+                        document_names: Optional[List[str]] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k chunks by cosine similarity.
+
+        Unfiltered searches go through the ANN index when one is configured
+        and trained; candidates are re-scored exactly from the embedding store.
+        Ids of removed ranges are filtered out of the candidates; if fewer
+        than k live candidates remain, the search falls back to an exact scan.
+        Document-filtered searches scan only the selected chunk ranges.
+
+        Args:
+            query_embedding: Normalized query vector
+            k: Number of results
+            document_names: Optional documents to restrict the search to
+
+        Returns:
+            List of (chunk_id, similarity) sorted by descending similarity
+        """
+        if document_names is None and self.ann_index is not None:
+            has_removed = len(self.ann_index) != self.live_chunks
+            candidates = self.ann_index.search(query_embedding, 2 * k if has_removed else k)
+            if candidates is not None and has_removed:
+                candidates = candidates[self.is_live(candidates)]
+                if len(candidates) < min(k, self.live_chunks):
+                    candidates = None  # too many removed chunks among the neighbours
+            if candidates is not None:
+                scores = self.embedding_store.score_rows(query_embedding, candidates)
+                top = top_k_indices(scores, k)
+                return [(int(candidates[i]), float(scores[i])) for i in top]
+
+        ranges = self.chunk_ranges(document_names)
+        if not ranges:
+            return []
+        full = ranges == [(0, len(self.chunks))]
+        similarities = self.embedding_store.scores(query_embedding, ranges=None if full else ranges)
+        top = top_k_indices(similarities, k)
+        if full:
+            return [(int(i), float(similarities[i])) for i in top]
+        chunk_ids = np.concatenate([np.arange(start, end) for start, end in ranges])
+        return [(int(chunk_ids[i]), float(similarities[i])) for i in top]
+
+    def semantic_search_batch(self,
+                              query_embeddings: np.ndarray,
+                              k: int,
+                              document_names: Optional[List[str]] = None) -> List[List[Tuple[int, float]]]:
+        """
+        Top-k chunks by cosine similarity for many queries.
+
+        Exact searches score all queries against the selected chunk ranges
+        with one matrix-matrix product; ANN searches run per query.
+
+        Args:
+            query_embeddings: Normalized query matrix (q x dim)
+            k: Number of results per query
+            document_names: Optional documents to restrict the search to
+
+        Returns:
+            One list of (chunk_id, similarity) per query
+        """
+        if document_names is None and self.ann_index is not None and self.ann_index.is_trained:
+            return [self.semantic_search(query_embedding, k) for query_embedding in query_embeddings]
+
+        ranges = self.chunk_ranges(document_names)
+        if not ranges:
+            return [[] for _ in query_embeddings]
+        full = ranges == [(0, len(self.chunks))]
+        similarities = self.embedding_store.scores_batch(query_embeddings, ranges=None if full else ranges)
+        chunk_ids = None if full else np.concatenate([np.arange(start, end) for start, end in ranges])
+
+        results = []
+        for row in similarities:
+            top = top_k_indices(row, k)
+            ids = top if chunk_ids is None else chunk_ids[top]
+            results.append([(int(idx), float(score)) for idx, score in zip(ids, row[top])])
+        return results
+
+    def bm25_search(self,
+                    query: str,
+                    k: int,
+                    document_names: Optional[List[str]] = None) -> List[Tuple[int, float]]:
+        """
+        Top-k chunks by BM25 score.
+
+        Args:
+            query: Query text
+            k: Number of results
+            document_names: Optional documents to restrict the search to
+
+        Returns:
+            List of (chunk_id, score) sorted by descending score
+        """
+        ranges = self.chunk_ranges(document_names)
+        if not ranges:
+            return []
+        full = ranges == [(0, len(self.chunks))]
+        return self.bm25.top_k(tokenize(query), k, ranges=None if full else ranges)
+
+    def chunk_ranges(self, document_names: Optional[List[str]] = None) -> List[Tuple[int, int]]:
+        """
+        Get chunk ranges for the given documents (all documents if None).
+
+        Args:
+            document_names: Names of documents to include
+
+        Returns:
+            List of (start, end) chunk ranges
+        """
+        if document_names is None:
+            if self.live_chunks == len(self.chunks):
+                return [(0, len(self.chunks))] if self.chunks else []
+            return [(doc['start'], doc['end']) for doc in self.documents]
+        wanted = set(document_names)
+        return [(doc['start'], doc['end']) for doc in self.documents if doc['name'] in wanted]
+
+    def document_for_chunk(self, chunk_idx: int) -> Optional[str]:
+        """Get the name of the document a chunk belongs to."""
+        starts = [doc['start'] for doc in self.documents]
+        pos = bisect.bisect_right(starts, chunk_idx) - 1
+        if pos < 0 or chunk_idx >= self.documents[pos]['end']:
+            return None
+        return self.documents[pos]['name']
+
+    def restore(self,
+                documents: List[Dict[str, any]],
+                chunks: List[str],
+                embedding_store: EmbeddingStore,
+                bm25: BM25Index,
+                ann_index=None,
+                version: Optional[str] = None,
+                page_numbers: Optional[List[int]] = None):
+        """Restore corpus state loaded from an index snapshot."""
+        if embedding_store.precision != self.embedding_store.precision:
+            embedding_store = embedding_store.astype(self.embedding_store.precision)
+        self.documents = documents
+        self.chunks = chunks
+        self.page_numbers = page_numbers if page_numbers is not None else [0] * len(chunks)
+        self.embedding_store = embedding_store
+        self.bm25 = bm25
+        self.version = version or uuid.uuid4().hex
+
+        # Reuse the persisted ANN index only if it matches the configured backend
+        backend = {IVFFlatIndex: 'ivf', HNSWIndex: 'hnsw'}.get(type(ann_index))
+        if backend == self.ann_backend and ann_index is not None and len(ann_index) == len(chunks):
+            self.ann_index = ann_index
+        else:
+            self._rebuild_ann()
+
+    def copy(self) -> 'Corpus':
+        """
+        Copy to stage changes on while this corpus keeps serving queries.
+
+        Embedding rows, BM25 postings and IVF lists are shared, and chunks
+        appended to the copy go behind them without touching the rows this
+        corpus reads, so copying costs the chunk list (references only) and
+        the per-chunk and per-term counters. An HNSW graph can't be shared
+        and is cloned. Corpora sharing rows must not be appended to
+        concurrently (MedicalRAG serializes writers).
+        """
+        corpus = Corpus.__new__(Corpus)
+        corpus.documents = [dict(doc) for doc in self.documents]
+        corpus.chunks = list(self.chunks)
+        corpus.page_numbers = list(self.page_numbers)
+        corpus.embedding_store = self.embedding_store.copy()
+        corpus.bm25 = self.bm25.copy()
+        corpus.ann_backend = self.ann_backend
+        corpus.ann_params = dict(self.ann_params)
+        corpus.ann_index = self.ann_index.copy() if self.ann_index is not None else None
+        corpus.version = self.version
+        return corpus
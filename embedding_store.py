@@ -0,0 +1,236 @@
+"""
+Embedding storage for the DoctorFollow Medical RAG System
+Growable, L2-normalized embedding matrix with selectable storage precision
+
+Precisions:
+    float32  4 bytes/dim, exact
+    float16  2 bytes/dim, ~3 significant digits per component
+    int8     1 byte/dim + one float32 scale per row (symmetric per-row quantization)
+
+Scoring kernels work on row blocks so the dequantized float32 copy never
+exceeds BLOCK_ROWS rows, regardless of corpus size.
+
+copy() shares the row buffer: a copy appends into the spare capacity behind
+the rows it shares, so staging new rows never copies the existing ones.
+"""
+from typing import List, Tuple, Dict, Optional
+
+import numpy as np
+
+from utils import normalize_rows
+
+PRECISIONS = ('float32', 'float16', 'int8')
+STORAGE_DTYPES = {'float32': np.float32, 'float16': np.float16, 'int8': np.int8}
+
+
+class EmbeddingStore:
+    """
+    Append-only embedding matrix stored at float32, float16 or int8 precision.
+
+    Rows are L2-normalized before quantization, so the dot product with a
+    normalized query is the cosine similarity (up to quantization error).
+    """
+
+    BLOCK_ROWS = 16384
+
+    def __init__(self, precision: str = 'float32'):
+        """
+        Initialize an empty store.
+
+        Args:
+            precision: Storage precision ('float32', 'float16' or 'int8')
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision '{precision}', expected one of {PRECISIONS}")
+        self.precision = precision
+
+        # Buffers grow geometrically; only the first _size rows are valid
+        self._data: Optional[np.ndarray] = None
+        self._scales: Optional[np.ndarray] = None  # int8 only
+        self._size = 0
+        # Rows written to the buffer by any store sharing it (see copy)
+        self._filled = [0]
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def dim(self) -> int:
+        return self._data.shape[1] if self._data is not None else 0
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes used by the valid rows (excluding spare capacity)."""
+        if self._data is None:
+            return 0
+        row_bytes = self.dim * self._data.itemsize + (4 if self._scales is not None else 0)
+        return self._size * row_bytes
+
+    def _quantize(self, embeddings: np.ndarray) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+        """Convert normalized float32 rows to the storage precision."""
+        if self.precision == 'float32':
+            return embeddings, None
+        if self.precision == 'float16':
+            return embeddings.astype(np.float16), None
+
+        max_abs = np.abs(embeddings).max(axis=1)
+        scales = np.where(max_abs == 0, 1.0, max_abs / 127.0).astype(np.float32)
+        quantized = np.clip(np.rint(embeddings / scales[:, None]), -127, 127).astype(np.int8)
+        return quantized, scales
+
+    def append(self, embeddings: np.ndarray) -> range:
+        """
+        Normalize, quantize and append rows, doubling capacity when full.
+
+        Args:
+            embeddings: Embedding matrix (n x dim)
+
+        Returns:
+            Range of row ids assigned to the new rows
+        """
+        rows, scales = self._quantize(normalize_rows(np.asarray(embeddings, dtype=np.float32)))
+        start = self._size
+        needed = start + rows.shape[0]
+
+        if self._data is None:
+            self._data = np.empty((max(needed, 1024), rows.shape[1]), dtype=rows.dtype)
+            if scales is not None:
+                self._scales = np.empty(self._data.shape[0], dtype=np.float32)
+            self._filled = [0]
+        elif needed > self._data.shape[0] or not self._data.flags.writeable or self._filled[0] != start:
+            # Also reached when the buffer is a read-only memory map from a snapshot,
+            # or when a store sharing the buffer already wrote rows past ours
+            capacity = max(needed, 2 * self._data.shape[0])
+            data = np.empty((capacity, self._data.shape[1]), dtype=self._data.dtype)
+            data[:start] = self._data[:start]
+            self._data = data
+            if self._scales is not None:
+                grown = np.empty(capacity, dtype=np.float32)
+                grown[:start] = self._scales[:start]
+                self._scales = grown
+            self._filled = [start]
+
+        self._data[start:needed] = rows
+        if scales is not None:
+            self._scales[start:needed] = scales
+        self._size = needed
+        self._filled[0] = needed
+        return range(start, needed)
+
+    def get_rows(self, row_ids: np.ndarray) -> np.ndarray:
+        """Dequantized float32 rows."""
+        rows = self._data[row_ids].astype(np.float32)
+        if self._scales is not None:
+            rows *= self._scales[row_ids][:, None]
+        return rows
+
+    def score_rows(self, query: np.ndarray, row_ids: np.ndarray) -> np.ndarray:
+        """Dot products between one normalized query and selected rows."""
+        scores = self._data[row_ids].astype(np.float32) @ np.asarray(query, dtype=np.float32)
+        if self._scales is not None:
+            scores *= self._scales[row_ids]
+        return scores
+
+    def to_float32(self) -> np.ndarray:
+        """Dequantized copy of the whole matrix."""
+        return self.get_rows(np.arange(self._size))
+
+    def _score_block(self, start: int, end: int, queries: np.ndarray) -> np.ndarray:
+        """Scores of rows [start, end) against query matrix (dim x q)."""
+        block = self._data[start:end]
+        if self.precision == 'float32':
+            return block @ queries
+        scores = block.astype(np.float32) @ queries
+        if self._scales is not None:
+            scores *= self._scales[start:end, None]
+        return scores
+
+    def scores_batch(self,
+                     queries: np.ndarray,
+                     ranges: Optional[List[Tuple[int, int]]] = None) -> np.ndarray:
+        """
+        Dot products between normalized queries and the stored rows.
+
+        Args:
+            queries: Normalized query matrix (q x dim)
+            ranges: Optional row ranges [start, end); the result is laid out as
+                    their concatenation
+
+        Returns:
+            Score matrix (q x rows)
+        """
+        queries_t = np.ascontiguousarray(np.asarray(queries, dtype=np.float32).T)
+        if ranges is None:
+            ranges = [(0, self._size)]
+
+        parts = []
+        for start, end in ranges:
+            for block_start in range(start, end, self.BLOCK_ROWS):
+                parts.append(self._score_block(block_start, min(end, block_start + self.BLOCK_ROWS), queries_t))
+        if not parts:
+            return np.zeros((queries_t.shape[1], 0), dtype=np.float32)
+        return np.concatenate(parts, axis=0).T
+
+    def scores(self, query: np.ndarray, ranges: Optional[List[Tuple[int, int]]] = None) -> np.ndarray:
+        """Dot products between one normalized query vector and the stored rows."""
+        return self.scores_batch(query[None, :], ranges)[0]
+
+    def astype(self, precision: str) -> 'EmbeddingStore':
+        """Copy of this store converted to another precision."""
+        store = EmbeddingStore(precision)
+        if self._size:
+            store.append(self.to_float32())
+        return store
+
+    def copy(self) -> 'EmbeddingStore':
+        """
+        Copy that shares this store's rows.
+
+        Rows are never modified once written, so both stores can read the
+        shared buffer. The first of them to append writes into its spare
+        capacity; any other store sharing the buffer reallocates on its next
+        append instead of overwriting those rows. Appends to stores sharing
+        a buffer must not run concurrently.
+        """
+        store = EmbeddingStore(self.precision)
+        store._data = self._data
+        store._scales = self._scales
+        store._size = self._size
+        store._filled = self._filled
+        return store
+
+    def take(self, row_ids: np.ndarray) -> 'EmbeddingStore':
+        """Copy of the selected rows at the same precision (no re-quantization)."""
+        store = EmbeddingStore(self.precision)
+        if len(row_ids):
+            store._data = np.ascontiguousarray(self._data[row_ids])
+            if self._scales is not None:
+                store._scales = np.ascontiguousarray(self._scales[row_ids])
+            store._size = len(row_ids)
+            store._filled = [store._size]
+        return store
+
+    def to_arrays(self) -> Dict[str, np.ndarray]:
+        """Export valid rows (and int8 scales) for snapshotting; an empty store exports 0 x dim arrays."""
+        if self._data is None:
+            arrays = {'embeddings': np.empty((0, 0), dtype=STORAGE_DTYPES[self.precision])}
+            if self.precision == 'int8':
+                arrays['scales'] = np.empty(0, dtype=np.float32)
+            return arrays
+        arrays = {'embeddings': np.ascontiguousarray(self._data[:self._size])}
+        if self._scales is not None:
+            arrays['scales'] = np.ascontiguousarray(self._scales[:self._size])
+        return arrays
+
+    @classmethod
+    def from_arrays(cls, precision: str, embeddings: np.ndarray,
+                    scales: Optional[np.ndarray] = None) -> 'EmbeddingStore':
+        """Wrap arrays loaded from a snapshot (memory maps are copied on first append)."""
+        store = cls(precision)
+        if not embeddings.shape[0]:
+            return store  # the first append allocates with the right dimension
+        store._data = embeddings
+        store._scales = scales
+        store._size = embeddings.shape[0]
+        store._filled = [store._size]
+        return store
@@ -0,0 +1,336 @@
+"""
+On-disk index snapshots for the DoctorFollow Medical RAG System
+Lets MedicalRAG reload its search index after a restart without re-embedding
+
+Snapshot layout (one directory per snapshot):
+    manifest.json       Format version, document ranges, BM25 parameters
+    embeddings.npy      L2-normalized embedding matrix at its storage precision
+                        (loaded memory-mapped)
+    embedding_scales.npy  Per-row scales (int8 precision only)
+    chunks.bin          UTF-8 chunk texts concatenated into a single blob
+    chunk_offsets.npy   Byte offsets into chunks.bin (N + 1 entries)
+    chunk_pages.npy     Source page number per chunk (0 = unknown; optional)
+    bm25_vocab.txt      BM25 vocabulary, one term per line
+    bm25_postings.npz   BM25 inverted index (term-major CSR postings)
+    ann/                Optional ANN index (IVF lists or HNSW graph)
+    segments/<start>/   Chunks appended after the snapshot was written
+                        (append_snapshot): the embedding, chunk and BM25
+                        files above, restricted to chunks start and later
+
+append_snapshot writes only the appended chunks as a new segment (plus the
+ANN index and manifest), so saving after an ingestion costs time
+proportional to the new document. Every MAX_SEGMENTS appends the caller
+falls back to save_snapshot, which merges everything into one base again.
+"""
+import json
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+from ann_index import save_ann_index, load_ann_index
+from bm25_index import BM25Index
+from embedding_store import EmbeddingStore
+
+SNAPSHOT_VERSION = 6
+MAX_SEGMENTS = 8
+
+MANIFEST_FILE = "manifest.json"
+EMBEDDINGS_FILE = "embeddings.npy"
+EMBEDDING_SCALES_FILE = "embedding_scales.npy"
+CHUNKS_FILE = "chunks.bin"
+CHUNK_OFFSETS_FILE = "chunk_offsets.npy"
+CHUNK_PAGES_FILE = "chunk_pages.npy"
+BM25_VOCAB_FILE = "bm25_vocab.txt"
+BM25_POSTINGS_FILE = "bm25_postings.npz"
+ANN_DIR = "ann"
+SEGMENTS_DIR = "segments"
+
+
+def _encode_chunks(chunks: List[str]) -> tuple:
+    """Pack chunk texts into one UTF-8 blob plus byte offsets."""
+    encoded = [chunk.encode('utf-8') for chunk in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return b"".join(encoded), offsets
+
+
+def _decode_chunks(blob: bytes, offsets: np.ndarray) -> List[str]:
+    """Unpack chunk texts from a UTF-8 blob using byte offsets."""
+    bounds = offsets.tolist()
+    return [blob[bounds[i]:bounds[i + 1]].decode('utf-8') for i in range(len(bounds) - 1)]
+
+
+def _write_index_files(directory: Path,
+                       chunks: List[str],
+                       embedding_store: EmbeddingStore,
+                       bm25: BM25Index,
+                       page_numbers: Optional[List[int]],
+                       start: int = 0):
+    """Write embeddings, chunk texts, page numbers and BM25 postings of chunks start and later."""
+    # Embeddings: plain .npy so they can be memory-mapped on load
+    embedding_arrays = embedding_store.to_arrays()
+    np.save(directory / EMBEDDINGS_FILE, embedding_arrays['embeddings'][start:])
+    if 'scales' in embedding_arrays:
+        np.save(directory / EMBEDDING_SCALES_FILE, embedding_arrays['scales'][start:])
+
+    # Chunk texts: one blob + offsets instead of one JSON string per chunk
+    blob, offsets = _encode_chunks(chunks[start:])
+    (directory / CHUNKS_FILE).write_bytes(blob)
+    np.save(directory / CHUNK_OFFSETS_FILE, offsets)
+    if page_numbers is not None:
+        np.save(directory / CHUNK_PAGES_FILE, np.asarray(page_numbers[start:], dtype=np.int32))
+
+    # BM25 postings
+    vocab, arrays = bm25.to_arrays(first_doc=start)
+    (directory / BM25_VOCAB_FILE).write_text("\n".join(vocab), encoding='utf-8')
+    np.savez(directory / BM25_POSTINGS_FILE, **arrays)
+
+
+def _read_index_files(directory: Path, mmap: bool = True) -> Dict[str, any]:
+    """Read the files written by _write_index_files."""
+    scales_path = directory / EMBEDDING_SCALES_FILE
+    mmap_mode = 'r' if mmap else None
+    embeddings = np.load(directory / EMBEDDINGS_FILE, mmap_mode=mmap_mode)
+    scales = np.load(scales_path, mmap_mode=mmap_mode) if scales_path.exists() else None
+    chunks = _decode_chunks((directory / CHUNKS_FILE).read_bytes(),
+                            np.load(directory / CHUNK_OFFSETS_FILE))
+
+    pages_path = directory / CHUNK_PAGES_FILE
+    page_numbers = np.load(pages_path).tolist() if pages_path.exists() else None
+
+    vocab_text = (directory / BM25_VOCAB_FILE).read_text(encoding='utf-8')
+    vocab = vocab_text.split("\n") if vocab_text else []
+    with np.load(directory / BM25_POSTINGS_FILE) as postings:
+        arrays = {name: postings[name] for name in postings.files}
+
+    return {
+        'embeddings': embeddings,
+        'scales': scales,
+        'chunks': chunks,
+        'page_numbers': page_numbers,
+        'bm25_vocab': vocab,
+        'bm25_arrays': arrays,
+    }
+
+
+def _write_manifest(directory: Path, manifest: Dict[str, any]):
+    """Atomically replace the manifest."""
+    tmp_path = directory / f"{MANIFEST_FILE}.tmp-{os.getpid()}"
+    tmp_path.write_text(json.dumps(manifest, ensure_ascii=False, indent=2), encoding='utf-8')
+    os.replace(tmp_path, directory / MANIFEST_FILE)
+
+
+def save_snapshot(directory: str,
+                  chunks: List[str],
+                  embedding_store: EmbeddingStore,
+                  bm25: BM25Index,
+                  metadata: Optional[Dict[str, any]] = None,
+                  ann_index=None,
+                  page_numbers: Optional[List[int]] = None) -> Dict[str, any]:
+    """
+    Write a versioned index snapshot to disk.
+
+    The snapshot is written into a temporary sibling directory first and then
+    moved into place, so a crash mid-write never leaves a half-written index.
+
+    Args:
+        directory: Target snapshot directory
+        chunks: Chunk texts
+        embedding_store: Embedding matrix (num_chunks x dim)
+        bm25: BM25 index built over the same chunks
+        metadata: Extra fields stored in the manifest (e.g. documents)
+        ann_index: Optional ANN index over the embeddings
+        page_numbers: Optional source page number per chunk
+
+    Returns:
+        The manifest that was written
+    """
+    target = Path(directory)
+    tmp_dir = target.with_name(f"{target.name}.tmp-{os.getpid()}")
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    tmp_dir.mkdir(parents=True)
+
+    _write_index_files(tmp_dir, chunks, embedding_store, bm25, page_numbers)
+
+    if ann_index is not None:
+        save_ann_index(ann_index, tmp_dir / ANN_DIR)
+
+    manifest = {
+        'version': SNAPSHOT_VERSION,
+        'created_at': time.time(),
+        'total_chunks': len(chunks),
+        'embedding_shape': [len(embedding_store), embedding_store.dim],
+        'embedding_precision': embedding_store.precision,
+        'bm25': {
+            'k1': bm25.k1,
+            'b': bm25.b,
+            'num_documents': len(bm25),
+        },
+        'segments': [],
+        **(metadata or {}),
+    }
+    _write_manifest(tmp_dir, manifest)
+
+    # Swap the new snapshot into place
+    old_dir = target.with_name(f"{target.name}.old-{os.getpid()}")
+    if target.exists():
+        target.rename(old_dir)
+    tmp_dir.rename(target)
+    if old_dir.exists():
+        # The previous embeddings file may still be memory-mapped; that's fine on POSIX
+        shutil.rmtree(old_dir, ignore_errors=True)
+
+    return manifest
+
+
+def append_snapshot(directory: str,
+                    base_version: str,
+                    chunks: List[str],
+                    embedding_store: EmbeddingStore,
+                    bm25: BM25Index,
+                    metadata: Optional[Dict[str, any]] = None,
+                    ann_index=None,
+                    page_numbers: Optional[List[int]] = None) -> Optional[Dict[str, any]]:
+    """
+    Add the chunks appended since the snapshot was written as a new segment.
+
+    Only possible if the snapshot on disk holds exactly the corpus the new
+    chunks were appended to (its manifest 'corpus_version', written through
+    metadata, equals base_version) and fewer than MAX_SEGMENTS segments
+    exist. The segment is moved into place before the manifest that lists
+    it is replaced, so a crash leaves the previous snapshot readable.
+
+    Args:
+        directory: Snapshot directory
+        base_version: corpus_version of the corpus the chunks were appended to
+        chunks, embedding_store, bm25, metadata, ann_index, page_numbers:
+            As for save_snapshot, for the whole corpus
+
+    Returns:
+        The manifest that was written, or None if the caller has to write a
+        full snapshot with save_snapshot instead
+    """
+    path = Path(directory)
+    manifest_path = path / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    start = manifest.get('total_chunks', -1)
+    if (manifest.get('version') != SNAPSHOT_VERSION
+            or manifest.get('corpus_version') != base_version
+            or manifest.get('embedding_precision') != embedding_store.precision
+            or len(manifest.get('segments', [])) >= MAX_SEGMENTS
+            or not 0 < start <= len(chunks)):
+        return None
+
+    segment = f"{start:012d}"
+    segment_dir = path / SEGMENTS_DIR / segment
+    tmp_dir = path / SEGMENTS_DIR / f"{segment}.tmp-{os.getpid()}"
+    for stale in (segment_dir, tmp_dir):
+        if stale.exists():  # left behind by an append whose manifest was never written
+            shutil.rmtree(stale)
+    tmp_dir.mkdir(parents=True)
+    _write_index_files(tmp_dir, chunks, embedding_store, bm25, page_numbers, start=start)
+    tmp_dir.rename(segment_dir)
+
+    # The ANN index is rewritten whole; load falls back to rebuilding it if
+    # its size doesn't match the chunks
+    ann_dir = path / ANN_DIR
+    new_ann_dir = path / f"{ANN_DIR}.tmp-{os.getpid()}"
+    if new_ann_dir.exists():
+        shutil.rmtree(new_ann_dir)
+    if ann_index is not None:
+        save_ann_index(ann_index, new_ann_dir)
+    if ann_dir.exists():
+        shutil.rmtree(ann_dir)
+    if new_ann_dir.exists():
+        new_ann_dir.rename(ann_dir)
+
+    manifest.update({
+        'updated_at': time.time(),
+        'total_chunks': len(chunks),
+        'embedding_shape': [len(embedding_store), embedding_store.dim],
+        'segments': manifest.get('segments', []) + [segment],
+        **(metadata or {}),
+    })
+    manifest['bm25']['num_documents'] = len(bm25)
+    _write_manifest(path, manifest)
+    return manifest
+
+
+def load_snapshot(directory: str) -> Optional[Dict[str, any]]:
+    """
+    Load an index snapshot written by save_snapshot.
+
+    Embeddings are memory-mapped read-only, so load time does not depend on
+    corpus size (snapshots with segments concatenate them in memory instead,
+    until the next save_snapshot merges them). No embedding model is needed
+    to restore the index.
+
+    Args:
+        directory: Snapshot directory
+
+    Returns:
+        Dictionary with manifest, chunks, page_numbers, embedding_store,
+        bm25 and ann_index (optional parts are None if not persisted), or
+        None if no compatible snapshot exists
+    """
+    path = Path(directory)
+    manifest_path = path / MANIFEST_FILE
+    if not manifest_path.exists():
+        return None
+
+    manifest = json.loads(manifest_path.read_text(encoding='utf-8'))
+    if manifest.get('version') != SNAPSHOT_VERSION:
+        print(f"⚠️ Ignoring index snapshot with version {manifest.get('version')} "
+              f"(expected {SNAPSHOT_VERSION})")
+        return None
+
+    segments = manifest.get('segments', [])
+    parts = [_read_index_files(path, mmap=not segments)]
+    parts += [_read_index_files(path / SEGMENTS_DIR / segment, mmap=False)
+              for segment in segments]
+
+    embeddings = np.concatenate([part['embeddings'] for part in parts]) if segments else parts[0]['embeddings']
+    scales = None
+    if parts[0]['scales'] is not None:
+        scales = np.concatenate([part['scales'] for part in parts]) if segments else parts[0]['scales']
+    embedding_store = EmbeddingStore.from_arrays(manifest['embedding_precision'], embeddings, scales)
+
+    chunks = [chunk for part in parts for chunk in part['chunks']]
+    page_numbers = None
+    if all(part['page_numbers'] is not None for part in parts):
+        page_numbers = [page for part in parts for page in part['page_numbers']]
+
+    bm25 = BM25Index.from_arrays(parts[0]['bm25_vocab'], parts[0]['bm25_arrays'],
+                                 k1=manifest['bm25']['k1'],
+                                 b=manifest['bm25']['b'])
+    for part in parts[1:]:
+        bm25.append_arrays(part['bm25_vocab'], part['bm25_arrays'])
+
+    try:
+        ann_index = load_ann_index(path / ANN_DIR)
+    except ImportError as e:
+        print(f"⚠️ Skipping persisted ANN index: {e}")
+        ann_index = None
+
+    if page_numbers is not None and len(page_numbers) != len(chunks):
+        page_numbers = None
+
+    if len(chunks) != len(embedding_store) or len(chunks) != len(bm25):
+        print("⚠️ Ignoring inconsistent index snapshot")
+        return None
+
+    return {
+        'manifest': manifest,
+        'chunks': chunks,
+        'page_numbers': page_numbers,
+        'embedding_store': embedding_store,
+        'bm25': bm25,
+        'ann_index': ann_index,
+    }
@@ -0,0 +1,263 @@
+"""
+Streaming ingestion pipeline for the DoctorFollow Medical RAG System
+Extract → clean → chunk runs in a background thread and hands chunk batches
+to the embedding stage through a bounded queue
+
+Stages:
+    iter_pages        PDF pages, sharded over a process pool (pdf_extraction)
+    iter_chunk_pages  Incremental clean_text + chunking with page numbers
+    batch_chunks      Fixed-size chunk batches for the embedding model
+    prefetch          Background thread + bounded queue between the stages
+                      above and the caller, which embeds and indexes batches
+
+Every stage is a generator, so memory is bounded by the queue size and the
+batch size rather than by the document size.
+
+IngestionJobQueue runs whole ingestions on a background worker so uploads
+return a job id immediately instead of blocking the UI.
+"""
+import queue
+import threading
+import time
+import uuid
+from typing import Callable, Dict, Iterable, Iterator, List, Tuple, Optional
+
+from pdf_extraction import iter_pages
+from utils import iter_chunk_pages
+
+# Sentinel marking the end of a prefetched stream
+_DONE = object()
+
+
+def batch_chunks(chunks: Iterable[Tuple[str, int]],
+                 batch_size: int) -> Iterator[Tuple[List[str], List[int]]]:
+    """
+    Group (chunk, page_number) pairs into batches.
+
+    Args:
+        chunks: (chunk, page_number) pairs
+        batch_size: Chunks per batch (the last batch may be smaller)
+
+    Yields:
+        (chunks, page_numbers) lists of at most batch_size items
+    """
+    texts, page_numbers = [], []
+    for chunk, page_number in chunks:
+        texts.append(chunk)
+        page_numbers.append(page_number)
+        if len(texts) >= batch_size:
+            yield texts, page_numbers
+            texts, page_numbers = [], []
+    if texts:
+        yield texts, page_numbers
+
+
+def prefetch(iterable: Iterable, maxsize: int) -> Iterator:
+    """
+    Run an iterable in a background thread, buffering at most maxsize items.
+
+    The producer blocks once the queue is full, so it never runs more than
+    maxsize items ahead of the consumer. Exceptions raised by the producer are
+    re-raised in the consumer. Closing the returned generator stops the
+    producer and closes the source iterator.
+
+    Args:
+        iterable: Source items
+        maxsize: Queue capacity
+
+    Yields:
+        Items of the source iterable, in order
+    """
+    items = queue.Queue(maxsize=maxsize)
+    stop = threading.Event()
+
+    def put(item) -> bool:
+        while not stop.is_set():
+            try:
+                items.put(item, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def produce():
+        iterator = iter(iterable)
+        error = None
+        try:
+            for item in iterator:
+                if not put((item, None)):
+                    return
+        except BaseException as e:
+            error = e
+        finally:
+            close = getattr(iterator, 'close', None)
+            if close is not None:
+                close()
+        put((_DONE, error))
+
+    thread = threading.Thread(target=produce, name='ingest-prefetch', daemon=True)
+    thread.start()
+    try:
+        while True:
+            item, error = items.get()
+            if item is _DONE:
+                if error is not None:
+                    raise error
+                return
+            yield item
+    finally:
+        stop.set()
+
+
+def _count_pages_read(pages: Iterable[str], stats: dict) -> Iterator[str]:
+    """Pass pages through, counting them in stats['pages'] and stats['characters']."""
+    stats.setdefault('pages', 0)
+    stats.setdefault('characters', 0)
+    for page in pages:
+        stats['pages'] += 1
+        stats['characters'] += len(page)
+        yield page
+
+
+def iter_chunk_batches(pdf_path: str,
+                       batch_size: int = 64,
+                       queue_size: int = 4,
+                       max_workers: Optional[int] = None,
+                       size: int = 500,
+                       overlap: int = 50,
+                       stats: Optional[dict] = None) -> Iterator[Tuple[List[str], List[int]]]:
+    """
+    Stream a PDF as batches of cleaned chunks with their page numbers.
+
+    Extraction, cleaning and chunking run ahead of the caller in a background
+    thread, at most queue_size batches ahead.
+
+    Args:
+        pdf_path: Path to PDF file
+        batch_size: Chunks per batch
+        queue_size: Batches buffered between chunking and the caller
+        max_workers: PDF extraction worker processes (default: CPU count)
+        size: Target chunk size in characters
+        overlap: Overlap between chunks in characters
+        stats: Optional dict updated with pages and characters extracted so far
+
+    Returns:
+        Iterator of (chunks, page_numbers) with 1-based page numbers
+    """
+    pages = iter_pages(pdf_path, max_workers)
+    if stats is not None:
+        pages = _count_pages_read(pages, stats)
+    chunks = iter_chunk_pages(pages, size=size, overlap=overlap)
+    return prefetch(batch_chunks(chunks, batch_size), maxsize=queue_size)
+
+
+class IngestionJobQueue:
+    """
+    Background ingestion worker with a FIFO job queue.
+
+    Jobs run one at a time on a single daemon thread, so concurrent uploads
+    are serialized. Each job gets an id whose status can be polled while the
+    caller (e.g. a Gradio event) returns immediately.
+
+    Job status record:
+        job_id, pdf_path, status ('queued', 'running', 'done' or 'failed'),
+        progress (latest progress update), result, error, submitted_at,
+        started_at, finished_at
+    """
+
+    MAX_FINISHED_JOBS = 100  # finished job records kept for polling
+
+    def __init__(self, ingest_stream: Callable[[str], Iterator[Dict[str, any]]]):
+        """
+        Initialize an idle job queue.
+
+        Args:
+            ingest_stream: Streaming ingestion function (e.g. MedicalRAG.ingest_pdf_stream)
+                           yielding progress updates and a final update with 'done': True
+        """
+        self._ingest_stream = ingest_stream
+        self._queue = queue.Queue()
+        self._jobs: Dict[str, Dict[str, any]] = {}
+        self._lock = threading.Lock()
+        self._worker: Optional[threading.Thread] = None
+
+    def submit(self, pdf_path: str) -> str:
+        """
+        Queue a PDF for ingestion.
+
+        Args:
+            pdf_path: Path to PDF file (must stay readable until the job runs)
+
+        Returns:
+            Job id
+        """
+        job_id = uuid.uuid4().hex
+        with self._lock:
+            self._jobs[job_id] = {
+                'job_id': job_id,
+                'pdf_path': pdf_path,
+                'status': 'queued',
+                'progress': None,
+                'result': None,
+                'error': None,
+                'submitted_at': time.time(),
+                'started_at': None,
+                'finished_at': None,
+            }
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, name='ingest-worker', daemon=True)
+                self._worker.start()
+        self._queue.put(job_id)
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Dict[str, any]]:
+        """Snapshot of a job's status record, or None for unknown ids."""
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return dict(job) if job is not None else None
+
+    def jobs(self) -> List[Dict[str, any]]:
+        """Status records of all known jobs, oldest first."""
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+
+    @property
+    def pending(self) -> int:
+        """Number of queued or running jobs."""
+        with self._lock:
+            return sum(job['status'] in ('queued', 'running') for job in self._jobs.values())
+
+    def _update(self, job_id: str, **fields):
+        with self._lock:
+            self._jobs[job_id].update(fields)
+
+    def _run(self):
+        """Worker loop: run queued jobs one after another."""
+        while True:
+            job_id = self._queue.get()
+            self._update(job_id, status='running', started_at=time.time())
+            try:
+                update = None
+                for update in self._ingest_stream(self.get(job_id)['pdf_path']):
+                    if update['done']:
+                        break
+                    self._update(job_id, progress=update)
+                result = {key: value for key, value in (update or {}).items() if key != 'done'}
+                if update is None or not update['done']:
+                    self._update(job_id, status='failed', error='Ingestion finished without a result')
+                elif 'error' in result:
+                    self._update(job_id, status='failed', error=result['error'], result=result)
+                else:
+                    self._update(job_id, status='done', result=result)
+            except Exception as e:
+                self._update(job_id, status='failed', error=str(e))
+            self._update(job_id, finished_at=time.time())
+            self._prune_finished()
+
+    def _prune_finished(self):
+        """Forget the oldest finished jobs beyond MAX_FINISHED_JOBS."""
+        with self._lock:
+            finished = [job_id for job_id, job in self._jobs.items()
+                        if job['status'] in ('done', 'failed')]
+            for job_id in finished[:max(0, len(finished) - self.MAX_FINISHED_JOBS)]:
+                del self._jobs[job_id]
@@ -0,0 +1,108 @@
+"""
+PDF text extraction for the DoctorFollow Medical RAG System
+Extracts per-page text, sharding page ranges over a process pool for large PDFs
+
+Each worker opens the PDF itself and extracts a contiguous page range, so only
+file paths and page texts cross process boundaries. Shards are reassembled in
+page order. iter_pages streams pages with a bounded number of shards in flight,
+so a long document is never held in memory at once.
+
+Workers are spawned, not forked: extraction runs from ingestion threads of a
+process that already has model, server and SQLite threads, and forking a
+multi-threaded process can deadlock the children. Spawned workers re-import
+the main module, so entry points must not do heavy setup at import time
+(app.py builds its UI and loads the RAG system only under __main__), and the
+worker function lives here, in a module that only imports PyPDF2.
+"""
+import multiprocessing
+import os
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import List, Tuple, Optional, Iterator
+
+import PyPDF2
+
+# Below this many pages the process pool start-up costs more than it saves
+MIN_PARALLEL_PAGES = 32
+# Shards per worker: small enough to balance uneven pages, large enough to
+# amortize re-opening the PDF in each task
+SHARDS_PER_WORKER = 4
+# Shards extracted ahead of the consumer, per worker
+PREFETCH_SHARDS_PER_WORKER = 2
+
+
+def _iter_page_range(pdf_path: str, start: int, end: int) -> Iterator[str]:
+    """Yield text of pages [start, end); failed pages yield an empty string."""
+    with open(pdf_path, 'rb') as file:
+        pdf_reader = PyPDF2.PdfReader(file)
+        for page_num in range(start, end):
+            try:
+                yield pdf_reader.pages[page_num].extract_text() or ""
+            except Exception as e:
+                print(f"⚠️ Warning: Could not extract page {page_num}: {e}")
+                yield ""
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> List[str]:
+    """Extract text of pages [start, end) (process pool task)."""
+    return list(_iter_page_range(pdf_path, start, end))
+
+
+def _page_shards(num_pages: int, num_workers: int) -> List[Tuple[int, int]]:
+    """Split [0, num_pages) into contiguous ranges, a few per worker."""
+    shard_size = max(1, -(-num_pages // (num_workers * SHARDS_PER_WORKER)))
+    return [(start, min(start + shard_size, num_pages)) for start in range(0, num_pages, shard_size)]
+
+
+def count_pages(pdf_path: str) -> int:
+    """Number of pages in a PDF."""
+    with open(pdf_path, 'rb') as file:
+        return len(PyPDF2.PdfReader(file).pages)
+
+
+def extract_pages(pdf_path: str, max_workers: Optional[int] = None) -> List[str]:
+    """
+    Extract the text of every page of a PDF.
+
+    Args:
+        pdf_path: Path to PDF file
+        max_workers: Worker processes (default: CPU count; 1 = serial)
+
+    Returns:
+        List of page texts in page order (empty string for pages without text)
+    """
+    return list(iter_pages(pdf_path, max_workers))
+
+
+def iter_pages(pdf_path: str, max_workers: Optional[int] = None) -> Iterator[str]:
+    """
+    Yield the text of every page of a PDF in page order.
+
+    Args:
+        pdf_path: Path to PDF file
+        max_workers: Worker processes (default: CPU count; 1 = serial)
+
+    Yields:
+        Page texts (empty string for pages without text)
+    """
+    num_pages = count_pages(pdf_path)
+    num_workers = min(max_workers or os.cpu_count() or 1, num_pages)
+
+    if num_workers <= 1 or num_pages < MIN_PARALLEL_PAGES:
+        yield from _iter_page_range(pdf_path, 0, num_pages)
+        return
+
+    shards = iter(_page_shards(num_pages, num_workers))
+    with ProcessPoolExecutor(max_workers=num_workers, mp_context=multiprocessing.get_context("spawn")) as executor:
+        # Futures are consumed in submission order, i.e. page order; at most
+        # a few shards per worker are extracted ahead of the consumer
+        window = num_workers * PREFETCH_SHARDS_PER_WORKER
+        in_flight = deque(executor.submit(_extract_page_range, pdf_path, start, end)
+                          for start, end in islice(shards, window))
+        while in_flight:
+            shard_pages = in_flight.popleft().result()
+            shard = next(shards, None)
+            if shard is not None:
+                in_flight.append(executor.submit(_extract_page_range, pdf_path, *shard))
+            yield from shard_pages
@@ -4,25 +4,28 @@ Hybrid search with BM25 + Semantic search + AWS Bedrock
 """
 import os
 import json
-from typing import List, Tuple, Dict, Optional
+import asyncio
+import threading
+from typing import List, Tuple, Dict, Optional, Iterator, AsyncIterator
 from pathlib import Path
 
 import boto3
 from sentence_transformers import SentenceTransformer
-from rank_bm25 import BM25Okapi
-import PyPDF2
 import numpy as np
 
 from utils import (
-    clean_text,
-    chunk_text,
-    cosine_similarity,
+    normalize_query,
     rrf_fusion,
     extract_citations,
     validate_citations,
     format_sources_with_citations,
     create_citation_prompt_instruction,
 )
+from index_snapshot import save_snapshot, append_snapshot, load_snapshot
+from pdf_extraction import count_pages
+from ingestion import iter_chunk_batches, IngestionJobQueue
+from corpus import Corpus
+from cache import LRUCache, ResponseCache, EmbeddingCache
 
 
 class MedicalRAG:
@@ -31,19 +34,52 @@ class MedicalRAG:
 
     Features:
     - Hybrid search (BM25 + Semantic)
+    - Multi-document corpus with per-document search filters
     - Conversational memory
     - Citation tracking
     - AWS Bedrock LLM integration
+    - On-disk index snapshots (restarts skip re-embedding)
+    - Background ingestion jobs (queries are served from the previous index
+      until a new document is fully indexed, then the index is swapped in)
     """
 
-    def __init__(self):
-        """Initialize the RAG system with embeddings model and AWS Bedrock."""
+    EMBEDDING_MODEL_NAME = 'intfloat/e5-small-v2'
+    QUERY_CACHE_SIZE = 1024
+    QUERY_CACHE_TTL = 3600  # seconds
+    RESPONSE_CACHE_SIZE = 512
+    RESPONSE_CACHE_TTL = 7 * 24 * 3600  # seconds
+    INGEST_BATCH_SIZE = 64  # chunks embedded and indexed per step
+    INGEST_QUEUE_SIZE = 4  # chunk batches prepared ahead of the embedding model
+    LLM_MODEL_ID = "meta.llama3-1-8b-instruct-v1:0"  # Free tier
+    EMPTY_CORPUS_RESULT = {
+        'answer': 'Lütfen önce bir PDF yükleyin.',
+        'sources': [],
+        'citations_valid': False
+    }
+
+    def __init__(self,
+                 index_dir: Optional[str] = None,
+                 embedding_precision: Optional[str] = None,
+                 ann_backend: Optional[str] = None,
+                 ann_params: Optional[Dict[str, any]] = None):
+        """
+        Initialize the RAG system with embeddings model and AWS Bedrock.
+
+        Args:
+            index_dir: Directory for the on-disk index snapshot
+                       (default: RAG_INDEX_DIR env var or ./index_data)
+            embedding_precision: Embedding storage precision: float32, float16 or int8
+                                 (default: RAG_EMBEDDING_PRECISION env var or float32)
+            ann_backend: Approximate nearest neighbour index: 'ivf', 'hnsw' or 'none'
+                         (default: RAG_ANN_BACKEND env var or exact search)
+            ann_params: ANN parameters (e.g. {'nprobe': 16} or {'ef_search': 128})
+        """
         print("🔧 Initializing Medical RAG System...")
 
         # Load sentence transformer for embeddings
         # e5-small-v2 works well for Turkish and is lightweight
         print("📦 Loading embedding model (e5-small-v2)...")
-        self.embeddings_model = SentenceTransformer('intfloat/e5-small-v2')
+        self.embeddings_model = SentenceTransformer(self.EMBEDDING_MODEL_NAME)
         print("✓ Embedding model loaded")
 
         # Initialize AWS Bedrock client
@@ -58,11 +94,34 @@ class MedicalRAG:
             print(f"⚠️ AWS Bedrock connection warning: {e}")
             self.bedrock_client = None
 
-        # Document storage
-        self.chunks: List[str] = []
-        self.embeddings: Optional[np.ndarray] = None
-        self.bm25: Optional[BM25Okapi] = None
-        self.document_name: str = ""
+        # Document storage (append-only, many documents)
+        self.embedding_precision = embedding_precision or os.getenv('RAG_EMBEDDING_PRECISION', 'float32')
+        ann_backend = ann_backend or os.getenv('RAG_ANN_BACKEND', 'none')
+        self.corpus = Corpus(
+            precision=self.embedding_precision,
+            ann_backend=None if ann_backend == 'none' else ann_backend,
+            ann_params=ann_params
+        )
+
+        # Repeated questions skip the transformer forward pass
+        self.query_embedding_cache = LRUCache(maxsize=self.QUERY_CACHE_SIZE, ttl=self.QUERY_CACHE_TTL)
+
+        # Generated answers (memory LRU + optional SQLite file from RAG_RESPONSE_CACHE_DB)
+        self.response_cache = ResponseCache(
+            maxsize=self.RESPONSE_CACHE_SIZE,
+            ttl=self.RESPONSE_CACHE_TTL,
+            db_path=os.getenv('RAG_RESPONSE_CACHE_DB')
+        )
+
+        # Passage embeddings by content hash: re-uploads only embed changed chunks
+        # (RAG_EMBEDDING_CACHE_DB='' disables the cache)
+        embedding_cache_db = os.getenv('RAG_EMBEDDING_CACHE_DB', 'cache_data/embedding_cache.sqlite')
+        self.embedding_cache = EmbeddingCache(embedding_cache_db) if embedding_cache_db else None
+
+        # Writers (ingestion, removal) stage changes on a copy of the corpus and
+        # swap it in when done; the lock serializes writers, readers never wait
+        self._corpus_write_lock = threading.Lock()
+        self.ingestion_jobs = IngestionJobQueue(self.ingest_pdf_stream)
 
         # Stats
         self.stats = {
@@ -71,11 +130,81 @@ class MedicalRAG:
             'avg_response_time': 0.0
         }
 
+        # Restore the previous index if one was saved
+        self.index_dir = index_dir or os.getenv('RAG_INDEX_DIR', 'index_data')
+        self._load_index_snapshot()
+        self.response_cache.invalidate(self.corpus.version)
+
         print("✓ Medical RAG System initialized\n")
 
+    def _load_index_snapshot(self) -> bool:
+        """Restore chunks, embeddings and BM25 from the on-disk snapshot."""
+        try:
+            snapshot = load_snapshot(self.index_dir)
+        except Exception as e:
+            print(f"⚠️ Could not load index snapshot: {e}")
+            return False
+
+        if snapshot is None:
+            return False
+
+        if snapshot['manifest'].get('embedding_model') != self.EMBEDDING_MODEL_NAME:
+            print("⚠️ Index snapshot was built with a different embedding model, ignoring it")
+            return False
+
+        self.corpus.restore(
+            documents=snapshot['manifest'].get('documents', []),
+            chunks=snapshot['chunks'],
+            embedding_store=snapshot['embedding_store'],
+            bm25=snapshot['bm25'],
+            ann_index=snapshot['ann_index'],
+            version=snapshot['manifest'].get('corpus_version'),
+            page_numbers=snapshot['page_numbers']
+        )
+        self.stats['total_chunks'] = self.corpus.live_chunks
+        print(f"✓ Restored index snapshot: {len(self.corpus.documents)} documents, "
+              f"{self.corpus.live_chunks} chunks")
+        return True
+
+    def _save_index_snapshot(self, appended_to: Optional[Corpus] = None):
+        """
+        Persist the current index so the next restart can skip re-embedding.
+
+        Args:
+            appended_to: Corpus the current one was staged from by appending
+                         chunks; if the snapshot on disk holds it, only the
+                         appended chunks are written
+        """
+        corpus = self.corpus
+        snapshot_args = dict(
+            chunks=corpus.chunks,
+            embedding_store=corpus.embedding_store,
+            bm25=corpus.bm25,
+            metadata={
+                'documents': corpus.documents,
+                'embedding_model': self.EMBEDDING_MODEL_NAME,
+                'ann_backend': corpus.ann_backend,
+                'corpus_version': corpus.version,
+            },
+            ann_index=corpus.ann_index,
+            page_numbers=corpus.page_numbers
+        )
+        try:
+            manifest = None
+            if appended_to is not None:
+                manifest = append_snapshot(self.index_dir, appended_to.version, **snapshot_args)
+            if manifest is None:
+                save_snapshot(self.index_dir, **snapshot_args)
+            print(f"✓ Index snapshot saved to {self.index_dir}")
+        except Exception as e:
+            print(f"⚠️ Could not save index snapshot: {e}")
+
     def ingest_pdf(self, pdf_path: str) -> Dict[str, any]:
         """
-        Extract text from PDF, chunk it, create embeddings, and index.
+        Extract text from PDF, chunk it, create embeddings, and add it to the corpus.
+
+        Previously indexed documents stay searchable; only the new document's
+        chunks are embedded and indexed.
 
         Args:
             pdf_path: Path to PDF file
@@ -83,134 +212,353 @@ class MedicalRAG:
         Returns:
             Dictionary with ingestion statistics
         """
+        update = None
+        for update in self.ingest_pdf_stream(pdf_path):
+            if update['done']:
+                break
+        if update is None or not update['done']:
+            return {'error': 'Ingestion finished without a result'}
+        update.pop('done')
+        return update
+
+    def ingest_pdf_stream(self, pdf_path: str) -> Iterator[Dict[str, any]]:
+        """
+        Streaming ingestion: extract → clean → chunk → embed → index in batches.
+
+        Pages are extracted and chunked in a background thread while the
+        embedding model works on earlier batches (bounded queue in between).
+        Batches are indexed into a staged copy of the corpus, which replaces
+        the live corpus in one assignment once the whole document is indexed,
+        so queries keep using the previous index meanwhile. The copy shares
+        the existing chunks' embeddings and postings, and the snapshot only
+        gains a segment for the new chunks, so ingestion cost doesn't grow
+        with the size of the corpus. Concurrent
+        ingestions are serialized. If ingestion fails, the live corpus is
+        left untouched.
+
+        Args:
+            pdf_path: Path to PDF file
+
+        Yields:
+            Progress updates {'pages_done', 'total_pages', 'chunks_indexed',
+            'done': False} after each batch, then the ingest_pdf() result with
+            'done': True
+        """
         print(f"📄 Processing PDF: {pdf_path}")
 
-        # Extract text from PDF
+        with self._corpus_write_lock:
+            yield from self._ingest_pdf_locked(pdf_path)
+
+    def _ingest_pdf_locked(self, pdf_path: str) -> Iterator[Dict[str, any]]:
+        """ingest_pdf_stream body; the caller holds the corpus write lock."""
+        document_name = Path(pdf_path).name
+        if self.corpus.has_document(document_name):
+            yield {'error': f'{document_name} zaten indekslenmiş (already indexed)', 'done': True}
+            return
+
         try:
-            text = self._extract_pdf_text(pdf_path)
-            print(f"✓ Extracted {len(text)} characters")
+            total_pages = count_pages(pdf_path)
         except Exception as e:
-            return {'error': f'PDF extraction failed: {str(e)}'}
+            yield {'error': f'PDF extraction failed: {str(e)}', 'done': True}
+            return
+
+        extracted = {'pages': 0, 'characters': 0}
+        batches = iter_chunk_batches(
+            pdf_path,
+            batch_size=self.INGEST_BATCH_SIZE,
+            queue_size=self.INGEST_QUEUE_SIZE,
+            max_workers=self._pdf_workers(),
+            stats=extracted
+        )
 
-        # Clean text
-        text = clean_text(text)
-        print(f"✓ Cleaned text")
+        print(f"🧮 Embedding and indexing {total_pages} pages in batches of {self.INGEST_BATCH_SIZE} chunks...")
+        staged = self.corpus.copy()
+        document = None
+        embedding_dimensions = 0
+        embedding_cache_hits = 0
+        stage = 'PDF extraction'
+        try:
+            for chunks, page_numbers in batches:
+                stage = 'Embedding creation'
+                embeddings, hits = self._embed_passages(chunks)
+                embedding_cache_hits += hits
+                embedding_dimensions = embeddings.shape[1]
+
+                # Append to the staged corpus (extends BM25 postings and embedding matrix in place)
+                stage = 'Indexing'
+                if document is None:
+                    document = staged.add_document(document_name, chunks, embeddings, page_numbers)
+                else:
+                    staged.extend_document(document_name, chunks, embeddings, page_numbers)
+                stage = 'PDF extraction'
+
+                chunks_indexed = document['end'] - document['start']
+                print(f"✓ Indexed {chunks_indexed} chunks (page {page_numbers[-1]}/{total_pages})")
+                yield {
+                    'document_name': document_name,
+                    'pages_done': page_numbers[-1],
+                    'total_pages': total_pages,
+                    'chunks_indexed': chunks_indexed,
+                    'done': False
+                }
+        except Exception as e:
+            yield {'error': f'{stage} failed: {str(e)}', 'done': True}
+            return
+        finally:
+            batches.close()
+
+        if document is None:
+            yield {'error': 'No text chunks created from PDF', 'done': True}
+            return
+
+        total_chunks = document['end'] - document['start']
+        print(f"✓ Extracted {extracted['characters']} characters from {extracted['pages']} pages, "
+              f"indexed chunks {document['start']}-{document['end'] - 1} "
+              f"({embedding_cache_hits}/{total_chunks} embeddings from cache)")
+
+        # Swap the new index in and persist it so restarts don't need to re-embed
+        previous = self.corpus
+        self._swap_corpus(staged)
+        self._save_index_snapshot(appended_to=previous)
+
+        yield {
+            'success': True,
+            'document_name': document_name,
+            'total_chunks': total_chunks,
+            'total_pages': extracted['pages'],
+            'total_characters': extracted['characters'],
+            'embedding_dimensions': embedding_dimensions,
+            'embedding_cache_hits': embedding_cache_hits,
+            'embedding_cache_hit_ratio': round(embedding_cache_hits / total_chunks, 3),
+            'total_documents': len(self.corpus.documents),
+            'corpus_chunks': self.corpus.live_chunks,
+            'done': True
+        }
 
-        # Chunk text
-        self.chunks = chunk_text(text, size=500, overlap=50)
-        self.stats['total_chunks'] = len(self.chunks)
-        print(f"✓ Created {len(self.chunks)} chunks")
+    def remove_document(self, document_name: str) -> bool:
+        """
+        Remove a document from the search index.
 
-        if not self.chunks:
-            return {'error': 'No text chunks created from PDF'}
+        Args:
+            document_name: Name of an indexed document
 
-        # Create embeddings
-        print(f"🧮 Creating embeddings for {len(self.chunks)} chunks...")
-        try:
-            # e5 models need "query: " or "passage: " prefix
-            passages = [f"passage: {chunk}" for chunk in self.chunks]
-            self.embeddings = self.embeddings_model.encode(
-                passages,
-                show_progress_bar=True,
-                convert_to_numpy=True
-            )
-            print(f"✓ Embeddings created: {self.embeddings.shape}")
-        except Exception as e:
-            return {'error': f'Embedding creation failed: {str(e)}'}
+        Returns:
+            True if the document was removed
+        """
+        with self._corpus_write_lock:
+            if not self.corpus.has_document(document_name):
+                return False
+            staged = self.corpus.copy()
+            staged.remove_document(document_name)
+            staged.compact()  # the snapshot never keeps removed chunks
+            self._swap_corpus(staged)
+            self._save_index_snapshot()
+        print(f"✓ Removed {document_name} from index")
+        return True
+
+    def _swap_corpus(self, corpus: Corpus):
+        """
+        Make a staged corpus live.
 
-        # Create BM25 index
-        print("🔍 Creating BM25 index...")
-        tokenized_chunks = [chunk.lower().split() for chunk in self.chunks]
-        self.bm25 = BM25Okapi(tokenized_chunks)
-        print("✓ BM25 index created")
+        Chunk ids may change between corpus versions (removals compact the
+        corpus); a query that started on the previous corpus keeps resolving
+        its results against that corpus.
+        """
+        self.corpus = corpus
+        self.stats['total_chunks'] = corpus.live_chunks
+        self.response_cache.invalidate(corpus.version)
 
-        # Store document name
-        self.document_name = Path(pdf_path).name
+    def submit_pdf(self, pdf_path: str) -> str:
+        """
+        Queue a PDF for background ingestion.
 
-        return {
-            'success': True,
-            'document_name': self.document_name,
-            'total_chunks': len(self.chunks),
-            'total_characters': len(text),
-            'embedding_dimensions': self.embeddings.shape[1] if self.embeddings is not None else 0
-        }
+        Args:
+            pdf_path: Path to PDF file
 
-    def _extract_pdf_text(self, pdf_path: str) -> str:
-        """Extract text from PDF file."""
-        text = ""
-        with open(pdf_path, 'rb') as file:
-            pdf_reader = PyPDF2.PdfReader(file)
-            for page_num, page in enumerate(pdf_reader.pages):
-                try:
-                    page_text = page.extract_text()
-                    if page_text:
-                        text += page_text + "\n"
-                except Exception as e:
-                    print(f"⚠️ Warning: Could not extract page {page_num}: {e}")
-                    continue
-        return text
+        Returns:
+            Job id to poll with get_ingestion_job
+        """
+        job_id = self.ingestion_jobs.submit(pdf_path)
+        print(f"📥 Queued {Path(pdf_path).name} for ingestion (job {job_id})")
+        return job_id
 
-    def hybrid_search(self, query: str, top_k: int = 5) -> List[Tuple[int, str]]:
+    def get_ingestion_job(self, job_id: str) -> Optional[Dict[str, any]]:
+        """Status of a background ingestion job (None for unknown ids)."""
+        return self.ingestion_jobs.get(job_id)
+
+    def _embed_passages(self, chunks: List[str]) -> Tuple[np.ndarray, int]:
+        """
+        Embed chunk texts, reusing cached embeddings of identical chunks.
+
+        Returns:
+            (embeddings, number of chunks served from the embedding cache)
+        """
+        # e5 models need "query: " or "passage: " prefix
+        if self.embedding_cache is None:
+            embeddings = self.embeddings_model.encode(
+                [f"passage: {chunk}" for chunk in chunks],
+                convert_to_numpy=True
+            )
+            return embeddings, 0
+        return self.embedding_cache.encode(
+            self.embeddings_model, self.EMBEDDING_MODEL_NAME, chunks, prefix="passage: "
+        )
+
+    def _pdf_workers(self) -> Optional[int]:
+        """PDF extraction worker processes (RAG_PDF_WORKERS, default CPU count)."""
+        workers = os.getenv('RAG_PDF_WORKERS')
+        return int(workers) if workers else None
+
+    def _encode_query(self, query: str) -> np.ndarray:
+        """
+        Embed a search query, reusing cached embeddings for repeated queries.
+
+        The cache key is the model name plus the query with whitespace
+        collapsed and lowercased (the e5 tokenizer is uncased).
+        """
+        return self._encode_queries([query])[0]
+
+    def _encode_queries(self, queries: List[str]) -> np.ndarray:
+        """Embed many queries; cache misses are encoded together in one call."""
+        keys = [(self.EMBEDDING_MODEL_NAME, normalize_query(query)) for query in queries]
+        embeddings = [self.query_embedding_cache.get(key) for key in keys]
+
+        missing = [i for i, embedding in enumerate(embeddings) if embedding is None]
+        if missing:
+            encoded = self.embeddings_model.encode(
+                [f"query: {queries[i]}" for i in missing],
+                convert_to_numpy=True,
+                normalize_embeddings=True
+            )
+            for i, embedding in zip(missing, encoded):
+                embedding.setflags(write=False)  # shared between requests
+                self.query_embedding_cache.put(keys[i], embedding)
+                embeddings[i] = embedding
+
+        return np.stack(embeddings)
+
+    def hybrid_search(self,
+                      query: str,
+                      top_k: int = 5,
+                      documents: Optional[List[str]] = None,
+                      corpus: Optional[Corpus] = None) -> List[Tuple[int, str]]:
         """
         Perform hybrid search using BM25 + Semantic search with RRF fusion.
 
         Args:
             query: Search query
             top_k: Number of results to return
+            documents: Optional document names to restrict the search to
+            corpus: Corpus to search (default: the live corpus); chunk ids in
+                    the results refer to this corpus
 
         Returns:
             List of (index, chunk) tuples
         """
-        if not self.chunks or self.embeddings is None or self.bm25 is None:
+        if corpus is None:
+            corpus = self.corpus  # stays consistent if an ingestion swaps in a new index
+        if not len(corpus):
             return []
 
-        # BM25 search
-        tokenized_query = query.lower().split()
-        bm25_scores = self.bm25.get_scores(tokenized_query)
-        bm25_top_indices = np.argsort(bm25_scores)[::-1][:top_k * 2]
-        bm25_results = [(idx, float(bm25_scores[idx])) for idx in bm25_top_indices]
+        # BM25 search (top-k with MaxScore pruning over postings lists)
+        # Only chunks inside the selected (or still indexed) documents' ranges are scored
+        bm25_results = corpus.bm25_search(query, top_k * 2, documents)
 
         # Semantic search
-        query_embedding = self.embeddings_model.encode(
-            f"query: {query}",
-            convert_to_numpy=True
-        )
+        query_embedding = self._encode_query(query)
 
-        # Calculate cosine similarities
-        similarities = np.dot(self.embeddings, query_embedding) / (
-            np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_embedding)
-        )
-        semantic_top_indices = np.argsort(similarities)[::-1][:top_k * 2]
-        semantic_results = [(idx, float(similarities[idx])) for idx in semantic_top_indices]
+        # Cosine similarity: stored embeddings are unit-length, so one dot product suffices.
+        # Uses the ANN index (if configured) for unfiltered searches, exact scan otherwise
+        semantic_results = corpus.semantic_search(query_embedding, top_k * 2, documents)
 
-        # RRF Fusion
-        fused_results = rrf_fusion(bm25_results, semantic_results)
+        return self._fuse_results(corpus, bm25_results, semantic_results, top_k)
 
-        # Return top_k results with chunks
-        results = []
-        for idx, score in fused_results[:top_k]:
-            results.append((idx, self.chunks[idx]))
+    def search_batch(self,
+                     queries: List[str],
+                     top_k: int = 5,
+                     documents: Optional[List[str]] = None) -> List[List[Tuple[int, str]]]:
+        """
+        Hybrid search for many queries (offline evaluation, bulk workloads).
 
-        return results
+        All queries are embedded in one encode call and scored against the
+        embedding matrix with one matrix-matrix product; BM25 runs per query.
 
-    def generate_answer(self,
-                       query: str,
-                       context_chunks: List[str],
-                       conversation_history: List[Dict] = None) -> str:
+        Args:
+            queries: Search queries
+            top_k: Number of results to return per query
+            documents: Optional document names to restrict the search to
+
+        Returns:
+            One list of (index, chunk) tuples per query, in input order
         """
-        Generate answer using AWS Bedrock with citations.
+        corpus = self.corpus
+        if not queries or not len(corpus):
+            return [[] for _ in queries]
+
+        query_embeddings = self._encode_queries(queries)
+        semantic_results = corpus.semantic_search_batch(query_embeddings, top_k * 2, documents)
+
+        return [
+            self._fuse_results(corpus, corpus.bm25_search(query, top_k * 2, documents), semantic, top_k)
+            for query, semantic in zip(queries, semantic_results)
+        ]
+
+    async def ahybrid_search(self,
+                             query: str,
+                             top_k: int = 5,
+                             documents: Optional[List[str]] = None,
+                             corpus: Optional[Corpus] = None) -> List[Tuple[int, str]]:
+        """
+        Async hybrid search: BM25 scoring and query encoding run concurrently
+        in the event loop's thread pool.
 
         Args:
-            query: User query
-            context_chunks: Retrieved context chunks
-            conversation_history: Previous conversation turns
+            query: Search query
+            top_k: Number of results to return
+            documents: Optional document names to restrict the search to
+            corpus: Corpus to search (default: the live corpus)
 
         Returns:
-            Generated answer with citations
+            List of (index, chunk) tuples
         """
-        if not self.bedrock_client:
-            return "⚠️ AWS Bedrock bağlantısı mevcut değil. Lütfen AWS kimlik bilgilerinizi kontrol edin."
+        if corpus is None:
+            corpus = self.corpus
+        if not len(corpus):
+            return []
 
+        loop = asyncio.get_running_loop()
+        bm25_future = loop.run_in_executor(None, corpus.bm25_search, query, top_k * 2, documents)
+        query_embedding = await loop.run_in_executor(None, self._encode_query, query)
+
+        # Semantic scoring can start as soon as the embedding is ready, while BM25 may still run
+        semantic_results = await loop.run_in_executor(
+            None, corpus.semantic_search, query_embedding, top_k * 2, documents
+        )
+        bm25_results = await bm25_future
+
+        return self._fuse_results(corpus, bm25_results, semantic_results, top_k)
+
+    def _fuse_results(self,
+                      corpus: Corpus,
+                      bm25_results: List[Tuple[int, float]],
+                      semantic_results: List[Tuple[int, float]],
+                      top_k: int) -> List[Tuple[int, str]]:
+        """RRF-fuse both rankings and attach chunk texts (from the searched corpus) to the top_k results."""
+        # RRF Fusion
+        fused_results = rrf_fusion(bm25_results, semantic_results)
+
+        # Return top_k results with chunks
+        results = []
+        for idx, score in fused_results[:top_k]:
+            results.append((idx, corpus.chunks[idx]))
+
+        return results
+
+    def _build_prompt(self,
+                      query: str,
+                      context_chunks: List[str],
+                      conversation_history: List[Dict] = None) -> str:
+        """Build the Llama prompt with numbered sources, recent history and citation rules."""
         # Prepare context with source numbers
         context_text = ""
         for i, chunk in enumerate(context_chunks, 1):
@@ -225,7 +573,7 @@ class MedicalRAG:
         # Create prompt with citation instructions
         citation_instruction = create_citation_prompt_instruction()
 
-        prompt = f"""Sen DoctorFollow tıbbi asistan sistemisin. Sağlık profesyonellerine Türkçe tıbbi dokümanlarda arama yaparken yardımcı oluyorsun.
+        return f"""Sen DoctorFollow tıbbi asistan sistemisin. Sağlık profesyonellerine Türkçe tıbbi dokümanlarda arama yaparken yardımcı oluyorsun.
 
 {citation_instruction}
 
@@ -239,18 +587,40 @@ Kullanıcı Sorusu: {query}
 
 Cevap (kaynaklarla):"""
 
+    def _llm_request_body(self, prompt: str) -> str:
+        """Bedrock request body for Llama 3.1."""
+        return json.dumps({
+            "prompt": prompt,
+            "max_gen_len": 512,
+            "temperature": 0.3,  # Lower temperature for factual medical info
+            "top_p": 0.9,
+        })
+
+    def generate_answer(self,
+                       query: str,
+                       context_chunks: List[str],
+                       conversation_history: List[Dict] = None) -> str:
+        """
+        Generate answer using AWS Bedrock with citations.
+
+        Args:
+            query: User query
+            context_chunks: Retrieved context chunks
+            conversation_history: Previous conversation turns
+
+        Returns:
+            Generated answer with citations
+        """
+        if not self.bedrock_client:
+            return "⚠️ AWS Bedrock bağlantısı mevcut değil. Lütfen AWS kimlik bilgilerinizi kontrol edin."
+
+        prompt = self._build_prompt(query, context_chunks, conversation_history)
+
         # Call AWS Bedrock (Llama 3.1 8B)
         try:
-            request_body = {
-                "prompt": prompt,
-                "max_gen_len": 512,
-                "temperature": 0.3,  # Lower temperature for factual medical info
-                "top_p": 0.9,
-            }
-
             response = self.bedrock_client.invoke_model(
-                modelId="meta.llama3-1-8b-instruct-v1:0",  # Free tier
-                body=json.dumps(request_body)
+                modelId=self.LLM_MODEL_ID,
+                body=self._llm_request_body(prompt)
             )
 
             response_body = json.loads(response['body'].read())
@@ -261,42 +631,127 @@ Cevap (kaynaklarla):"""
         except Exception as e:
             return f"⚠️ LLM hatası: {str(e)}"
 
-    def ask(self, query: str, conversation_history: List[Dict] = None) -> Dict[str, any]:
+    def generate_answer_stream(self,
+                               query: str,
+                               context_chunks: List[str],
+                               conversation_history: List[Dict] = None) -> Iterator[str]:
         """
-        Main RAG pipeline: search + generate with citations.
+        Generate answer using AWS Bedrock, yielding text as it is produced.
 
         Args:
             query: User query
+            context_chunks: Retrieved context chunks
             conversation_history: Previous conversation turns
 
+        Yields:
+            Text fragments of the answer (an error message replaces the rest
+            of the answer if the stream fails)
+        """
+        if not self.bedrock_client:
+            yield "⚠️ AWS Bedrock bağlantısı mevcut değil. Lütfen AWS kimlik bilgilerinizi kontrol edin."
+            return
+
+        prompt = self._build_prompt(query, context_chunks, conversation_history)
+
+        try:
+            response = self.bedrock_client.invoke_model_with_response_stream(
+                modelId=self.LLM_MODEL_ID,
+                body=self._llm_request_body(prompt)
+            )
+
+            for event in response['body']:
+                chunk = event.get('chunk')
+                if not chunk:
+                    continue
+                text = json.loads(chunk['bytes']).get('generation', '')
+                if text:
+                    yield text
+
+        except Exception as e:
+            yield f"\n\n⚠️ LLM hatası: {str(e)}"
+
+    def _retrieve_context(self,
+                          query: str,
+                          conversation_history: List[Dict] = None,
+                          documents: Optional[List[str]] = None) -> Dict[str, any]:
+        """
+        Retrieval half of the RAG pipeline, shared by ask and ask_stream.
+
         Returns:
-            Dictionary with answer, sources, and metadata
+            Either {'result': <final response>} when there is nothing to
+            generate, or the context chunks plus the response cache lookup
         """
-        if not self.chunks:
-            return {
-                'answer': 'Lütfen önce bir PDF yükleyin.',
-                'sources': [],
-                'citations_valid': False
-            }
+        corpus = self.corpus  # search, sources and cache key all come from one corpus version
+        if not len(corpus):
+            return {'result': dict(self.EMPTY_CORPUS_RESULT)}
 
         # Increment query count
         self.stats['total_queries'] += 1
 
         # Hybrid search
-        search_results = self.hybrid_search(query, top_k=5)
+        search_results = self.hybrid_search(query, top_k=5, documents=documents, corpus=corpus)
+        return self._context_from_results(corpus, query, conversation_history, search_results)
+
+    async def _aretrieve_context(self,
+                                 query: str,
+                                 conversation_history: List[Dict] = None,
+                                 documents: Optional[List[str]] = None) -> Dict[str, any]:
+        """Async variant of _retrieve_context (uses ahybrid_search)."""
+        corpus = self.corpus
+        if not len(corpus):
+            return {'result': dict(self.EMPTY_CORPUS_RESULT)}
+
+        self.stats['total_queries'] += 1
+
+        search_results = await self.ahybrid_search(query, top_k=5, documents=documents, corpus=corpus)
+        return self._context_from_results(corpus, query, conversation_history, search_results)
+
+    def _context_from_results(self,
+                              corpus: Corpus,
+                              query: str,
+                              conversation_history: Optional[List[Dict]],
+                              search_results: List[Tuple[int, str]]) -> Dict[str, any]:
+        """Turn search results from corpus into prompt context and look up the response cache."""
         context_chunks = [chunk for idx, chunk in search_results]
+        page_numbers = [corpus.page_numbers[idx] for idx, chunk in search_results]
 
         if not context_chunks:
-            return {
+            return {'result': {
                 'answer': 'Bu konuda kaynaklarda ilgili bilgi bulunamadı.',
                 'sources': [],
                 'citations_valid': False
-            }
-
-        # Generate answer
-        answer = self.generate_answer(query, context_chunks, conversation_history)
+            }}
+
+        # Answers are reused if the same question was answered from the same sources
+        history = [  # only the turns (and fields) that end up in the prompt
+            {'user': turn['user'], 'assistant': turn['assistant']}
+            for turn in (conversation_history or [])[-3:]
+        ]
+        cache_key = ResponseCache.make_key(
+            normalize_query(query),
+            corpus.version,
+            [idx for idx, chunk in search_results],
+            history
+        )
+        return {
+            'context_chunks': context_chunks,
+            'page_numbers': page_numbers,
+            'cache_key': cache_key,
+            'corpus_version': corpus.version,
+            'cached_answer': self.response_cache.get(cache_key),
+        }
 
-        # Extract and validate citations
+    def _finalize_answer(self,
+                         answer: str,
+                         context: Dict[str, any],
+                         cached: bool) -> Dict[str, any]:
+        """Cache a fresh answer and attach citations and formatted sources."""
+        context_chunks = context['context_chunks']
+        if not cached and not answer.startswith("⚠️") and "\n\n⚠️ LLM hatası" not in answer:
+            # never cache connection/LLM errors
+            self.response_cache.put(context['cache_key'], answer, context['corpus_version'])
+
+        # Extract and validate citations (re-checked on cache hits against the current sources)
         citation_ids = extract_citations(answer)
         validation = validate_citations(answer, len(context_chunks))
 
@@ -304,25 +759,164 @@ Cevap (kaynaklarla):"""
         sources_formatted = format_sources_with_citations(
             context_chunks,
             citation_ids=citation_ids,
-            max_display=5
+            max_display=5,
+            page_numbers=context['page_numbers']
         )
 
         return {
             'answer': answer,
             'sources': context_chunks,
+            'source_pages': context['page_numbers'],
             'sources_formatted': sources_formatted,
             'citation_ids': citation_ids,
             'citations_valid': validation['is_valid'],
-            'validation_message': validation['message']
+            'validation_message': validation['message'],
+            'cached': cached
         }
 
+    def ask(self,
+            query: str,
+            conversation_history: List[Dict] = None,
+            documents: Optional[List[str]] = None) -> Dict[str, any]:
+        """
+        Main RAG pipeline: search + generate with citations.
+
+        Args:
+            query: User query
+            conversation_history: Previous conversation turns
+            documents: Optional document names to restrict the search to
+
+        Returns:
+            Dictionary with answer, sources, and metadata
+        """
+        context = self._retrieve_context(query, conversation_history, documents)
+        if 'result' in context:
+            return context['result']
+
+        # Generate answer
+        answer = context['cached_answer']
+        cached = answer is not None
+        if not cached:
+            answer = self.generate_answer(query, context['context_chunks'], conversation_history)
+
+        return self._finalize_answer(answer, context, cached)
+
+    def ask_stream(self,
+                   query: str,
+                   conversation_history: List[Dict] = None,
+                   documents: Optional[List[str]] = None) -> Iterator[Dict[str, any]]:
+        """
+        Streaming RAG pipeline: search, then yield the answer as it is generated.
+
+        Args:
+            query: User query
+            conversation_history: Previous conversation turns
+            documents: Optional document names to restrict the search to
+
+        Yields:
+            Partial updates {'answer', 'citation_ids', 'done': False} while
+            generating, then the full ask() result with 'done': True
+        """
+        context = self._retrieve_context(query, conversation_history, documents)
+        if 'result' in context:
+            yield {**context['result'], 'done': True}
+            return
+
+        answer = context['cached_answer']
+        cached = answer is not None
+        if not cached:
+            answer = ""
+            for text in self.generate_answer_stream(query, context['context_chunks'], conversation_history):
+                answer += text
+                yield {
+                    'answer': answer,
+                    'citation_ids': extract_citations(answer),
+                    'done': False
+                }
+            answer = answer.strip()
+
+        yield {**self._finalize_answer(answer, context, cached), 'done': True}
+
+    async def aask(self,
+                   query: str,
+                   conversation_history: List[Dict] = None,
+                   documents: Optional[List[str]] = None) -> Dict[str, any]:
+        """
+        Async RAG pipeline; the blocking Bedrock call runs in a worker thread
+        so the event loop keeps serving other requests.
+
+        Args:
+            query: User query
+            conversation_history: Previous conversation turns
+            documents: Optional document names to restrict the search to
+
+        Returns:
+            Dictionary with answer, sources, and metadata (same as ask)
+        """
+        context = await self._aretrieve_context(query, conversation_history, documents)
+        if 'result' in context:
+            return context['result']
+
+        answer = context['cached_answer']
+        cached = answer is not None
+        if not cached:
+            answer = await asyncio.to_thread(
+                self.generate_answer, query, context['context_chunks'], conversation_history
+            )
+
+        return self._finalize_answer(answer, context, cached)
+
+    async def aask_stream(self,
+                          query: str,
+                          conversation_history: List[Dict] = None,
+                          documents: Optional[List[str]] = None) -> AsyncIterator[Dict[str, any]]:
+        """
+        Async variant of ask_stream; each read from the Bedrock stream runs
+        in a worker thread.
+
+        Yields:
+            Same updates as ask_stream
+        """
+        context = await self._aretrieve_context(query, conversation_history, documents)
+        if 'result' in context:
+            yield {**context['result'], 'done': True}
+            return
+
+        answer = context['cached_answer']
+        cached = answer is not None
+        if not cached:
+            answer = ""
+            fragments = self.generate_answer_stream(query, context['context_chunks'], conversation_history)
+            while True:
+                text = await asyncio.to_thread(next, fragments, None)
+                if text is None:
+                    break
+                answer += text
+                yield {
+                    'answer': answer,
+                    'citation_ids': extract_citations(answer),
+                    'done': False
+                }
+            answer = answer.strip()
+
+        yield {**self._finalize_answer(answer, context, cached), 'done': True}
+
     def get_stats(self) -> Dict[str, any]:
         """Return system statistics."""
+        corpus = self.corpus
         return {
-            'document_name': self.document_name,
+            'documents': corpus.document_names,
+            'total_documents': len(corpus.documents),
             'total_chunks': self.stats['total_chunks'],
+            'embedding_precision': corpus.embedding_store.precision,
+            'embedding_memory_mb': round(corpus.embedding_store.nbytes / 1024 ** 2, 2),
+            'ann_backend': corpus.ann_backend or 'exact',
+            'query_embedding_cache': self.query_embedding_cache.stats(),
+            'response_cache': self.response_cache.stats(),
+            'embedding_cache': self.embedding_cache.stats() if self.embedding_cache is not None else None,
             'total_queries': self.stats['total_queries'],
-            'indexed': len(self.chunks) > 0
+            'pending_ingestion_jobs': self.ingestion_jobs.pending,
+            'indexed': len(corpus) > 0
         }
 
 
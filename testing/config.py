@@ -28,6 +28,14 @@ class Settings(BaseSettings):
     POSTGRES_USER: str = "doctor"
     POSTGRES_PASSWORD: str = "follow123"
     PGVECTOR_TABLE: str = "embeddings"
+    PGVECTOR_INDEX_TYPE: str = "hnsw"  # "hnsw" or "ivfflat" (lists sized from row count)
+    HNSW_M: int = 16
+    HNSW_EF_CONSTRUCTION: int = 64
+    HNSW_EF_SEARCH: int = 40  # Per-query recall/latency trade-off
+    IVFFLAT_PROBES: Optional[int] = None  # None = sqrt(lists)
+    PGVECTOR_QUANTIZATION: str = "none"  # "none", "halfvec" or "binary" (index only, re-ranked at float32)
+    PGVECTOR_RERANK_FACTOR: int = 4  # Quantized candidates per result
+    PGVECTOR_EXACT_SEARCH_THRESHOLD: int = 10_000  # Filtered search: exact up to this many rows per document
 
     # Neo4j
     NEO4J_URI: str = "bolt://localhost:7687"
@@ -45,6 +53,7 @@ class Settings(BaseSettings):
     # Iteration 2+: Multilingual for Turkish → English
     EMBEDDING_MODEL: str = "intfloat/multilingual-e5-small"
     EMBEDDING_DIMENSION: int = 384  # multilingual-e5-small dimension
+    EMBEDDING_CACHE_DB: Optional[str] = str(PROJECT_ROOT / "cache_data" / "embedding_cache.sqlite")
 
     # Chunking parameters
     CHUNK_SIZE: int = 400
@@ -55,6 +64,7 @@ class Settings(BaseSettings):
     TOP_K_PGVECTOR: int = 10
     TOP_K_FINAL: int = 5  # After RRF fusion
     RRF_K: int = 60  # RRF constant
+    RETRIEVAL_TIMEOUT_SECONDS: float = 5.0  # Per-retriever timeout (BM25 / semantic)
 
     # LLM parameters
     LLM_TEMPERATURE: float = 0.2  # Low for medical accuracy
@@ -149,24 +149,13 @@ class OpenSearchStore:
             "index_name": self.index_name
         }
 
-    def search(
+    def _build_query_body(
         self,
         query: str,
-        top_k: int = 10,
+        top_k: int,
         filters: Optional[Dict[str, Any]] = None
-    ) -> List[SearchResult]:
-        """
-        BM25 search in OpenSearch
-
-        Args:
-            query: Search query (Turkish or English)
-            top_k: Number of results to return
-            filters: Optional filters (e.g., {"page_number": 5})
-
-        Returns:
-            List of SearchResult objects sorted by BM25 score
-        """
-        # Build query
+    ) -> Dict[str, Any]:
+        """Build the BM25 query body shared by search and search_batch"""
         query_body = {
             "size": top_k,
             "query": {
@@ -201,13 +190,10 @@ class OpenSearchStore:
                     {"term": {key: value}}
                 )
 
-        # Execute search
-        response = self.client.search(
-            index=self.index_name,
-            body=query_body
-        )
+        return query_body
 
-        # Parse results
+    def _parse_hits(self, response: Dict[str, Any]) -> List[SearchResult]:
+        """Convert an OpenSearch search response into SearchResult objects"""
         results = []
         for hit in response['hits']['hits']:
             source = hit['_source']
@@ -222,6 +208,74 @@ class OpenSearchStore:
 
         return results
 
+    def search(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[SearchResult]:
+        """
+        BM25 search in OpenSearch
+
+        Args:
+            query: Search query (Turkish or English)
+            top_k: Number of results to return
+            filters: Optional filters (e.g., {"page_number": 5})
+
+        Returns:
+            List of SearchResult objects sorted by BM25 score
+        """
+        # Build query
+        query_body = self._build_query_body(query, top_k, filters)
+
+        # Execute search
+        response = self.client.search(
+            index=self.index_name,
+            body=query_body
+        )
+
+        # Parse results
+        return self._parse_hits(response)
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[List[SearchResult]]:
+        """
+        BM25 search for many queries in one _msearch round trip
+
+        Args:
+            queries: Search queries (Turkish or English)
+            top_k: Number of results to return per query
+            filters: Optional filters applied to every query
+
+        Returns:
+            One list of SearchResult objects per query, in input order
+            (empty for queries that failed)
+        """
+        if not queries:
+            return []
+
+        # _msearch body: header line + query line per search
+        body = []
+        for query in queries:
+            body.append({"index": self.index_name})
+            body.append(self._build_query_body(query, top_k, filters))
+
+        response = self.client.msearch(body=body)
+
+        results = []
+        for query, item in zip(queries, response['responses']):
+            if 'error' in item:
+                print(f"[WARN] Search failed for query '{query}': {item['error']}")
+                results.append([])
+            else:
+                results.append(self._parse_hits(item))
+
+        return results
+
     def get_stats(self) -> Dict[str, Any]:
         """Get index statistics"""
         if not self.client.indices.exists(index=self.index_name):
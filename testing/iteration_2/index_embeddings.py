@@ -54,7 +54,16 @@ def main():
         connection_string=settings.get_postgres_url(),
         table_name=settings.PGVECTOR_TABLE,
         embedding_model=settings.EMBEDDING_MODEL,
-        embedding_dimension=settings.EMBEDDING_DIMENSION
+        embedding_dimension=settings.EMBEDDING_DIMENSION,
+        embedding_cache_path=settings.EMBEDDING_CACHE_DB,
+        index_type=settings.PGVECTOR_INDEX_TYPE,
+        hnsw_m=settings.HNSW_M,
+        hnsw_ef_construction=settings.HNSW_EF_CONSTRUCTION,
+        ef_search=settings.HNSW_EF_SEARCH,
+        ivfflat_probes=settings.IVFFLAT_PROBES,
+        quantization=settings.PGVECTOR_QUANTIZATION,
+        rerank_factor=settings.PGVECTOR_RERANK_FACTOR,
+        exact_search_threshold=settings.PGVECTOR_EXACT_SEARCH_THRESHOLD
     )
     print()
 
@@ -0,0 +1,286 @@
+"""
+PostgreSQL connection pooling for DoctorFollow Medical Search Agent
+Iteration 2: Concurrency-safe pgvector access
+
+Implements a threaded psycopg2 pool with per-request checkout (blocking
+when saturated, health-checked, broken connections replaced) and an
+optional async pool on psycopg 3 for event-loop callers
+"""
+import asyncio
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Any, Iterator, Optional
+
+import psycopg2
+from psycopg2 import extensions
+from psycopg2.pool import ThreadedConnectionPool
+from pgvector.psycopg2 import register_vector
+
+
+class _PooledConnection(extensions.connection):
+    """psycopg2 connection carrying pool bookkeeping"""
+    vector_registered = False
+    last_used: Optional[float] = None
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.prepared_statements = set()  # names PREPAREd on this session
+
+
+try:  # Optional: async variant (pip install "psycopg[binary]" psycopg-pool)
+    from psycopg_pool import AsyncConnectionPool
+    from pgvector.psycopg import register_vector_async
+except ImportError:
+    AsyncConnectionPool = None
+    register_vector_async = None
+
+
+class PgConnectionPool:
+    """
+    Thread-safe psycopg2 connection pool
+
+    Features:
+    - Per-request checkout: `with pool.connection() as conn:`
+    - Blocks (up to checkout_timeout) instead of failing when all connections are busy
+    - Read-only autocommit sessions for searches, transactional sessions for writes
+    - Health check of idle connections and replacement of broken ones
+    - Saturation metrics (in use, waits, wait time, reconnects)
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        checkout_timeout: float = 30.0,
+        health_check_after: float = 30.0
+    ):
+        """
+        Initialize the pool
+
+        Args:
+            connection_string: PostgreSQL connection string
+            min_size: Connections opened up front and kept open while idle
+                      (psycopg2 closes connections returned beyond this)
+            max_size: Maximum concurrent connections
+            checkout_timeout: Seconds to wait for a free connection
+            health_check_after: Idle seconds after which a connection is
+                                pinged (SELECT 1) before being handed out
+        """
+        self.max_size = max_size
+        self.checkout_timeout = checkout_timeout
+        self.health_check_after = health_check_after
+
+        self._pool = ThreadedConnectionPool(
+            min_size, max_size, connection_string, connection_factory=_PooledConnection
+        )
+        self._slots = threading.BoundedSemaphore(max_size)
+        self._lock = threading.Lock()
+
+        self._metrics = {
+            "checkouts": 0,
+            "in_use": 0,
+            "peak_in_use": 0,
+            "waits": 0,
+            "wait_seconds": 0.0,
+            "timeouts": 0,
+            "reconnects": 0,
+            "errors": 0,
+        }
+
+    @contextmanager
+    def connection(self, readonly: bool = False, transaction: Optional[bool] = None) -> Iterator[Any]:
+        """
+        Check out a connection for one request
+
+        Read-only checkouts run in autocommit mode with a read-only session.
+        Write checkouts run in a transaction that is committed on success and
+        rolled back on error.
+
+        Args:
+            readonly: Whether the request only reads
+            transaction: Run in a transaction (default: only for writes); a
+                         read-only transaction scopes SET LOCAL settings to
+                         one request
+
+        Yields:
+            psycopg2 connection (returned to the pool afterwards)
+        """
+        if transaction is None:
+            transaction = not readonly
+        conn = self._checkout()
+        broken = False
+        try:
+            self._configure(conn, readonly, autocommit=not transaction)
+            yield conn
+            if not conn.autocommit:
+                conn.commit()
+        except (psycopg2.OperationalError, psycopg2.InterfaceError):
+            broken = True
+            self._count("errors")
+            raise
+        except Exception:
+            self._count("errors")
+            if not conn.closed and not conn.autocommit:
+                conn.rollback()
+            raise
+        finally:
+            self._checkin(conn, close=broken or bool(conn.closed))
+
+    def _checkout(self):
+        """Take a healthy connection, waiting for a free slot if the pool is saturated"""
+        start = time.perf_counter()
+        if not self._slots.acquire(blocking=False):
+            self._count("waits")
+            if not self._slots.acquire(timeout=self.checkout_timeout):
+                self._count("timeouts")
+                raise TimeoutError(f"No database connection free within {self.checkout_timeout}s")
+        waited = time.perf_counter() - start
+
+        try:
+            conn = self._pool.getconn()
+            if not self._is_healthy(conn):
+                self._pool.putconn(conn, close=True)
+                self._count("reconnects")
+                conn = self._pool.getconn()
+            if not conn.vector_registered:
+                register_vector(conn)
+                conn.vector_registered = True
+        except Exception:
+            self._slots.release()
+            raise
+
+        with self._lock:
+            self._metrics["checkouts"] += 1
+            self._metrics["wait_seconds"] += waited
+            self._metrics["in_use"] += 1
+            self._metrics["peak_in_use"] = max(self._metrics["peak_in_use"], self._metrics["in_use"])
+        return conn
+
+    def _checkin(self, conn, close: bool = False):
+        """Return a connection to the pool (closing it if it is broken)"""
+        conn.last_used = time.monotonic()
+        with self._lock:
+            self._metrics["in_use"] -= 1
+        try:
+            self._pool.putconn(conn, close=close)
+        finally:
+            self._slots.release()
+
+    def _is_healthy(self, conn) -> bool:
+        """Check a pooled connection before handing it out"""
+        if conn.closed:
+            return False
+        status = conn.info.transaction_status
+        if status == extensions.TRANSACTION_STATUS_UNKNOWN:
+            return False
+        if status != extensions.TRANSACTION_STATUS_IDLE:
+            # Left inside a (possibly aborted) transaction
+            try:
+                conn.rollback()
+            except psycopg2.Error:
+                return False
+
+        # Fresh or recently used connections skip the ping
+        if conn.last_used is None or time.monotonic() - conn.last_used < self.health_check_after:
+            return True
+        try:
+            autocommit = conn.autocommit
+            conn.autocommit = True
+            with conn.cursor() as cur:
+                cur.execute("SELECT 1")
+            conn.autocommit = autocommit
+            return True
+        except psycopg2.Error:
+            return False
+
+    @staticmethod
+    def _configure(conn, readonly: bool, autocommit: bool):
+        """Switch session mode only when it differs (each switch costs a round trip)"""
+        if conn.readonly != readonly or conn.autocommit != autocommit:
+            conn.set_session(readonly=readonly, autocommit=autocommit)
+
+    def _count(self, metric: str):
+        with self._lock:
+            self._metrics[metric] += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """Pool size and saturation metrics"""
+        with self._lock:
+            stats = dict(self._metrics)
+        stats["max_size"] = self.max_size
+        stats["saturation"] = round(stats["in_use"] / self.max_size, 3)
+        stats["wait_seconds"] = round(stats["wait_seconds"], 3)
+        return stats
+
+    def close(self):
+        """Close all pooled connections"""
+        self._pool.closeall()
+
+
+class AsyncPgConnectionPool:
+    """
+    Async read-only connection pool on psycopg 3 (optional dependency)
+
+    Connections are opened lazily on first use, configured for read-only
+    autocommit with the vector type registered, and health-checked by
+    psycopg_pool on checkout.
+    """
+
+    def __init__(
+        self,
+        connection_string: str,
+        min_size: int = 1,
+        max_size: int = 10,
+        checkout_timeout: float = 30.0
+    ):
+        """
+        Initialize the pool (no connections are opened yet)
+
+        Args:
+            connection_string: PostgreSQL connection string
+            min_size: Connections kept open
+            max_size: Maximum concurrent connections
+            checkout_timeout: Seconds to wait for a free connection
+        """
+        if AsyncConnectionPool is None:
+            raise ImportError('Async pool requires psycopg 3: pip install "psycopg[binary]" psycopg-pool')
+        self._pool = AsyncConnectionPool(
+            connection_string,
+            min_size=min_size,
+            max_size=max_size,
+            timeout=checkout_timeout,
+            open=False,
+            configure=self._configure,
+            check=AsyncConnectionPool.check_connection,
+        )
+        self._open_lock = asyncio.Lock()
+        self._opened = False
+
+    @staticmethod
+    async def _configure(conn):
+        await register_vector_async(conn)
+        await conn.set_autocommit(True)
+        await conn.set_read_only(True)
+
+    def connection(self):
+        """Async context manager checking out a read-only connection"""
+        return self._pool.connection()
+
+    async def open(self):
+        """Open the pool (idempotent)"""
+        async with self._open_lock:
+            if not self._opened:
+                await self._pool.open()
+                self._opened = True
+
+    def stats(self) -> Optional[Dict[str, Any]]:
+        """psycopg_pool counters (pool_size, pool_available, requests_waiting, ...)"""
+        return self._pool.get_stats() if self._opened else None
+
+    async def close(self):
+        """Close all pooled connections"""
+        if self._opened:
+            await self._pool.close()
+            self._opened = False
@@ -5,14 +5,91 @@ Iteration 2: Semantic vector search with multilingual embeddings
 Implements pgvector retrieval for cross-lingual semantic search
 Uses intfloat/multilingual-e5-large for Turkish ↔ English bridging
 """
+import asyncio
+import hashlib
+import io
+import json
+import math
+import struct
+import sys
+import time
+from pathlib import Path
 from typing import List, Dict, Any, Optional
-import psycopg2
-from psycopg2.extras import execute_values
-from pgvector.psycopg2 import register_vector
 from dataclasses import dataclass
 import numpy as np
 from sentence_transformers import SentenceTransformer
 
+# Shared with the demo app: content-hash embedding cache (repository root)
+sys.path.append(str(Path(__file__).parent.parent.parent))
+from cache import EmbeddingCache
+from pg_pool import PgConnectionPool, AsyncPgConnectionPool
+
+# Columns written by the bulk loader, in COPY order
+COPY_COLUMNS = ("chunk_id", "text", "embedding", "page_number", "paragraph_id",
+                "document_name", "chunk_index", "metadata", "content_hash")
+
+# PostgreSQL binary COPY framing
+_COPY_HEADER = b"PGCOPY\n\xff\r\n\x00" + struct.pack(">ii", 0, 0)
+_COPY_TRAILER = struct.pack(">h", -1)
+_NULL_FIELD = struct.pack(">i", -1)
+_JSONB_VERSION = b"\x01"
+
+
+def _text_field(value: Optional[str]) -> bytes:
+    """Binary COPY field for text/varchar/char columns"""
+    if value is None:
+        return _NULL_FIELD
+    data = str(value).encode("utf-8")
+    return struct.pack(">i", len(data)) + data
+
+
+def _int_field(value: Optional[int]) -> bytes:
+    """Binary COPY field for integer columns"""
+    if value is None:
+        return _NULL_FIELD
+    return struct.pack(">ii", 4, int(value))
+
+
+def encode_copy_binary(rows: List[tuple], embeddings: np.ndarray) -> bytes:
+    """
+    Encode rows for COPY ... FROM STDIN (FORMAT binary)
+
+    Vectors are written straight from one big-endian float32 NumPy buffer in
+    pgvector's binary layout (int16 dim, int16 unused, float4[dim]), so no
+    per-dimension Python float formatting happens.
+
+    Args:
+        rows: (chunk_id, text, page_number, paragraph_id, document_name,
+              chunk_index, metadata dict, content_hash) per row
+        embeddings: Embedding matrix, one row per entry in rows
+
+    Returns:
+        Complete binary COPY payload (header, tuples, trailer)
+    """
+    vectors = np.ascontiguousarray(embeddings, dtype=">f4")
+    dim = vectors.shape[1]
+    vector_prefix = struct.pack(">ihh", 4 + 4 * dim, dim, 0)
+    field_count = struct.pack(">h", len(COPY_COLUMNS))
+
+    buffer = io.BytesIO()
+    buffer.write(_COPY_HEADER)
+    for (chunk_id, text, page_number, paragraph_id, document_name,
+         chunk_index, metadata, content_hash), vector in zip(rows, vectors):
+        metadata_json = _JSONB_VERSION + json.dumps(metadata, ensure_ascii=False, default=str).encode("utf-8")
+        buffer.write(field_count)
+        buffer.write(_text_field(chunk_id))
+        buffer.write(_text_field(text))
+        buffer.write(vector_prefix)
+        buffer.write(vector.tobytes())
+        buffer.write(_int_field(page_number))
+        buffer.write(_text_field(paragraph_id))
+        buffer.write(_text_field(document_name))
+        buffer.write(_int_field(chunk_index))
+        buffer.write(struct.pack(">i", len(metadata_json)) + metadata_json)
+        buffer.write(_text_field(content_hash))
+    buffer.write(_COPY_TRAILER)
+    return buffer.getvalue()
+
 
 @dataclass
 class VectorSearchResult:
@@ -32,16 +109,52 @@ class PgVectorStore:
     Features:
     - Multilingual embeddings (intfloat/multilingual-e5-large)
     - Cosine similarity search
-    - Efficient indexing with IVFFlat
+    - HNSW or IVFFlat index, built after the first bulk load (IVFFlat lists
+      sized from the row count) and rebuildable once the table has grown
+    - Per-query recall/latency knobs (hnsw.ef_search, ivfflat.probes) set
+      inside the search transaction
+    - Prepared search statements per filter shape (planned once per pooled
+      connection), query vector bound once
+    - Optional quantized index (halfvec or binary_quantize/Hamming) whose
+      candidates are re-ranked with the full-precision vectors
+    - Filtered search: exact search for small documents, partial per-document
+      indexes for large ones, iterative index scans (pgvector 0.8+) otherwise
+    - Binary COPY bulk loading (vectors written from NumPy buffers)
+    - Connection pool with per-request checkout (read-only autocommit
+      searches, transactional writes) plus an async search variant
     - Cross-lingual retrieval (Turkish → English)
+    - Optional content-hash embedding cache (re-indexing skips unchanged chunks)
+    - Incremental re-indexing per document (content_hash diff: only new or
+      changed chunks are embedded and written, vanished chunks are deleted)
     """
 
+    VECTOR_INDEX_TYPES = ("hnsw", "ivfflat")
+    HNSW_MAX_EF_SEARCH = 1000  # pgvector's upper bound for hnsw.ef_search
+    QUANTIZATIONS = ("none", "halfvec", "binary")
+    # Columns usable in search filters (filter keys become column names in SQL)
+    FILTER_COLUMNS = ("chunk_id", "page_number", "paragraph_id", "document_name", "chunk_index")
+    DOCUMENT_COUNTS_TTL = 60.0  # seconds the per-document row counts are cached
+    # Operator class of the index expression per quantization
+    _INDEX_OPCLASSES = {"none": "vector_cosine_ops", "halfvec": "halfvec_cosine_ops", "binary": "bit_hamming_ops"}
+
     def __init__(
         self,
         connection_string: str,
         table_name: str = "embeddings",
         embedding_model: str = "intfloat/multilingual-e5-large",
-        embedding_dimension: int = 1024
+        embedding_dimension: int = 1024,
+        embedding_cache_path: Optional[str] = None,
+        pool_min_size: int = 2,
+        pool_max_size: int = 10,
+        index_type: str = "hnsw",
+        hnsw_m: int = 16,
+        hnsw_ef_construction: int = 64,
+        ef_search: int = 40,
+        ivfflat_probes: Optional[int] = None,
+        defer_index_build: bool = False,
+        quantization: str = "none",
+        rerank_factor: int = 4,
+        exact_search_threshold: int = 10_000
     ):
         """
         Initialize pgvector connection
@@ -51,32 +164,79 @@ class PgVectorStore:
             table_name: Table name for storing embeddings
             embedding_model: HuggingFace model ID for embeddings
             embedding_dimension: Embedding vector dimension
+            embedding_cache_path: Optional SQLite file caching passage embeddings
+            pool_min_size: Connections opened up front and kept open while idle
+            pool_max_size: Maximum concurrent connections (concurrent searches)
+            index_type: Vector index built after loading ("hnsw" or "ivfflat")
+            hnsw_m: HNSW max connections per layer
+            hnsw_ef_construction: HNSW candidate list size while building
+            ef_search: Default HNSW candidate list size per query (raised to top_k)
+            ivfflat_probes: Default IVFFlat lists scanned per query
+                            (None = sqrt(lists) of the built index)
+            defer_index_build: Skip the index build in index_chunks; call
+                               build_vector_index() once all data is loaded
+            quantization: Index representation of the embeddings: "none"
+                          (float32), "halfvec" (float16, half the index size)
+                          or "binary" (1 bit per dimension, Hamming distance).
+                          The table keeps float32 vectors for re-ranking.
+            rerank_factor: Quantized searches fetch top_k * rerank_factor
+                           candidates and re-rank them at full precision
+            exact_search_threshold: Documents with at most this many rows are
+                                    searched exactly when filtered by
+                                    document_name; larger documents get a
+                                    partial vector index
         """
-        self.conn = psycopg2.connect(connection_string)
-        self.conn.autocommit = False
-        register_vector(self.conn)
+        if index_type not in self.VECTOR_INDEX_TYPES:
+            raise ValueError(f"index_type must be one of {self.VECTOR_INDEX_TYPES}, got {index_type!r}")
+        if quantization not in self.QUANTIZATIONS:
+            raise ValueError(f"quantization must be one of {self.QUANTIZATIONS}, got {quantization!r}")
+
+        self.connection_string = connection_string
+        self.pool = PgConnectionPool(connection_string, min_size=pool_min_size, max_size=pool_max_size)
+        self._pool_sizes = (pool_min_size, pool_max_size)
+        self._async_pool: Optional[AsyncPgConnectionPool] = None
 
         self.table_name = table_name
         self.embedding_dimension = embedding_dimension
 
+        self.index_type = index_type
+        self.hnsw_m = hnsw_m
+        self.hnsw_ef_construction = hnsw_ef_construction
+        self.ef_search = ef_search
+        self.ivfflat_probes = ivfflat_probes
+        self.defer_index_build = defer_index_build
+        self.quantization = quantization
+        self.rerank_factor = rerank_factor
+        self._ivfflat_lists: Optional[int] = None  # lists of the built IVFFlat index
+        self._search_sql: Dict[tuple, str] = {}  # search SQL per (filter keys, style, quantization)
+        self.exact_search_threshold = exact_search_threshold
+        self._document_counts: Dict[str, int] = {}
+        self._document_counts_at: Optional[float] = None
+        self.pgvector_version: tuple = ()
+
         # Load embedding model
         print(f"[Loading] Embedding model: {embedding_model}")
         self.embedding_model = SentenceTransformer(embedding_model)
+        self.embedding_model_name = embedding_model
         print(f"[OK] Model loaded (dimension: {embedding_dimension})")
 
+        self.embedding_cache = EmbeddingCache(embedding_cache_path) if embedding_cache_path else None
+
         self._create_extension()
         self._create_table_if_not_exists()
 
     def _create_extension(self):
         """Enable pgvector extension"""
-        with self.conn.cursor() as cur:
+        with self.pool.connection() as conn, conn.cursor() as cur:
             cur.execute("CREATE EXTENSION IF NOT EXISTS vector")
-            self.conn.commit()
-            print("[OK] pgvector extension enabled")
+            cur.execute("SELECT extversion FROM pg_extension WHERE extname = 'vector'")
+            version = cur.fetchone()[0]
+            self.pgvector_version = tuple(int(part) for part in version.split(".")[:3] if part.isdigit())
+            print(f"[OK] pgvector extension enabled (version {version})")
 
     def _create_table_if_not_exists(self):
         """Create embeddings table with vector column"""
-        with self.conn.cursor() as cur:
+        with self.pool.connection() as conn, conn.cursor() as cur:
             # Check if table exists
             cur.execute("""
                 SELECT EXISTS (
@@ -88,6 +248,18 @@ class PgVectorStore:
             exists = cur.fetchone()[0]
 
             if exists:
+                # Tables created before incremental re-indexing lack the hash column
+                cur.execute(f"ALTER TABLE {self.table_name} ADD COLUMN IF NOT EXISTS content_hash CHAR(64)")
+                cur.execute(f"""
+                    CREATE INDEX IF NOT EXISTS {self.table_name}_document_name_idx
+                    ON {self.table_name} (document_name)
+                """)
+                index = self._vector_index_info(cur)
+                if index is not None and index["type"] == "ivfflat":
+                    self._ivfflat_lists = int(index["options"].get("lists", 100))
+                if index is not None and index["quantization"] != self.quantization:
+                    print(f"[WARN] Vector index uses quantization '{index['quantization']}', "
+                          f"store is set to '{self.quantization}' (run build_vector_index())")
                 print(f"[OK] Table '{self.table_name}' already exists")
                 return
 
@@ -103,20 +275,229 @@ class PgVectorStore:
                     document_name VARCHAR(255),
                     chunk_index INTEGER,
                     metadata JSONB,
+                    content_hash CHAR(64),
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
 
-            # Create index for fast similarity search
-            # Using IVFFlat with 100 lists (good for ~10k-100k vectors)
+            # Per-document lookups for the re-index diff
             cur.execute(f"""
-                CREATE INDEX ON {self.table_name}
-                USING ivfflat (embedding vector_cosine_ops)
-                WITH (lists = 100)
+                CREATE INDEX {self.table_name}_document_name_idx
+                ON {self.table_name} (document_name)
             """)
 
-            self.conn.commit()
-            print(f"[OK] Created table '{self.table_name}' with vector index")
+            # The vector index is built after the first bulk load
+            # (see _ensure_vector_index): loading is faster without it and
+            # IVFFlat centroids trained on an empty table are useless
+            print(f"[OK] Created table '{self.table_name}'")
+
+    @property
+    def _vector_index_name(self) -> str:
+        # Same name PostgreSQL generated for the unnamed index of older tables
+        return f"{self.table_name}_embedding_idx"
+
+    def _document_index_name(self, document_name: str) -> str:
+        """Name of the partial vector index covering one document"""
+        digest = hashlib.sha1(document_name.encode("utf-8")).hexdigest()[:12]
+        return f"{self.table_name}_doc_{digest}_idx"
+
+    @property
+    def iterative_scan_supported(self) -> bool:
+        """Whether pgvector can keep scanning the index until enough filtered rows are found (0.8.0+)"""
+        return self.pgvector_version >= (0, 8, 0)
+
+    @staticmethod
+    def ivfflat_lists(row_count: int) -> int:
+        """IVFFlat list count for a table size (pgvector guidance: rows / 1000 up to 1M rows, sqrt(rows) above)"""
+        if row_count <= 1_000_000:
+            return max(1, row_count // 1000)
+        return int(math.sqrt(row_count))
+
+    def _vector_index_info(self, cur, name: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """
+        Access method, quantization, build options and size of a vector index
+        (default: the table-wide one), or None if it does not exist
+        """
+        name = name or self._vector_index_name
+        cur.execute("""
+            SELECT am.amname, opc.opcname, c.reloptions, pg_relation_size(c.oid)
+            FROM pg_class c
+            JOIN pg_am am ON am.oid = c.relam
+            JOIN pg_index i ON i.indexrelid = c.oid
+            JOIN pg_opclass opc ON opc.oid = i.indclass[0]
+            WHERE c.relname = %s AND c.relkind = 'i'
+        """, (name,))
+        row = cur.fetchone()
+        if row is None:
+            return None
+        method, opclass, reloptions, size_bytes = row
+        quantization = next((q for q, opc in self._INDEX_OPCLASSES.items() if opc == opclass), opclass)
+        options = dict(option.split("=", 1) for option in reloptions or [])
+        return {
+            "name": name,
+            "type": method,
+            "quantization": quantization,
+            "options": options,
+            "size_bytes": size_bytes
+        }
+
+    def _index_expression(self, vector_sql: str, quantization: str) -> str:
+        """Indexed representation of a vector expression (what the quantized index is built on)"""
+        if quantization == "halfvec":
+            return f"({vector_sql})::halfvec({self.embedding_dimension})"
+        if quantization == "binary":
+            return f"binary_quantize({vector_sql})::bit({self.embedding_dimension})"
+        return vector_sql
+
+    def _index_distance(self, vector_sql: str, quantization: str) -> str:
+        """Distance the vector index orders by (cosine, or Hamming for binary quantization)"""
+        operator = "<~>" if quantization == "binary" else "<=>"
+        return (f"{self._index_expression('embedding', quantization)} {operator} "
+                f"{self._index_expression(vector_sql, quantization)}")
+
+    def _create_vector_index(self, cur, name: str, document_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build the configured vector index under the given name
+
+        With document_name, the index is partial (WHERE document_name = ...):
+        filtered searches on that document scan only its rows instead of
+        post-filtering a table-wide scan.
+        """
+        where_sql = ""
+        if document_name is not None:
+            where_sql = f"WHERE document_name = {cur.mogrify('%s', (document_name,)).decode('utf-8')}"
+
+        if self.index_type == "hnsw":
+            options = {"m": self.hnsw_m, "ef_construction": self.hnsw_ef_construction}
+        else:
+            cur.execute(f"SELECT COUNT(*) FROM {self.table_name} {where_sql}")
+            options = {"lists": self.ivfflat_lists(cur.fetchone()[0])}
+
+        expression = self._index_expression("embedding", self.quantization)
+        if self.quantization != "none":
+            expression = f"({expression})"  # expression indexes need parentheses
+        with_sql = ", ".join(f"{key} = {int(value)}" for key, value in options.items())
+        cur.execute(f"""
+            CREATE INDEX {name}
+            ON {self.table_name}
+            USING {self.index_type} ({expression} {self._INDEX_OPCLASSES[self.quantization]})
+            WITH ({with_sql})
+            {where_sql}
+        """)
+        if document_name is None:
+            self._ivfflat_lists = options.get("lists")
+        return {
+            "name": self._vector_index_name if document_name is None else self._document_index_name(document_name),
+            "type": self.index_type,
+            "quantization": self.quantization,
+            "options": options,
+            "document_name": document_name
+        }
+
+    def _ensure_vector_index(self, cur):
+        """Create the vector index if it does not exist yet (after loading rows)"""
+        if self._vector_index_info(cur) is None:
+            index = self._create_vector_index(cur, self._vector_index_name)
+            print(f"[OK] Built {index['type']} index {index['options']}")
+
+    def _ensure_document_indexes(self, cur, document_names: List[str]):
+        """Create partial vector indexes for documents too large for exact filtered search"""
+        cur.execute(
+            f"""
+            SELECT document_name, COUNT(*)
+            FROM {self.table_name}
+            WHERE document_name = ANY(%s)
+            GROUP BY document_name
+            """,
+            (document_names,)
+        )
+        for document_name, count in cur.fetchall():
+            if count <= self.exact_search_threshold:
+                continue
+            name = self._document_index_name(document_name)
+            if self._vector_index_info(cur, name) is None:
+                index = self._create_vector_index(cur, name, document_name)
+                print(f"[OK] Built partial {index['type']} index for '{document_name}' ({count} rows)")
+
+    def build_vector_index(self, rebuild: bool = True, document_name: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Build (or rebuild) the vector index from the rows currently stored
+
+        Use after a deferred load, after the table has grown well past the
+        size IVFFlat lists were sized for, or to switch index type. The new
+        index is built under a temporary name and swapped in at commit, so
+        searches keep using the old index while the build runs (writes wait).
+
+        Args:
+            rebuild: Replace an existing index (False = only build if missing)
+            document_name: Build the partial index of one document instead of
+                           the table-wide index
+
+        Returns:
+            Index name, type, build options and build time
+        """
+        name = self._vector_index_name if document_name is None else self._document_index_name(document_name)
+        start = time.perf_counter()
+        with self.pool.connection() as conn, conn.cursor() as cur:
+            existing = self._vector_index_info(cur, name)
+            if existing is not None and not rebuild:
+                return {**existing, "build_seconds": 0.0}
+
+            staging_name = f"{name}_new"
+            cur.execute(f"DROP INDEX IF EXISTS {staging_name}")
+            index = self._create_vector_index(cur, staging_name, document_name)
+            cur.execute(f"DROP INDEX IF EXISTS {name}")
+            cur.execute(f"ALTER INDEX {staging_name} RENAME TO {name}")
+
+        build_seconds = time.perf_counter() - start
+        print(f"[OK] Built {index['type']} index {index['options']} in {build_seconds:.1f}s")
+        return {**index, "build_seconds": round(build_seconds, 3)}
+
+    def bulk_load(self, cur, rows: List[tuple], embeddings: np.ndarray):
+        """
+        Upsert rows via binary COPY into a staging table, then one INSERT ... SELECT
+
+        COPY cannot resolve conflicts, so rows land in a temporary table first
+        and are merged with ON CONFLICT (chunk_id) DO UPDATE. Runs inside the
+        caller's transaction.
+
+        Args:
+            cur: Cursor inside the indexing transaction
+            rows: Row tuples as expected by encode_copy_binary
+            embeddings: Embedding matrix, one row per entry in rows
+        """
+        staging = f"{self.table_name}_staging"
+        columns = ", ".join(COPY_COLUMNS)
+        cur.execute(f"""
+            CREATE TEMP TABLE IF NOT EXISTS {staging} (
+                chunk_id VARCHAR(255),
+                text TEXT,
+                embedding vector({self.embedding_dimension}),
+                page_number INTEGER,
+                paragraph_id VARCHAR(255),
+                document_name VARCHAR(255),
+                chunk_index INTEGER,
+                metadata JSONB,
+                content_hash CHAR(64)
+            ) ON COMMIT DELETE ROWS
+        """)
+        cur.copy_expert(
+            f"COPY {staging} ({columns}) FROM STDIN WITH (FORMAT binary)",
+            io.BytesIO(encode_copy_binary(rows, embeddings))
+        )
+        cur.execute(f"""
+            INSERT INTO {self.table_name} ({columns})
+            SELECT {columns} FROM {staging}
+            ON CONFLICT (chunk_id) DO UPDATE SET
+                text = EXCLUDED.text,
+                embedding = EXCLUDED.embedding,
+                page_number = EXCLUDED.page_number,
+                paragraph_id = EXCLUDED.paragraph_id,
+                document_name = EXCLUDED.document_name,
+                chunk_index = EXCLUDED.chunk_index,
+                metadata = EXCLUDED.metadata,
+                content_hash = EXCLUDED.content_hash
+        """)
 
     def embed_text(self, text: str, prefix: str = "passage: ") -> np.ndarray:
         """
@@ -157,12 +538,61 @@ class PgVectorStore:
         )
         return embeddings
 
+    @staticmethod
+    def _chunk_id(chunk: Dict[str, Any]) -> str:
+        """Row key of a chunk dictionary"""
+        return chunk.get("chunk_id", f"chunk_{chunk.get('chunk_index', 0)}")
+
+    @staticmethod
+    def _content_hash(chunk: Dict[str, Any]) -> str:
+        """SHA-256 over everything stored for a chunk (text and metadata)"""
+        payload = json.dumps(chunk, sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _diff_chunks(self, cur, chunks: List[Dict[str, Any]]) -> tuple:
+        """
+        Compare incoming chunks with the stored rows of the same documents
+
+        Args:
+            cur: Cursor inside the indexing transaction
+            chunks: Incoming chunks (unique chunk_ids)
+
+        Returns:
+            (changed, unchanged_count, vanished_ids): chunks that are new or
+            whose content hash differs, how many are already stored as-is, and
+            chunk_ids stored for these documents that are no longer present
+        """
+        incoming = {self._chunk_id(chunk): self._content_hash(chunk) for chunk in chunks}
+        document_names = list({chunk.get("document_name") for chunk in chunks} - {None})
+
+        cur.execute(
+            f"""
+            SELECT chunk_id, content_hash, document_name
+            FROM {self.table_name}
+            WHERE document_name = ANY(%s) OR chunk_id = ANY(%s)
+            """,
+            (document_names, list(incoming))
+        )
+        stored = {chunk_id: (content_hash, document_name) for chunk_id, content_hash, document_name in cur.fetchall()}
+
+        changed = [chunk for chunk in chunks
+                   if stored.get(self._chunk_id(chunk), (None, None))[0] != incoming[self._chunk_id(chunk)]]
+        vanished_ids = [chunk_id for chunk_id, (_, document_name) in stored.items()
+                        if chunk_id not in incoming and document_name in document_names]
+        return changed, len(chunks) - len(changed), vanished_ids
+
     def index_chunks(self, chunks: List[Dict[str, Any]], batch_size: int = 32) -> Dict[str, Any]:
         """
-        Bulk index chunks with embeddings to pgvector
+        Incrementally index chunks with embeddings to pgvector
+
+        Chunks are diffed by content hash against what is stored for their
+        document_name: unchanged rows are left alone, only new or changed
+        chunks are embedded and upserted, and stored chunks of those documents
+        that are no longer present are deleted, all in one transaction.
 
         Args:
             chunks: List of chunk dictionaries with text and metadata
+                    (all chunks of each document being re-indexed)
             batch_size: Batch size for embedding generation
 
         Returns:
@@ -181,72 +611,113 @@ class PgVectorStore:
         if not chunks:
             return {"error": "No chunks provided"}
 
+        # Duplicate chunk_ids: the last occurrence wins
+        unique_chunks = list({self._chunk_id(chunk): chunk for chunk in chunks}.values())
+
+        # One transaction: committed by the pool on success, rolled back on error
+        with self.pool.connection() as conn:
+            with conn.cursor() as cur:
+                changed, unchanged, vanished_ids = self._diff_chunks(cur, unique_chunks)
+                print(f"[Diff] {len(changed)} new/changed, {unchanged} unchanged, "
+                      f"{len(vanished_ids)} removed chunks")
+
+                cache_hits = 0
+                load_seconds = 0.0
+                if changed:
+                    embeddings, cache_hits = self._embed_chunks(changed, batch_size)
+
+                    # Prepare data for insertion
+                    rows = [
+                        (
+                            self._chunk_id(chunk),
+                            chunk["text"],
+                            chunk.get("page_number"),
+                            chunk.get("paragraph_id"),
+                            chunk.get("document_name"),
+                            chunk.get("chunk_index"),
+                            chunk,  # Store full chunk as metadata
+                            self._content_hash(chunk)
+                        )
+                        for chunk in changed
+                    ]
+
+                    # Bulk upsert of new and changed rows only
+                    print(f"[Inserting] Writing {len(rows)} embeddings to PostgreSQL (binary COPY)...")
+                    load_start = time.perf_counter()
+                    self.bulk_load(cur, rows, embeddings)
+                    load_seconds = time.perf_counter() - load_start
+
+                if vanished_ids:
+                    cur.execute(f"DELETE FROM {self.table_name} WHERE chunk_id = ANY(%s)", (vanished_ids,))
+
+                if changed and not self.defer_index_build:
+                    self._ensure_vector_index(cur)
+                    self._ensure_document_indexes(cur, list({chunk.get("document_name") for chunk in changed} - {None}))
+
+        self._document_counts_at = None  # row counts changed
+
+        print(f"[OK] Indexed {len(changed)} chunks with embeddings "
+              f"({unchanged} unchanged, {len(vanished_ids)} deleted)")
+
+        return {
+            "indexed": len(changed),
+            "unchanged": unchanged,
+            "deleted": len(vanished_ids),
+            "failed": 0,
+            "total_chunks": len(unique_chunks),
+            "table_name": self.table_name,
+            "embedding_dimension": self.embedding_dimension,
+            "embedding_cache_hits": cache_hits,
+            "embedding_cache_hit_ratio": round(cache_hits / len(changed), 3) if changed else 0.0,
+            "load_seconds": round(load_seconds, 3),
+            "rows_per_second": round(len(changed) / load_seconds, 1) if load_seconds else 0.0
+        }
+
+    def _embed_chunks(self, chunks: List[Dict[str, Any]], batch_size: int) -> tuple:
+        """
+        Embed chunk texts in batches
+
+        With an embedding cache, only texts not embedded before go through
+        the model.
+
+        Returns:
+            (embeddings, cache_hits)
+        """
         print(f"[Embedding] Generating embeddings for {len(chunks)} chunks...")
 
         # Generate embeddings in batches to avoid memory issues
         all_embeddings = []
+        cache_hits = 0
         texts = [chunk["text"] for chunk in chunks]
 
         for i in range(0, len(texts), batch_size):
             batch_texts = texts[i:i + batch_size]
-            batch_embeddings = self.embed_batch(batch_texts, prefix="passage: ")
+            if self.embedding_cache is not None:
+                batch_embeddings, hits = self.embedding_cache.encode(
+                    self.embedding_model,
+                    self.embedding_model_name,
+                    batch_texts,
+                    prefix="passage: ",
+                    normalize_embeddings=True
+                )
+                cache_hits += hits
+            else:
+                batch_embeddings = self.embed_batch(batch_texts, prefix="passage: ")
             all_embeddings.append(batch_embeddings)
             print(f"  Embedded {min(i + batch_size, len(texts))}/{len(texts)} chunks")
 
-        embeddings = np.vstack(all_embeddings)
-
-        # Prepare data for insertion
-        data = []
-        for chunk, embedding in zip(chunks, embeddings):
-            data.append((
-                chunk.get("chunk_id", f"chunk_{chunk.get('chunk_index', 0)}"),
-                chunk["text"],
-                embedding.tolist(),  # Convert numpy to list for psycopg2
-                chunk.get("page_number"),
-                chunk.get("paragraph_id"),
-                chunk.get("document_name"),
-                chunk.get("chunk_index"),
-                psycopg2.extras.Json(chunk)  # Store full chunk as metadata
-            ))
-
-        # Bulk insert with ON CONFLICT handling
-        print(f"[Inserting] Writing {len(data)} embeddings to PostgreSQL...")
-        with self.conn.cursor() as cur:
-            execute_values(
-                cur,
-                f"""
-                INSERT INTO {self.table_name}
-                (chunk_id, text, embedding, page_number, paragraph_id,
-                 document_name, chunk_index, metadata)
-                VALUES %s
-                ON CONFLICT (chunk_id) DO UPDATE SET
-                    text = EXCLUDED.text,
-                    embedding = EXCLUDED.embedding,
-                    page_number = EXCLUDED.page_number,
-                    paragraph_id = EXCLUDED.paragraph_id,
-                    document_name = EXCLUDED.document_name,
-                    chunk_index = EXCLUDED.chunk_index,
-                    metadata = EXCLUDED.metadata
-                """,
-                data
-            )
-            self.conn.commit()
-
-        print(f"[OK] Indexed {len(chunks)} chunks with embeddings")
-
-        return {
-            "indexed": len(chunks),
-            "failed": 0,
-            "total_chunks": len(chunks),
-            "table_name": self.table_name,
-            "embedding_dimension": self.embedding_dimension
-        }
+        if self.embedding_cache is not None:
+            print(f"  Embedding cache: {cache_hits}/{len(texts)} hits")
+        return np.vstack(all_embeddings), cache_hits
 
     def search(
         self,
         query: str,
         top_k: int = 10,
-        filters: Optional[Dict[str, Any]] = None
+        filters: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank_factor: Optional[int] = None
     ) -> List[VectorSearchResult]:
         """
         Semantic similarity search using pgvector
@@ -255,61 +726,471 @@ class PgVectorStore:
             query: Search query (Turkish or English)
             top_k: Number of results to return
             filters: Optional filters (e.g., {"page_number": 5})
+            ef_search: HNSW candidate list size for this query (default: store setting)
+            probes: IVFFlat lists scanned for this query (default: store setting)
+            rerank_factor: Quantized index candidates per result (default: store setting)
 
         Returns:
             List of VectorSearchResult objects sorted by similarity
         """
         # Generate query embedding with "query: " prefix
         query_embedding = self.embed_text(query, prefix="query: ")
+        return self.search_by_vector(query_embedding, top_k, filters, ef_search=ef_search, probes=probes,
+                                     rerank_factor=rerank_factor)
 
-        # Build SQL query
-        sql = f"""
-            SELECT
-                chunk_id,
-                text,
-                page_number,
-                paragraph_id,
-                metadata,
-                1 - (embedding <=> %s::vector) AS similarity
-            FROM {self.table_name}
+    def search_by_vector(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank_factor: Optional[int] = None,
+        exact: bool = False
+    ) -> List[VectorSearchResult]:
         """
+        Top-k similarity search for an already embedded query
 
-        params = [query_embedding.tolist()]
+        Args:
+            query_embedding: Normalized query embedding ("query: " prefix)
+            top_k: Number of results to return
+            filters: Optional filters (e.g., {"page_number": 5})
+            ef_search: HNSW candidate list size for this query (default: store setting)
+            probes: IVFFlat lists scanned for this query (default: store setting)
+            rerank_factor: Quantized index candidates per result (default: store setting)
+            exact: Bypass the vector index and quantization (exact full-precision
+                   scan, the recall baseline)
 
-        # Add filters if provided
-        if filters:
-            where_clauses = []
-            for key, value in filters.items():
-                where_clauses.append(f"{key} = %s")
-                params.append(value)
-            sql += " WHERE " + " AND ".join(where_clauses)
+        Returns:
+            List of VectorSearchResult objects sorted by similarity
+
+        Filtered searches are planned: a document_name filter on a document of
+        at most exact_search_threshold rows is searched exactly; otherwise the
+        index (a document's partial index, if it has one) is scanned
+        iteratively until top_k filtered rows are found. Without iterative
+        scans (pgvector < 0.8) a short filtered result is redone exactly.
+        """
+        filter_keys, filter_values = self._filter_shape(filters)
+        if filters and not exact:
+            exact = self._prefer_exact_search(filters)
 
-        sql += f" ORDER BY embedding <=> %s::vector LIMIT %s"
-        params.extend([query_embedding.tolist(), top_k])
+        rows = self._execute_search(query_embedding, top_k, filter_keys, filter_values,
+                                    ef_search, probes, rerank_factor, exact)
+        if filters and not exact and len(rows) < top_k and not self.iterative_scan_supported:
+            # The ANN scan was post-filtered down to too few rows
+            rows = self._execute_search(query_embedding, top_k, filter_keys, filter_values,
+                                        ef_search, probes, rerank_factor, exact=True)
+
+        # Parse results
+        return [self._distance_row_to_result(row) for row in rows]
 
-        # Execute search
-        with self.conn.cursor() as cur:
+    def _execute_search(
+        self,
+        query_embedding: np.ndarray,
+        top_k: int,
+        filter_keys: tuple,
+        filter_values: list,
+        ef_search: Optional[int],
+        probes: Optional[int],
+        rerank_factor: Optional[int],
+        exact: bool
+    ) -> List[tuple]:
+        """Run one prepared top-k search; returns (..., distance) rows sorted by distance"""
+        quantization = "none" if exact else self.quantization
+        candidates = self._candidate_count(top_k, quantization, rerank_factor)
+        settings_sql, settings_params = self._search_settings(candidates, ef_search, probes, exact,
+                                                              filtered=bool(filter_keys))
+
+        # Read-only transaction on a pooled connection: the index settings
+        # are transaction-local and never leak to the next checkout
+        with self.pool.connection(readonly=True, transaction=True) as conn, conn.cursor() as cur:
+            statement = self._prepare_search(cur, filter_keys, quantization, exact)
+            # Settings and EXECUTE share one round trip; the vector is
+            # serialized once (pgvector adapter) and bound to $1
+            placeholders = ", ".join(["%s"] * (3 + len(filter_values)))
+            cur.execute(
+                f"{settings_sql}; EXECUTE {statement} ({placeholders})",
+                [*settings_params, np.asarray(query_embedding, dtype=np.float32), top_k, candidates,
+                 *filter_values]
+            )
+            rows = cur.fetchall()
+
+        # Iterative scans return rows in relaxed order
+        return sorted(rows, key=lambda row: row[-1])
+
+    def _document_row_counts(self) -> Dict[str, int]:
+        """Rows per document_name, cached for DOCUMENT_COUNTS_TTL seconds"""
+        now = time.monotonic()
+        if self._document_counts_at is None or now - self._document_counts_at > self.DOCUMENT_COUNTS_TTL:
+            with self.pool.connection(readonly=True) as conn, conn.cursor() as cur:
+                cur.execute(f"SELECT document_name, COUNT(*) FROM {self.table_name} GROUP BY document_name")
+                self._document_counts = dict(cur.fetchall())
+            self._document_counts_at = now
+        return self._document_counts
+
+    def _prefer_exact_search(self, filters: Dict[str, Any]) -> bool:
+        """
+        Planner choice for a filtered search: exact search when the filter
+        restricts it to a small document (its rows are found through the
+        document_name B-tree index, so the scan is cheap and recall is
+        perfect); ANN search otherwise
+        """
+        document_name = filters.get("document_name")
+        if document_name is None:
+            return False
+        return self._document_row_counts().get(document_name, 0) <= self.exact_search_threshold
+
+    async def asearch(
+        self,
+        query: str,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank_factor: Optional[int] = None
+    ) -> List[VectorSearchResult]:
+        """
+        Async semantic similarity search (psycopg 3 async pool)
+
+        The query is embedded in a worker thread; the SQL runs on a pooled
+        async connection, so many searches can wait on PostgreSQL at once
+        without holding threads.
+
+        Args:
+            query: Search query (Turkish or English)
+            top_k: Number of results to return
+            filters: Optional filters (e.g., {"page_number": 5})
+            ef_search: HNSW candidate list size for this query (default: store setting)
+            probes: IVFFlat lists scanned for this query (default: store setting)
+            rerank_factor: Quantized index candidates per result (default: store setting)
+
+        Returns:
+            List of VectorSearchResult objects sorted by similarity
+        """
+        query_embedding = await asyncio.to_thread(self.embed_text, query, "query: ")
+        filter_keys, filter_values = self._filter_shape(filters)
+        exact = bool(filters) and await asyncio.to_thread(self._prefer_exact_search, filters)
+        quantization = "none" if exact else self.quantization
+        candidates = self._candidate_count(top_k, quantization, rerank_factor)
+        sql = self._search_query(filter_keys, "psycopg", quantization)
+        settings_sql, settings_params = self._search_settings(candidates, ef_search, probes, exact,
+                                                              filtered=bool(filter_keys))
+        params = {"vector": np.asarray(query_embedding, dtype=np.float32), "limit": top_k, "candidates": candidates}
+        params.update((f"filter_{i}", value) for i, value in enumerate(filter_values))
+
+        pool = await self._get_async_pool()
+        async with pool.connection() as conn:
+            async with conn.transaction():
+                await conn.execute(settings_sql, settings_params)
+                # prepare=True: psycopg keeps one server-side statement per
+                # SQL text (i.e. per filter shape); the vector is sent binary
+                cursor = await conn.execute(sql, params, prepare=True)
+                rows = await cursor.fetchall()
+
+        # Iterative scans return rows in relaxed order
+        return [self._distance_row_to_result(row) for row in sorted(rows, key=lambda row: row[-1])]
+
+    def _candidate_count(self, top_k: int, quantization: str, rerank_factor: Optional[int] = None) -> int:
+        """Rows the vector index has to produce: top_k, or the re-ranking shortlist for quantized search"""
+        if quantization == "none":
+            return top_k
+        return top_k * (rerank_factor or self.rerank_factor)
+
+    def _search_settings(
+        self,
+        top_k: int,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        exact: bool = False,
+        filtered: bool = False
+    ) -> tuple:
+        """
+        Build the set_config statement (and its parameters) scoping index
+        search parameters to the current transaction
+
+        Both hnsw.ef_search and ivfflat.probes are set, so the statement fits
+        whichever index the table has. ef_search is raised to top_k, the rows
+        the index has to produce (an HNSW scan returns at most ef_search rows);
+        probes defaults to sqrt(lists).
+
+        Filtered searches turn on iterative index scans (pgvector 0.8+), so
+        the scan continues past ef_search/probes until enough rows pass the
+        filter, and force custom plans, so a document_name filter can use that
+        document's partial index even in a prepared statement. Exact searches
+        force custom plans too, so enable_indexscan is always honoured.
+        """
+        ef_search = min(max(ef_search or self.ef_search, top_k), self.HNSW_MAX_EF_SEARCH)
+        if probes is None:
+            probes = self.ivfflat_probes or max(1, round(math.sqrt(self._ivfflat_lists or 1)))
+
+        sql = ("SELECT set_config('hnsw.ef_search', %s::text, true), "
+               "set_config('ivfflat.probes', %s::text, true)")
+        if exact or filtered:
+            sql += ", set_config('plan_cache_mode', 'force_custom_plan', true)"
+        if exact:
+            sql += ", set_config('enable_indexscan', 'off', true)"
+        elif filtered:
+            if self.iterative_scan_supported:
+                sql += (", set_config('hnsw.iterative_scan', 'relaxed_order', true)"
+                        ", set_config('ivfflat.iterative_scan', 'relaxed_order', true)")
+        return sql, [str(ef_search), str(probes)]
+
+    async def _get_async_pool(self) -> AsyncPgConnectionPool:
+        """Async pool, created and opened on first use"""
+        if self._async_pool is None:
+            min_size, max_size = self._pool_sizes
+            self._async_pool = AsyncPgConnectionPool(self.connection_string, min_size=min_size, max_size=max_size)
+        await self._async_pool.open()
+        return self._async_pool
+
+    def _validate_filters(self, filters: Optional[Dict[str, Any]]):
+        """Reject filter keys that are not filterable columns"""
+        unknown = set(filters or {}) - set(self.FILTER_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unsupported filter(s) {sorted(unknown)}; filterable columns: {self.FILTER_COLUMNS}")
+
+    def _filter_shape(self, filters: Optional[Dict[str, Any]]) -> tuple:
+        """Split equality filters into sorted column names (the statement shape) and their values"""
+        self._validate_filters(filters)
+        filter_keys = tuple(sorted(filters or {}))
+        return filter_keys, [filters[key] for key in filter_keys]
+
+    def _search_source(self, vector_sql: str, where_sql: str, candidates_sql: str, quantization: str) -> str:
+        """
+        FROM clause (aliased t) of a top-k search
+
+        Without quantization this is the table itself. With quantization it is
+        the shortlist of candidates ordered by the quantized index; the caller
+        re-ranks it by the full-precision distance, so float32 vectors are only
+        read for the shortlist.
+        """
+        if quantization == "none":
+            return f"FROM {self.table_name} t {where_sql}"
+        return f"""FROM (
+                    SELECT chunk_id, text, page_number, paragraph_id, metadata, embedding
+                    FROM {self.table_name}
+                    {where_sql}
+                    ORDER BY {self._index_distance(vector_sql, quantization)}
+                    LIMIT {candidates_sql}
+                ) t"""
+
+    def _search_query(self, filter_keys: tuple, style: str, quantization: str = "none") -> str:
+        """
+        Top-k search SQL for one filter shape, built once and cached
+
+        The vector is bound once: the distance is selected, ordered on (which
+        the vector index serves, or which re-ranks the quantized shortlist)
+        and turned into a similarity by the caller.
+
+        Args:
+            filter_keys: Sorted filter column names
+            style: "prepare" ($n parameters for PREPARE: $1 vector, $2 limit,
+                   $3 candidates, then filters) or "psycopg" (named
+                   parameters vector, limit, candidates, filter_<i>)
+            quantization: Index representation searched for candidates
+        """
+        key = (filter_keys, style, quantization)
+        if key not in self._search_sql:
+            if style == "prepare":
+                vector, limit, candidates = "$1", "$2", "$3"
+                conditions = [f"{column} = ${i}" for i, column in enumerate(filter_keys, start=4)]
+            else:
+                vector, limit, candidates = "%(vector)b", "%(limit)s", "%(candidates)s"
+                conditions = [f"{column} = %(filter_{i})s" for i, column in enumerate(filter_keys)]
+            where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+            self._search_sql[key] = f"""
+                SELECT
+                    chunk_id,
+                    text,
+                    page_number,
+                    paragraph_id,
+                    metadata,
+                    t.embedding <=> {vector} AS distance
+                {self._search_source(vector, where_sql, candidates, quantization)}
+                ORDER BY distance
+                LIMIT {limit}
+            """
+        return self._search_sql[key]
+
+    def _prepare_search(self, cur, filter_keys: tuple, quantization: str = "none", exact: bool = False) -> str:
+        """
+        Name of the server-side prepared search statement for a filter shape,
+        PREPAREd on the cursor's connection the first time it is used there
+
+        Planning happens once per pooled connection and shape instead of on
+        every query. Exact searches get their own statement: a cached generic
+        plan is not replanned when enable_indexscan changes, so sharing one
+        statement could run the ANN plan for the exact baseline (or vice versa).
+        """
+        mode = "exact" if exact else quantization
+        digest = hashlib.sha1("|".join((mode, *filter_keys)).encode("utf-8")).hexdigest()[:12]
+        name = f"{self.table_name}_search_{digest}"
+        prepared = cur.connection.prepared_statements
+        if name not in prepared:
+            sql = self._search_query(filter_keys, "prepare", quantization)
+            cur.execute(f"PREPARE {name} (vector, integer, integer) AS {sql}")
+            prepared.add(name)
+        return name
+
+    def search_batch(
+        self,
+        queries: List[str],
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        ef_search: Optional[int] = None,
+        probes: Optional[int] = None,
+        rerank_factor: Optional[int] = None
+    ) -> List[List[VectorSearchResult]]:
+        """
+        Semantic similarity search for many queries in one statement
+
+        All queries are embedded in a single encode call and sent as one
+        vector[] parameter; a LATERAL join runs the top-k search per query.
+
+        Args:
+            queries: Search queries (Turkish or English)
+            top_k: Number of results to return per query
+            filters: Optional filters applied to every query
+            ef_search: HNSW candidate list size per query (default: store setting)
+            probes: IVFFlat lists scanned per query (default: store setting)
+            rerank_factor: Quantized index candidates per result (default: store setting)
+
+        Returns:
+            One list of VectorSearchResult objects per query, in input order
+        """
+        if not queries:
+            return []
+
+        query_embeddings = self.embedding_model.encode(
+            [f"query: {query}" for query in queries],
+            normalize_embeddings=True
+        )
+        where_sql, where_params = self._build_filter_clause(filters)
+        exact = bool(filters) and self._prefer_exact_search(filters)
+        quantization = "none" if exact else self.quantization
+        candidates = self._candidate_count(top_k, quantization, rerank_factor)
+
+        sql = f"""
+            SELECT
+                q.ord,
+                r.chunk_id,
+                r.text,
+                r.page_number,
+                r.paragraph_id,
+                r.metadata,
+                r.distance
+            FROM unnest(%s::vector[]) WITH ORDINALITY AS q(embedding, ord)
+            CROSS JOIN LATERAL (
+                SELECT
+                    chunk_id,
+                    text,
+                    page_number,
+                    paragraph_id,
+                    metadata,
+                    t.embedding <=> q.embedding AS distance
+                {self._search_source("q.embedding", where_sql, "%s", quantization)}
+                ORDER BY distance
+                LIMIT %s
+            ) r
+            ORDER BY q.ord, r.distance
+        """
+        params = [list(query_embeddings), *where_params]
+        if quantization != "none":
+            params.append(candidates)
+        params.append(top_k)
+        settings_sql, settings_params = self._search_settings(candidates, ef_search, probes, exact,
+                                                              filtered=bool(filters))
+
+        with self.pool.connection(readonly=True, transaction=True) as conn, conn.cursor() as cur:
+            cur.execute(settings_sql, settings_params)
             cur.execute(sql, params)
             rows = cur.fetchall()
 
-        # Parse results
-        results = []
-        for row in rows:
-            chunk_id, text, page_number, paragraph_id, metadata, similarity = row
-            results.append(VectorSearchResult(
-                chunk_id=chunk_id,
-                text=text,
-                score=float(similarity),  # Cosine similarity (0-1)
-                metadata=metadata if metadata else {},
-                page_number=page_number,
-                paragraph_id=paragraph_id
-            ))
+        results = [[] for _ in queries]
+        for row in sorted(rows, key=lambda row: (row[0], row[-1])):
+            results[row[0] - 1].append(self._distance_row_to_result(row[1:]))  # ordinality is 1-based
 
         return results
 
+    def recall_at_k(
+        self,
+        query_embeddings: np.ndarray,
+        top_k: int = 10,
+        filters: Optional[Dict[str, Any]] = None,
+        **search_kwargs
+    ) -> float:
+        """
+        Recall@k of indexed search (ANN, quantization, re-ranking) against
+        exact full-precision search, to weigh index and storage settings
+
+        Args:
+            query_embeddings: Normalized query embeddings ("query: " prefix)
+            top_k: Cut-off for recall@k
+            filters: Optional filters applied to every query
+            **search_kwargs: Passed to search_by_vector (ef_search, probes, rerank_factor)
+
+        Returns:
+            Mean fraction of the exact top-k chunks that indexed search returns
+        """
+        recalls = []
+        for query_embedding in query_embeddings:
+            exact = {hit.chunk_id for hit in self.search_by_vector(query_embedding, top_k, filters, exact=True)}
+            if not exact:
+                continue
+            found = {hit.chunk_id for hit in self.search_by_vector(query_embedding, top_k, filters, **search_kwargs)}
+            recalls.append(len(exact & found) / len(exact))
+        return float(np.mean(recalls)) if recalls else 1.0
+
+    def _build_filter_clause(self, filters: Optional[Dict[str, Any]]) -> tuple:
+        """Build a WHERE clause (and its parameters) from equality filters"""
+        self._validate_filters(filters)
+        if not filters:
+            return "", []
+        where_clauses = []
+        params = []
+        for key, value in filters.items():
+            where_clauses.append(f"{key} = %s")
+            params.append(value)
+        return " WHERE " + " AND ".join(where_clauses), params
+
+    def _distance_row_to_result(self, row: tuple) -> VectorSearchResult:
+        """Convert a (chunk_id, text, page_number, paragraph_id, metadata, cosine distance) row"""
+        return self._row_to_result((*row[:-1], 1 - row[-1]))
+
+    def _row_to_result(self, row: tuple) -> VectorSearchResult:
+        """Convert a (chunk_id, text, page_number, paragraph_id, metadata, similarity) row"""
+        chunk_id, text, page_number, paragraph_id, metadata, similarity = row
+        return VectorSearchResult(
+            chunk_id=chunk_id,
+            text=text,
+            score=float(similarity),  # Cosine similarity (0-1)
+            metadata=metadata if metadata else {},
+            page_number=page_number,
+            paragraph_id=paragraph_id
+        )
+
+    def _storage_stats(self, index: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        """Per-vector index key size of the index quantization vs float32 vectors"""
+        dim = self.embedding_dimension
+        quantization = index["quantization"] if index is not None else self.quantization
+        full_bytes = 8 + 4 * dim  # vector: varlena header + dim + float32 values
+        vector_bytes = {
+            "none": full_bytes,
+            "halfvec": 8 + 2 * dim,
+            "binary": 8 + math.ceil(dim / 8),
+        }.get(quantization, full_bytes)
+        return {
+            "quantization": quantization,
+            "rerank_factor": self.rerank_factor if quantization != "none" else None,
+            "index_vector_bytes": vector_bytes,
+            "full_precision_vector_bytes": full_bytes,
+            "index_vector_savings": round(1 - vector_bytes / full_bytes, 3),
+            "index_size_bytes": index["size_bytes"] if index is not None else 0
+        }
+
     def get_stats(self) -> Dict[str, Any]:
-        """Get table statistics"""
-        with self.conn.cursor() as cur:
+        """Get table statistics, vector index storage and connection pool metrics"""
+        with self.pool.connection(readonly=True) as conn, conn.cursor() as cur:
             # Check if table exists
             cur.execute("""
                 SELECT EXISTS (
@@ -321,7 +1202,7 @@ class PgVectorStore:
             exists = cur.fetchone()[0]
 
             if not exists:
-                return {"exists": False}
+                return {"exists": False, "pool": self.pool.stats()}
 
             # Get count
             cur.execute(f"SELECT COUNT(*) FROM {self.table_name}")
@@ -332,25 +1213,48 @@ class PgVectorStore:
                 SELECT pg_size_pretty(pg_total_relation_size('{self.table_name}'))
             """)
             size = cur.fetchone()[0]
+            index = self._vector_index_info(cur)
+
+            # Partial per-document vector indexes
+            cur.execute(
+                "SELECT COUNT(*) FROM pg_class WHERE relkind = 'i' AND starts_with(relname, %s)",
+                (f"{self.table_name}_doc_",)
+            )
+            document_indexes = cur.fetchone()[0]
 
             return {
                 "exists": True,
                 "total_documents": count,
                 "table_size": size,
                 "table_name": self.table_name,
-                "embedding_dimension": self.embedding_dimension
+                "embedding_dimension": self.embedding_dimension,
+                "vector_index": index,
+                "vector_storage": self._storage_stats(index),
+                "filtered_search": {
+                    "exact_search_threshold": self.exact_search_threshold,
+                    "document_indexes": document_indexes,
+                    "iterative_scan": self.iterative_scan_supported,
+                    "pgvector_version": ".".join(map(str, self.pgvector_version))
+                },
+                "pool": self.pool.stats(),
+                "async_pool": self._async_pool.stats() if self._async_pool is not None else None
             }
 
     def delete_table(self):
         """Delete the table (use with caution!)"""
-        with self.conn.cursor() as cur:
+        with self.pool.connection() as conn, conn.cursor() as cur:
             cur.execute(f"DROP TABLE IF EXISTS {self.table_name} CASCADE")
-            self.conn.commit()
             print(f"[OK] Deleted table '{self.table_name}'")
 
     def close(self):
-        """Close PostgreSQL connection"""
-        self.conn.close()
+        """Close all pooled PostgreSQL connections"""
+        self.pool.close()
+
+    async def aclose(self):
+        """Close the async pool (if used) and the threaded pool"""
+        if self._async_pool is not None:
+            await self._async_pool.close()
+        self.close()
 
 
 if __name__ == "__main__":
@@ -10,11 +10,14 @@ Improvements over v1:
 - ✅ Semantic search (pgvector) for cross-lingual retrieval
 - ✅ RRF fusion for combining both signals
 - ✅ Multilingual support (Turkish ↔ English)
+- ✅ BM25 and semantic retrievers run concurrently with per-branch timeouts
 """
-from typing import TypedDict, Annotated, Sequence, List
+from typing import TypedDict, Annotated, Sequence, List, Dict, Callable, Tuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
 from pathlib import Path
 import sys
 import os
+import time
 from dotenv import load_dotenv
 
 from langchain_core.messages import BaseMessage, HumanMessage, AIMessage
@@ -52,6 +55,8 @@ class MedicalRAGState(TypedDict):
     bm25_chunks: List[dict]  # BM25 results
     semantic_chunks: List[dict]  # Semantic results
     fused_chunks: List[dict]  # RRF fused results
+    retrieval_latency_ms: Dict[str, float]  # Per-branch and total retrieval latency
+    degraded_sources: List[str]  # Retrievers that timed out or failed
     answer: str
     sources: List[dict]
 
@@ -81,7 +86,8 @@ class MedicalRAGv2:
         top_k_semantic: int = 10,
         top_k_final: int = 5,
         rrf_k: int = 60,
-        model_id: str = None
+        model_id: str = None,
+        retrieval_timeout: float = None
     ):
         """
         Initialize RAG v2 with hybrid retrieval
@@ -95,6 +101,7 @@ class MedicalRAGv2:
             top_k_final: Number of final fused results (default 5)
             rrf_k: RRF constant (default 60)
             model_id: AWS Bedrock model ID (default from settings)
+            retrieval_timeout: Per-retriever timeout in seconds (default from settings)
         """
         # Use settings defaults if not provided
         opensearch_host = opensearch_host or settings.OPENSEARCH_HOST
@@ -116,7 +123,13 @@ class MedicalRAGv2:
             connection_string=postgres_url,
             table_name=settings.PGVECTOR_TABLE,
             embedding_model=settings.EMBEDDING_MODEL,
-            embedding_dimension=settings.EMBEDDING_DIMENSION
+            embedding_dimension=settings.EMBEDDING_DIMENSION,
+            index_type=settings.PGVECTOR_INDEX_TYPE,
+            ef_search=settings.HNSW_EF_SEARCH,
+            ivfflat_probes=settings.IVFFLAT_PROBES,
+            quantization=settings.PGVECTOR_QUANTIZATION,
+            rerank_factor=settings.PGVECTOR_RERANK_FACTOR,
+            exact_search_threshold=settings.PGVECTOR_EXACT_SEARCH_THRESHOLD
         )
 
         # RRF Fusion
@@ -126,6 +139,11 @@ class MedicalRAGv2:
         self.top_k_bm25 = top_k_bm25
         self.top_k_semantic = top_k_semantic
         self.top_k_final = top_k_final
+        self.retrieval_timeout = retrieval_timeout or settings.RETRIEVAL_TIMEOUT_SECONDS
+
+        # Both retrievers are network-bound, so they run side by side in threads.
+        # Extra workers keep a hung backend from blocking the next query's fan-out.
+        self.retrieval_pool = ThreadPoolExecutor(max_workers=4, thread_name_prefix="retriever")
 
         # AWS Bedrock LLM
         print("[Loading] AWS Bedrock LLM...")
@@ -166,28 +184,77 @@ class MedicalRAGv2:
 
         return workflow.compile()
 
+    @staticmethod
+    def _timed_search(search_fn: Callable, query: str, top_k: int) -> Tuple[list, float]:
+        """Run one retriever and measure its latency (runs in a worker thread)"""
+        start = time.perf_counter()
+        results = search_fn(query, top_k=top_k)
+        return results, (time.perf_counter() - start) * 1000
+
+    def _parallel_retrieve(self, query: str) -> Tuple[Dict[str, list], Dict[str, float], List[str]]:
+        """
+        Fan out BM25 and semantic retrieval concurrently
+
+        Each branch gets its own timeout; a branch that times out or raises
+        contributes no results instead of failing the whole query.
+
+        Returns:
+            (results per branch, latency in ms per branch, degraded branches)
+        """
+        branches = {
+            "bm25": (self.opensearch.search, self.top_k_bm25),
+            "semantic": (self.pgvector.search, self.top_k_semantic),
+        }
+
+        start = time.perf_counter()
+        futures = {
+            name: self.retrieval_pool.submit(self._timed_search, search_fn, query, top_k)
+            for name, (search_fn, top_k) in branches.items()
+        }
+        deadline = start + self.retrieval_timeout
+
+        results, latency_ms, degraded = {}, {}, []
+        for name, future in futures.items():
+            try:
+                results[name], latency_ms[name] = future.result(timeout=max(0.0, deadline - time.perf_counter()))
+            except FutureTimeoutError:
+                future.cancel()
+                print(f"  [WARN] {name} retrieval timed out after {self.retrieval_timeout:.1f}s")
+                results[name], latency_ms[name] = [], (time.perf_counter() - start) * 1000
+                degraded.append(name)
+            except Exception as e:
+                print(f"  [WARN] {name} retrieval failed: {e}")
+                results[name], latency_ms[name] = [], (time.perf_counter() - start) * 1000
+                degraded.append(name)
+
+        latency_ms["total"] = (time.perf_counter() - start) * 1000
+        return results, latency_ms, degraded
+
     def hybrid_retrieve_node(self, state: MedicalRAGState) -> MedicalRAGState:
         """
         Hybrid Retrieval Node: BM25 + Semantic + RRF Fusion
 
+        BM25 and semantic retrieval run concurrently. If one backend is slow
+        or down, fusion continues with the other backend's results only.
+
         Args:
             state: Current state with query
 
         Returns:
-            Updated state with fused chunks
+            Updated state with fused chunks and retrieval latencies
         """
         query = state["query"]
         print(f"\n[HYBRID RETRIEVE] Query: {query}")
 
-        # Step 1: BM25 retrieval (OpenSearch)
-        print(f"  [BM25] Retrieving top {self.top_k_bm25} chunks...")
-        bm25_results = self.opensearch.search(query, top_k=self.top_k_bm25)
-        print(f"  [OK] BM25 retrieved {len(bm25_results)} chunks")
-
-        # Step 2: Semantic retrieval (pgvector)
-        print(f"  [Semantic] Retrieving top {self.top_k_semantic} chunks...")
-        semantic_results = self.pgvector.search(query, top_k=self.top_k_semantic)
-        print(f"  [OK] Semantic retrieved {len(semantic_results)} chunks")
+        # Step 1 + 2: BM25 (OpenSearch) and Semantic (pgvector) retrieval in parallel
+        print(f"  [BM25 + Semantic] Retrieving top {self.top_k_bm25} / {self.top_k_semantic} chunks in parallel...")
+        results, latency_ms, degraded = self._parallel_retrieve(query)
+        bm25_results = results["bm25"]
+        semantic_results = results["semantic"]
+        print(f"  [OK] BM25 retrieved {len(bm25_results)} chunks ({latency_ms['bm25']:.0f} ms)")
+        print(f"  [OK] Semantic retrieved {len(semantic_results)} chunks ({latency_ms['semantic']:.0f} ms)")
+        if degraded:
+            print(f"  [WARN] Degraded retrieval, continuing without: {', '.join(degraded)}")
 
         # Step 3: RRF Fusion
         print(f"  [RRF] Fusing results...")
@@ -246,7 +313,9 @@ class MedicalRAGv2:
             **state,
             "bm25_chunks": bm25_chunks,
             "semantic_chunks": semantic_chunks,
-            "fused_chunks": fused_chunks
+            "fused_chunks": fused_chunks,
+            "retrieval_latency_ms": latency_ms,
+            "degraded_sources": degraded
         }
 
     def generate_node(self, state: MedicalRAGState) -> MedicalRAGState:
@@ -321,6 +390,8 @@ Answer:"""
             "bm25_chunks": [],
             "semantic_chunks": [],
             "fused_chunks": [],
+            "retrieval_latency_ms": {},
+            "degraded_sources": [],
             "answer": "",
             "sources": []
         }
@@ -336,7 +407,9 @@ Answer:"""
             "semantic_chunks": final_state["semantic_chunks"],
             "num_bm25": len(final_state["bm25_chunks"]),
             "num_semantic": len(final_state["semantic_chunks"]),
-            "num_fused": len(final_state["fused_chunks"])
+            "num_fused": len(final_state["fused_chunks"]),
+            "retrieval_latency_ms": final_state["retrieval_latency_ms"],
+            "degraded_sources": final_state["degraded_sources"]
         }
 
 
@@ -367,6 +440,7 @@ if __name__ == "__main__":
         print(f"  BM25 chunks: {result['num_bm25']}")
         print(f"  Semantic chunks: {result['num_semantic']}")
         print(f"  Fused chunks: {result['num_fused']}")
+        print(f"  Retrieval latency (ms): {', '.join(f'{k}={v:.0f}' for k, v in result['retrieval_latency_ms'].items())}")
         print(f"\n[ANSWER]")
         print(f"  {result['answer']}")
         print(f"\n[SOURCES] ({len(result['sources'])} sources)")
@@ -0,0 +1,145 @@
+"""
+Corpus tests: removal, compaction and snapshot round trips
+
+Run with: python -m pytest tests
+"""
+import numpy as np
+import pytest
+
+from corpus import Corpus
+from embedding_store import PRECISIONS
+from index_snapshot import save_snapshot, load_snapshot
+
+DIM = 16
+
+
+def make_document(rng, num_chunks):
+    """Random chunk texts and embeddings."""
+    words = [f"term{i}" for i in range(100)]
+    chunks = [" ".join(rng.choice(words, 20)) for _ in range(num_chunks)]
+    return chunks, rng.standard_normal((num_chunks, DIM)).astype(np.float32)
+
+
+def save(corpus, directory):
+    """Write a snapshot the way MedicalRAG._save_index_snapshot does."""
+    save_snapshot(
+        str(directory),
+        corpus.chunks,
+        corpus.embedding_store,
+        corpus.bm25,
+        metadata={'documents': corpus.documents, 'corpus_version': corpus.version},
+        ann_index=corpus.ann_index,
+        page_numbers=corpus.page_numbers
+    )
+
+
+def load(directory, precision):
+    """Restore a corpus the way MedicalRAG._load_index_snapshot does."""
+    snapshot = load_snapshot(str(directory))
+    corpus = Corpus(precision=precision)
+    corpus.restore(
+        documents=snapshot['manifest']['documents'],
+        chunks=snapshot['chunks'],
+        embedding_store=snapshot['embedding_store'],
+        bm25=snapshot['bm25'],
+        ann_index=snapshot['ann_index'],
+        version=snapshot['manifest']['corpus_version'],
+        page_numbers=snapshot['page_numbers']
+    )
+    return corpus
+
+
+@pytest.mark.parametrize('precision', PRECISIONS)
+def test_removing_every_document_empties_the_snapshot(tmp_path, precision):
+    rng = np.random.default_rng(0)
+    corpus = Corpus(precision=precision)
+    corpus.add_document('a.pdf', *make_document(rng, 30))
+    corpus.add_document('b.pdf', *make_document(rng, 20))
+    save(corpus, tmp_path / 'index')
+
+    for name in ('a.pdf', 'b.pdf'):
+        staged = corpus.copy()
+        staged.remove_document(name)
+        staged.compact()
+        corpus = staged
+        save(corpus, tmp_path / 'index')
+
+    restored = load(tmp_path / 'index', precision)
+    assert restored.documents == []
+    assert len(restored) == 0 and restored.live_chunks == 0
+    assert restored.bm25_search("term1 term2", 5) == []
+
+    # The emptied corpus accepts new documents again
+    chunks, embeddings = make_document(rng, 5)
+    restored.add_document('c.pdf', chunks, embeddings)
+    assert restored.embedding_store.dim == DIM
+    assert len(restored.semantic_search(embeddings[0] / np.linalg.norm(embeddings[0]), 3)) == 3
+
+
+@pytest.mark.parametrize('precision', PRECISIONS)
+def test_compact_matches_a_fresh_corpus(precision):
+    rng = np.random.default_rng(1)
+    documents = {name: make_document(rng, n) for name, n in (('a', 40), ('b', 25), ('c', 30))}
+    corpus = Corpus(precision=precision)
+    for name, document in documents.items():
+        corpus.add_document(name, *document)
+    corpus.remove_document('b')
+    assert corpus.compact()
+
+    fresh = Corpus(precision=precision)
+    for name in ('a', 'c'):
+        fresh.add_document(name, *documents[name])
+
+    assert corpus.chunks == fresh.chunks
+    assert corpus.live_chunks == len(corpus) == 70
+    assert corpus.bm25_search("term3 term7", 10) == fresh.bm25_search("term3 term7", 10)
+    np.testing.assert_allclose(corpus.embedding_store.to_float32(), fresh.embedding_store.to_float32())
+
+
+@pytest.mark.parametrize('ann_backend', ['ivf', 'hnsw'])
+def test_live_corpus_is_unaffected_by_staged_ingestion(ann_backend):
+    if ann_backend == 'hnsw':
+        pytest.importorskip('hnswlib')
+    rng = np.random.default_rng(2)
+    params = {'min_train_size': 50, 'nlist': 8, 'nprobe': 8} if ann_backend == 'ivf' else {}
+    live = Corpus(ann_backend=ann_backend, ann_params=params)
+    live.add_document('a.pdf', *make_document(rng, 200))
+
+    queries = rng.standard_normal((5, DIM)).astype(np.float32)
+    queries /= np.linalg.norm(queries, axis=1, keepdims=True)
+    before = [live.semantic_search(query, 5) for query in queries]
+    assert all(len(results) == 5 for results in before)
+
+    # The staged document's chunks are the closest to every query
+    chunks, _ = make_document(rng, 100)
+    near = np.repeat(queries, 20, axis=0) + 0.01 * rng.standard_normal((100, DIM)).astype(np.float32)
+    staged = live.copy()
+    staged.add_document('b.pdf', chunks[:50], near[:50])
+    assert [live.semantic_search(query, 5) for query in queries] == before
+
+    # A failed ingestion discards the staged copy; nothing of it stays behind
+    del staged
+    assert [live.semantic_search(query, 5) for query in queries] == before
+
+    staged = live.copy()
+    staged.add_document('b.pdf', chunks, near)
+    assert [live.semantic_search(query, 5) for query in queries] == before
+    assert all(staged.document_for_chunk(chunk_id) == 'b.pdf'
+               for query in queries for chunk_id, _ in staged.semantic_search(query, 5))
+
+
+def test_ann_search_falls_back_to_exact_when_removed_chunks_crowd_out_results():
+    pytest.importorskip('hnswlib')
+    rng = np.random.default_rng(3)
+    query = rng.standard_normal(DIM).astype(np.float32)
+    query /= np.linalg.norm(query)
+
+    corpus = Corpus(ann_backend='hnsw')
+    corpus.add_document('a.pdf', *make_document(rng, 100))
+    chunks, _ = make_document(rng, 50)
+    corpus.add_document('b.pdf', chunks, query + 0.01 * rng.standard_normal((50, DIM)).astype(np.float32))
+    corpus.remove_document('b.pdf')
+
+    results = corpus.semantic_search(query, 5)
+    assert len(results) == 5
+    assert all(corpus.document_for_chunk(chunk_id) == 'a.pdf' for chunk_id, _ in results)
@@ -0,0 +1,33 @@
+"""Tests for the vector helpers in utils"""
+import numpy as np
+
+from utils import cosine_similarity, cosine_similarity_batch, normalize_rows
+
+
+def test_cosine_similarity_batch_matches_pairwise_cosine_similarity():
+    rng = np.random.default_rng(0)
+    queries = rng.standard_normal((3, 8))
+    matrix = rng.standard_normal((5, 8))
+
+    similarities = cosine_similarity_batch(queries, matrix)
+
+    assert similarities.shape == (3, 5)
+    expected = [[cosine_similarity(q, row) for row in matrix] for q in queries]
+    np.testing.assert_allclose(similarities, expected, rtol=1e-6)
+
+
+def test_cosine_similarity_batch_single_query_and_normalized_inputs():
+    rng = np.random.default_rng(1)
+    query = rng.standard_normal(8)
+    matrix = rng.standard_normal((4, 8))
+
+    scores = cosine_similarity_batch(query, matrix)
+    assert scores.shape == (4,)
+
+    normalized = cosine_similarity_batch(normalize_rows(query), normalize_rows(matrix), normalized=True)
+    np.testing.assert_allclose(normalized, scores, rtol=1e-6)
+
+
+def test_cosine_similarity_batch_zero_rows_score_zero():
+    matrix = np.array([[0.0, 0.0], [1.0, 0.0]])
+    np.testing.assert_allclose(cosine_similarity_batch(np.array([1.0, 0.0]), matrix), [0.0, 1.0])
@@ -2,9 +2,10 @@
 Utility functions for DoctorFollow Medical Search Demo
 Optimized for Turkish medical literature and practitioners
 """
+import bisect
 import re
 import numpy as np
-from typing import List, Tuple, Dict, Optional
+from typing import List, Tuple, Dict, Optional, Iterable, Iterator
 from dataclasses import dataclass
 
 
@@ -44,52 +45,184 @@ def clean_text(text: str) -> str:
     return text
 
 
-def chunk_text(text: str, size: int = 500, overlap: int = 50) -> List[str]:
+def normalize_query(query: str) -> str:
     """
-    Split text into overlapping chunks for better context preservation.
-    Optimized for Turkish sentence structures.
+    Normalize a user query for cache lookups.
+
+    Collapses whitespace and lowercases, so trivially different spellings of
+    the same question share cache entries.
+
+    Args:
+        query: Raw user query
+
+    Returns:
+        Normalized query string
+    """
+    return " ".join(query.split()).lower()
+
+
+def _chunk_end(text: str, start: int, size: int, text_length: int, offset: int = 0) -> int:
+    """
+    End of the chunk starting at `start`, pulled back to a sentence boundary
+    when one lies past the chunk's halfway point.
+
+    `offset` is the absolute position of text[0] when `text` is a window of a
+    longer document (start and text_length are absolute).
+    """
+    end = start + size
+    if end < text_length:
+        # Look for sentence ending punctuation (. ! ? common in Turkish)
+        chunk = text[start - offset:end - offset]
+        last_period = max(chunk.rfind('.'), chunk.rfind('!'), chunk.rfind('?'))
+        if last_period > size // 2:  # Only break if we're past halfway
+            end = start + last_period + 1
+    return end
+
+
+def chunk_spans(text: str, size: int = 500, overlap: int = 50) -> List[Tuple[int, int]]:
+    """
+    Character spans [start, end) of the chunks produced by chunk_text.
 
     Args:
         text: Text to chunk
-        size: Target chunk size in characters (500 works well for Turkish)
+        size: Target chunk size in characters
         overlap: Overlap between chunks in characters
 
     Returns:
-        List of text chunks
+        List of (start, end) spans (before whitespace stripping)
     """
     if not text:
         return []
 
-    chunks = []
+    spans = []
     start = 0
     text_length = len(text)
 
     while start < text_length:
-        # Get chunk
-        end = start + size
-        chunk = text[start:end]
-
-        # Try to break at sentence boundary if possible
-        if end < text_length:
-            # Look for sentence ending punctuation (. ! ? common in Turkish)
-            last_period = max(chunk.rfind('.'), chunk.rfind('!'), chunk.rfind('?'))
-            if last_period > size // 2:  # Only break if we're past halfway
-                chunk = chunk[:last_period + 1]
-                end = start + last_period + 1
-
-        chunks.append(chunk.strip())
+        end = _chunk_end(text, start, size, text_length)
+        spans.append((start, min(end, text_length)))
 
         # Move start forward with overlap
         start = end - overlap
 
         # Prevent infinite loop
         if start + size >= text_length and start < text_length:
-            chunks.append(text[start:].strip())
+            spans.append((start, text_length))
             break
 
+    return spans
+
+
+def chunk_text(text: str, size: int = 500, overlap: int = 50) -> List[str]:
+    """
+    Split text into overlapping chunks for better context preservation.
+    Optimized for Turkish sentence structures.
+
+    Args:
+        text: Text to chunk
+        size: Target chunk size in characters (500 works well for Turkish)
+        overlap: Overlap between chunks in characters
+
+    Returns:
+        List of text chunks
+    """
+    chunks = [text[start:end].strip() for start, end in chunk_spans(text, size, overlap)]
     return [c for c in chunks if c]  # Remove empty chunks
 
 
+def chunk_pages(pages: List[str], size: int = 500, overlap: int = 50) -> Tuple[List[str], List[int]]:
+    """
+    Clean and chunk per-page text, keeping the page number of each chunk.
+
+    Args:
+        pages: Raw text per page (page 1 first)
+        size: Target chunk size in characters
+        overlap: Overlap between chunks in characters
+
+    Returns:
+        (chunks, page_numbers) with 1-based page numbers
+    """
+    chunks, page_numbers = [], []
+    for chunk, page_number in iter_chunk_pages(pages, size, overlap):
+        chunks.append(chunk)
+        page_numbers.append(page_number)
+    return chunks, page_numbers
+
+
+def iter_chunk_pages(pages: Iterable[str], size: int = 500, overlap: int = 50) -> Iterator[Tuple[str, int]]:
+    """
+    Streaming clean + chunk over per-page text.
+
+    Each chunk is yielded as soon as enough pages have arrived to decide its
+    boundaries, so only about one page plus one chunk of text is held in
+    memory. The chunks are identical to chunking the whole document at once.
+
+    A chunk is attributed to the page containing its middle character, so
+    the overlap carried over from the previous page does not decide it.
+    Pages are cleaned individually and joined with a single space, which
+    matches cleaning the concatenated document text.
+
+    Args:
+        pages: Raw text per page (page 1 first), e.g. a page generator
+        size: Target chunk size in characters
+        overlap: Overlap between chunks in characters
+
+    Yields:
+        (chunk, page_number) with 1-based page numbers
+    """
+    window = ""  # joined cleaned text from absolute offset `base` onwards
+    base = 0
+    start = 0
+    page_starts: List[int] = []  # absolute offset where each non-empty page starts
+    page_numbers: List[int] = []
+
+    def make_chunk(span_start: int, span_end: int) -> Optional[Tuple[str, int]]:
+        chunk = window[span_start - base:span_end - base].strip()
+        if not chunk:
+            return None
+        page_index = bisect.bisect_right(page_starts, (span_start + span_end) // 2) - 1
+        return chunk, page_numbers[page_index]
+
+    for page_number, page in enumerate(pages, 1):
+        cleaned = clean_text(page)
+        if not cleaned:
+            continue
+        if page_starts:
+            window += " "
+        page_starts.append(base + len(window))
+        page_numbers.append(page_number)
+        window += cleaned
+
+        # Emit chunks whose boundaries no longer depend on text still to come
+        length = base + len(window)
+        while start + size < length:
+            end = _chunk_end(window, start, size, length, offset=base)
+            if end - overlap + size >= length:
+                break  # chunk_spans' final-chunk check needs the full length
+            chunk = make_chunk(start, end)
+            if chunk:
+                yield chunk
+            start = end - overlap
+
+        # Drop text before the next chunk start (keeps appends linear overall)
+        window = window[start - base:]
+        base = start
+
+    # End of document: finish exactly like chunk_spans
+    length = base + len(window)
+    while start < length:
+        end = _chunk_end(window, start, size, length, offset=base)
+        chunk = make_chunk(start, min(end, length))
+        if chunk:
+            yield chunk
+        start = end - overlap
+        if start + size >= length and start < length:
+            chunk = make_chunk(start, length)
+            if chunk:
+                yield chunk
+            break
+
+
 def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     """
     Calculate cosine similarity between two vectors.
@@ -106,7 +239,7 @@ def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     if len(b.shape) == 1:
         b = b.reshape(1, -1)
 
-    dot_product = np.dot(a, b.T)
+    dot_product = np.dot(a, b.T).item()
     norm_a = np.linalg.norm(a)
     norm_b = np.linalg.norm(b)
 
@@ -116,6 +249,64 @@ def cosine_similarity(a: np.ndarray, b: np.ndarray) -> float:
     return float(dot_product / (norm_a * norm_b))
 
 
+def normalize_rows(matrix: np.ndarray) -> np.ndarray:
+    """
+    L2-normalize each row of a matrix (zero rows are left as zeros).
+
+    Args:
+        matrix: 2-D array (n x dim) or a single vector
+
+    Returns:
+        Array of the same shape with unit-length rows
+    """
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    return matrix / np.where(norms == 0, 1, norms)
+
+
+def cosine_similarity_batch(queries: np.ndarray, matrix: np.ndarray,
+                            normalized: bool = False) -> np.ndarray:
+    """
+    Cosine similarities between every query and every row of a matrix.
+
+    Args:
+        queries: Query vectors (q x dim) or a single vector
+        matrix: Candidate vectors (n x dim)
+        normalized: Set when both inputs are already L2-normalized, which
+                    reduces the computation to one matrix product
+
+    Returns:
+        Similarity matrix (q x n), or a 1-D array of n scores for a single query
+    """
+    if not normalized:
+        queries = normalize_rows(queries)
+        matrix = normalize_rows(matrix)
+    return queries @ matrix.T
+
+
+def top_k_indices(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the k highest scores, sorted by descending score.
+
+    Uses np.argpartition (O(N)) and only sorts the k selected entries,
+    instead of a full O(N log N) argsort of the score vector.
+
+    Args:
+        scores: 1-D score array
+        k: Number of indices to return
+
+    Returns:
+        Array of at most k indices
+    """
+    n = len(scores)
+    if k <= 0 or n == 0:
+        return np.empty(0, dtype=np.int64)
+    if k >= n:
+        return np.argsort(-scores, kind='stable')
+
+    top = np.argpartition(-scores, k - 1)[:k]
+    return top[np.argsort(-scores[top], kind='stable')]
+
+
 def rrf_fusion(bm25_scores: List[Tuple[int, float]],
                semantic_scores: List[Tuple[int, float]],
                k: int = 60) -> List[Tuple[int, float]]:
@@ -224,7 +415,8 @@ def validate_citations(answer: str, num_sources: int) -> Dict[str, any]:
 
 def format_sources_with_citations(chunks: List[str],
                                   citation_ids: Optional[List[int]] = None,
-                                  max_display: int = 5) -> str:
+                                  max_display: int = 5,
+                                  page_numbers: Optional[List[int]] = None) -> str:
     """
     Format source chunks with Vancouver-style numbering.
     Used by Turkish medical journals (similar to PubMed/MEDLINE format).
@@ -233,6 +425,7 @@ def format_sources_with_citations(chunks: List[str],
         chunks: List of source text chunks
         citation_ids: Optional list of citation IDs that were actually used
         max_display: Maximum number of sources to display
+        page_numbers: Optional source page per chunk (0 = unknown)
 
     Returns:
         Formatted sources string (in Turkish)
@@ -252,7 +445,12 @@ def format_sources_with_citations(chunks: List[str],
         # Add indicator if this source was cited
         used_indicator = "[CITED] " if citation_ids and i in citation_ids else ""
 
-        formatted += f"**[{i}]** {used_indicator}{display_chunk}\n\n"
+        # Add source page if known
+        page_indicator = ""
+        if page_numbers and page_numbers[i - 1]:
+            page_indicator = f"(Sayfa {page_numbers[i - 1]}) "
+
+        formatted += f"**[{i}]** {used_indicator}{page_indicator}{display_chunk}\n\n"
 
     if len(chunks) > max_display:
         formatted += f"_...ve {len(chunks) - max_display} kaynak daha_\n"